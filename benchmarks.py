@@ -0,0 +1,966 @@
+import sys
+import time
+from playlist_engine import PlaylistEngine
+
+# Performance benchmarks for the PlayWise modules.
+# Run all of them with `python benchmarks.py`, or a subset by name:
+# `python benchmarks.py positional_edits`
+
+
+def _timed(func, *args):
+    """Run func(*args) and return (result, elapsed seconds)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _build_playlist(size, indexed=False):
+    playlist = PlaylistEngine(indexed=indexed)
+    for i in range(size):
+        playlist.add_song(f"Song {i}", f"Artist {i % 1000}", 120 + i % 300)
+    return playlist
+
+
+def bench_positional_edits(sizes=(10_000, 100_000, 500_000), operations=2_000):
+    """
+    Compare delete_song/move_song at random indices with and without the PositionIndex.
+    """
+    import random
+    print("=== Positional edits: linked list vs indexed mode ===")
+    for size in sizes:
+        rng = random.Random(size)
+        picks = [(rng.randrange(size // 2), rng.randrange(size // 2)) for _ in range(operations)]
+        for indexed in (False, True):
+            playlist = _build_playlist(size, indexed)
+
+            def run():
+                for from_index, to_index in picks:
+                    playlist.move_song(from_index, to_index)
+                    playlist.delete_song(from_index)
+                    playlist.add_song("Re-added", "Artist", 200)
+
+            _, elapsed = _timed(run)
+            mode = "indexed" if indexed else "linked "
+            print(f"  n={size:>8,} {mode}: {elapsed / operations * 1e6:9.1f} us per move+delete+add")
+
+
+def bench_handle_deletes(sizes=(2_000, 8_000, 32_000)):
+    """
+    Delete every song through SongLookup.sync_delete, by stable handle.
+    Time per delete should stay flat as the playlist grows.
+    """
+    from song_lookup import SongLookup
+    print("=== Bulk deletes by song handle ===")
+    for size in sizes:
+        playlist = PlaylistEngine()
+        lookup = SongLookup(playlist)
+        song_ids = []
+        for i in range(size):
+            song_id = f"song{i}"
+            playlist.add_song(f"Song {i % 50}", "Artist", 200, song_id=song_id)
+            lookup.add_song(song_id, f"Song {i % 50}", "Artist", 200)
+            song_ids.append(song_id)
+
+        def run():
+            for song_id in song_ids:
+                lookup.sync_delete(song_id)
+
+        _, elapsed = _timed(run)
+        print(f"  n={size:>8,}: {elapsed:7.3f} s total, {elapsed / size * 1e6:7.2f} us per delete")
+
+
+class _DictSongNode:
+    """The pre-__slots__ SongNode layout, kept here only as a memory baseline."""
+    def __init__(self, title, artist, duration):
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+        self.prev = None
+        self.next = None
+
+
+def _bytes_per_song(build, size):
+    import gc
+    import tracemalloc
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build(size)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return (after - before) / size
+
+
+def bench_memory_per_song(size=200_000):
+    """
+    Report bytes per song for the old dict-based nodes and the current __slots__ nodes.
+    Titles and artists are produced by string formatting, like rows parsed from a file,
+    so the old layout pays for one string copy per song while the new one interns them.
+    """
+    print("=== Memory per song ===")
+
+    def build_dict_nodes(count):
+        nodes = []
+        for i in range(count):
+            node = _DictSongNode(f"Song {i % 5000}", f"Artist {i % 1000}", 120 + i % 300)
+            if nodes:
+                node.prev = nodes[-1]
+                nodes[-1].next = node
+            nodes.append(node)
+        return nodes
+
+    def build_playlist(count):
+        playlist = PlaylistEngine()
+        for i in range(count):
+            playlist.add_song(f"Song {i % 5000}", f"Artist {i % 1000}", 120 + i % 300)
+        return playlist
+
+    def build_indexed_playlist(count):
+        playlist = PlaylistEngine(indexed=True)
+        for i in range(count):
+            playlist.add_song(f"Song {i % 5000}", f"Artist {i % 1000}", 120 + i % 300)
+        return playlist
+
+    # The list holding the baseline nodes costs ~8 bytes per song, subtract it
+    before = _bytes_per_song(build_dict_nodes, size) - 8
+    after = _bytes_per_song(build_playlist, size)
+    indexed = _bytes_per_song(build_indexed_playlist, size)
+    print(f"  before (dict nodes, per-song strings): {before:7.1f} bytes/song")
+    print(f"  after  (__slots__ nodes, interned):    {after:7.1f} bytes/song")
+    print(f"  after, indexed mode:                    {indexed:7.1f} bytes/song")
+
+
+def bench_bulk_load(size=500_000):
+    """
+    Compare per-row add_song against PlaylistEngine.extend and the JSONL loader,
+    with json.loads alone as the parse-speed floor.
+    """
+    import json
+    import os
+    import tempfile
+    from playlist_loader import load_jsonl
+    print("=== Bulk loading ===")
+    rows = [(f"Song {i}", f"Artist {i % 1000}", 120 + i % 300) for i in range(size)]
+
+    def per_row():
+        playlist = PlaylistEngine()
+        for title, artist, duration in rows:
+            playlist.add_song(title, artist, duration)
+        return playlist
+
+    def extend():
+        playlist = PlaylistEngine()
+        playlist.extend(rows)
+        return playlist
+
+    _, elapsed = _timed(per_row)
+    print(f"  add_song loop: {size / elapsed:12,.0f} songs/s")
+    _, elapsed = _timed(extend)
+    print(f"  extend:        {size / elapsed:12,.0f} songs/s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "songs.jsonl")
+        with open(path, "w", encoding="utf-8") as handle:
+            for title, artist, duration in rows:
+                handle.write(json.dumps({"title": title, "artist": artist, "duration": duration}) + "\n")
+
+        def parse_only():
+            with open(path, encoding="utf-8") as handle:
+                for line in handle:
+                    json.loads(line)
+
+        _, elapsed = _timed(parse_only)
+        print(f"  json parse:    {size / elapsed:12,.0f} rows/s")
+        _, elapsed = _timed(load_jsonl, path, PlaylistEngine())
+        print(f"  load_jsonl:    {size / elapsed:12,.0f} songs/s")
+
+
+def bench_summary_pass(size=1_000_000):
+    """
+    Time a PlaylistSummary pass and report its peak extra memory, which should not
+    grow with the playlist now that it iterates nodes directly.
+    """
+    import tracemalloc
+    from playlist_summary import PlaylistSummary
+    print("=== Summary pass over the iteration protocol ===")
+    playlist = PlaylistEngine()
+    playlist.extend((f"Song {i}", f"Artist {i % 1000}", 120 + i % 300) for i in range(size))
+    summary = PlaylistSummary(playlist)
+    genre_map = {f"Song {i}": "Rock" for i in range(0, 1000, 3)}
+
+    _, elapsed = _timed(summary.generate_summary, genre_map)
+    tracemalloc.start()
+    summary.generate_summary(genre_map)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  n={size:,}: {elapsed:.3f} s, peak extra memory {peak / 1024:.1f} KiB")
+
+
+def bench_sorting(sizes=(10_000, 100_000, 1_000_000)):
+    """
+    Compare the in-place linked-list merge sort with the Timsort-based builtin path.
+    """
+    import random
+    import tracemalloc
+    from playlist_sorter import PlaylistSorter
+    print("=== Sorting: in-place merge sort vs built-in ===")
+    for size in sizes:
+        rng = random.Random(size)
+        rows = [(f"Song {rng.randrange(size)}", "Artist", rng.randrange(60, 600)) for _ in range(size)]
+        for method in ("sort_playlist", "sort_playlist_builtin"):
+            playlist = PlaylistEngine()
+            playlist.extend(rows)
+            _, elapsed = _timed(getattr(PlaylistSorter(playlist), method), "duration")
+            playlist = PlaylistEngine()
+            playlist.extend(rows)
+            tracemalloc.start()
+            getattr(PlaylistSorter(playlist), method)("duration")
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  n={size:>9,} {method:<22}: {elapsed:7.3f} s, peak extra memory {peak / 1024:10.1f} KiB")
+
+
+def bench_multi_key_sort(size=200_000):
+    """
+    Time a composite sort_by spec cold, repeated on an unchanged playlist, and
+    reapplied from the permutation cache after a different sort.
+    """
+    import random
+    from playlist_sorter import PlaylistSorter
+    print("=== Multi-key sort ===")
+    rng = random.Random(size)
+    playlist = PlaylistEngine()
+    playlist.extend((f"Song {rng.randrange(size)}", f"Artist {rng.randrange(500)}", rng.randrange(60, 600))
+                    for _ in range(size))
+    sorter = PlaylistSorter(playlist)
+    spec = [("artist", "asc"), ("duration", "desc"), "title"]
+    _, cold = _timed(sorter.sort_by, spec)
+    _, unchanged = _timed(sorter.sort_by, spec)
+    sorter.sort_by(["duration"])
+    _, reapplied = _timed(sorter.sort_by, spec)
+    print(f"  n={size:,}: cold {cold:.3f} s, unchanged {unchanged * 1e6:.1f} us, "
+          f"reapplied from cache {reapplied:.3f} s")
+
+
+def bench_snapshot(sizes=(10_000, 100_000, 1_000_000), calls=1_000):
+    """
+    Time export_snapshot at growing playlist sizes; it should stay flat.
+    """
+    from playback_history import PlaybackHistory
+    from playlist_sorter import PlaylistSorter
+    from song_rating_tree import SongRatingTree
+    from system_snapshot import SystemSnapshot
+    print("=== export_snapshot cost ===")
+    for size in sizes:
+        playlist = PlaylistEngine()
+        playlist.extend((f"Song {i}", "Artist", 60 + i % 5000) for i in range(size))
+        history = PlaybackHistory(playlist)
+        for i in range(size // 10):
+            history.add_played_song(f"Song {i}", "Artist", 60)
+        rating_tree = SongRatingTree()
+        for i in range(size // 10):
+            rating_tree.insert_song(f"song{i}", f"Song {i}", "Artist", 60, 1 + i % 5)
+        snapshot = SystemSnapshot(playlist, rating_tree, history, PlaylistSorter(playlist))
+
+        def run():
+            for _ in range(calls):
+                snapshot.export_snapshot()
+
+        _, elapsed = _timed(run)
+        print(f"  n={size:>9,}: {elapsed / calls * 1e6:8.1f} us per export_snapshot")
+
+
+def bench_rating_deletes(sizes=(10_000, 100_000, 1_000_000)):
+    """
+    Insert songs across the five ratings, then delete them all in random order.
+    Time per delete should stay flat as the index grows.
+    """
+    import random
+    from song_rating_tree import SongRatingTree
+    print("=== Rating index bulk delete ===")
+    for size in sizes:
+        rating_tree = SongRatingTree()
+        for i in range(size):
+            rating_tree.insert_song(i, "Title", "Artist", 200, 1 + i % 5)
+        order = list(range(size))
+        random.Random(size).shuffle(order)
+
+        def run():
+            for song_id in order:
+                rating_tree.delete_song(song_id)
+
+        _, elapsed = _timed(run)
+        print(f"  n={size:>9,}: {elapsed / size * 1e6:6.2f} us per delete")
+
+
+def bench_rating_tree(size=1_000_000, queries=10_000):
+    """
+    Insert fine-grained ratings in sorted order (the worst case for a plain BST),
+    then time range and top-N queries.
+    """
+    import random
+    from song_rating_tree import SongRatingTree
+    print("=== Balanced rating tree ===")
+    rating_tree = SongRatingTree()
+
+    def insert_sorted():
+        for i in range(size):
+            rating_tree.insert_song(i, "Title", "Artist", 200, 1 + 4 * i / size)
+
+    _, elapsed = _timed(insert_sorted)
+    print(f"  {size:,} sorted inserts: {elapsed:.2f} s ({elapsed / size * 1e6:.2f} us each), "
+          f"tree height {rating_tree.root.height}")
+    rng = random.Random(size)
+    bounds = [rng.uniform(1, 4.99) for _ in range(queries)]
+
+    def range_queries():
+        for lo in bounds:
+            rating_tree.search_by_rating_range(lo, lo + 10 / size)
+
+    _, elapsed = _timed(range_queries)
+    print(f"  range query (~10 songs): {elapsed / queries * 1e6:.2f} us")
+    _, elapsed = _timed(lambda: [rating_tree.top_n(10) for _ in range(queries)])
+    print(f"  top_n(10): {elapsed / queries * 1e6:.2f} us")
+
+
+def bench_search(size=1_000_000, queries=2_000):
+    """Prefix (autocomplete) and fuzzy search latency over `size` distinct titles."""
+    import random
+    from search_index import SearchIndex
+    print("=== Title search index ===")
+    rng = random.Random(size)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(20_000)]
+    titles = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 4))) for _ in range(size)]
+    index = SearchIndex()
+
+    def build():
+        for i, title in enumerate(titles):
+            index.add(i, title)
+        index.prefix("")  # Sorts the prefix index
+
+    _, elapsed = _timed(build)
+    print(f"  index {size:,} titles: {elapsed:.2f} s")
+
+    samples = [rng.choice(titles) for _ in range(queries)]
+    prefixes = [title[:rng.randint(2, 6)] for title in samples]
+    typos = []
+    for title in samples:
+        position = rng.randrange(len(title))
+        typos.append(title[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + title[position + 1:])
+
+    for label, search, inputs in (("prefix top-10", index.prefix, prefixes),
+                                  ("fuzzy top-10", index.fuzzy, typos)):
+        latencies = []
+        for text in inputs:
+            start = time.perf_counter()
+            search(text, 10)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"  {label}: p50 {latencies[len(latencies) // 2] * 1e3:.3f} ms, "
+              f"p99 {latencies[len(latencies) * 99 // 100] * 1e3:.3f} ms")
+
+
+def bench_id_allocation(size=200_000):
+    """sync_add one by one versus sync_add_many, with counter and snowflake IDs."""
+    from song_lookup import SongLookup
+    from id_allocator import CounterIdAllocator, SnowflakeIdAllocator
+    print("=== Song ID allocation ===")
+    songs = [(f"Song {i % 1000}", f"Artist {i % 100}", 200) for i in range(size)]
+    for name, allocator in (("counter", CounterIdAllocator), ("snowflake", SnowflakeIdAllocator)):
+        lookup = SongLookup(PlaylistEngine(), id_allocator=allocator())
+
+        def one_by_one():
+            for title, artist, duration in songs:
+                lookup.sync_add(title, artist, duration)
+
+        _, single = _timed(one_by_one)
+        lookup = SongLookup(PlaylistEngine(), id_allocator=allocator())
+        _, batch = _timed(lookup.sync_add_many, songs)
+        assert len(lookup.song_id_map) == size
+        print(f"  {name:>9}: sync_add {size / single:>9,.0f} songs/s, "
+              f"sync_add_many {size / batch:>9,.0f} songs/s")
+
+
+def bench_history(plays=1_000_000, capacity=10_000):
+    """Memory stays flat with a bounded history; recent(k) costs O(k) regardless of size."""
+    import tracemalloc
+    from playback_history import PlaybackHistory
+    print("=== Bounded playback history ===")
+    tracemalloc.start()
+    history = PlaybackHistory(PlaylistEngine(), capacity=capacity)
+    checkpoints = {plays // 10, plays}
+    start = time.perf_counter()
+    for i in range(1, plays + 1):
+        history.add_played_song("Song", "Artist", i)
+        if i in checkpoints:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"  after {i:>9,} plays: {current / 1e6:6.2f} MB traced")
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    print(f"  add_played_song: {elapsed / plays * 1e6:.2f} us (with tracemalloc)")
+    _, elapsed = _timed(lambda: [list(history.recent(5)) for _ in range(100_000)])
+    print(f"  list(recent(5)): {elapsed / 100_000 * 1e6:.2f} us")
+
+
+def bench_play_log(events=20_000_000, batch=100_000):
+    """Play log ingest rate (per call and batched) and recovery time of a large log."""
+    import os
+    import tempfile
+    from play_log import PlayLog
+    print("=== Binary play log ===")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "plays.log")
+        log = PlayLog(path)
+        calls = 1_000_000
+        _, elapsed = _timed(lambda: [log.append(i, 200) for i in range(calls)])
+        print(f"  append():      {calls / elapsed / 1e6:5.2f} M events/s (fsync per 4096)")
+        now = time.time_ns()
+        start = time.perf_counter()
+        for base in range(0, events - calls, batch):
+            log.append_many([(i, now, 200, PlayLog.PLAY) for i in range(base, base + batch)])
+        elapsed = time.perf_counter() - start
+        print(f"  append_many(): {(events - calls) / elapsed / 1e6:5.2f} M events/s")
+        log.close()
+        print(f"  log size: {len(log):,} events, {os.path.getsize(path) / 1e6:.0f} MB")
+
+        for capacity in (10_000, 1_000_000):
+            def recover():
+                reopened = PlayLog(path)
+                plays = reopened.replay(capacity)
+                reopened.close()
+                return plays
+
+            plays, elapsed = _timed(recover)
+            print(f"  recover newest {len(plays):>9,} plays: {elapsed * 1e3:8.1f} ms")
+
+
+def bench_snapshot_io(sizes=(1_000_000, 3_000_000), rebuild_limit=1_000_000):
+    """
+    SystemSnapshot.save/load of playlist, lookup and rating tree, versus rebuilding the
+    same state with per-song calls (only for sizes up to rebuild_limit).
+    """
+    import gc
+    import os
+    import tempfile
+    from song_lookup import SongLookup
+    from song_rating_tree import SongRatingTree
+    from playback_history import PlaybackHistory
+    from playlist_sorter import PlaylistSorter
+    from system_snapshot import SystemSnapshot
+    print("=== Binary snapshot save/load ===")
+
+    def system():
+        playlist = PlaylistEngine()
+        lookup = SongLookup(playlist)
+        snapshot = SystemSnapshot(playlist, SongRatingTree(), PlaybackHistory(playlist), PlaylistSorter(playlist))
+        return snapshot, lookup
+
+    def populate(size, per_song):
+        snapshot, lookup = system()
+        rows = [(f"Song {i % 200_000}", f"Artist {i % 5_000}", 120 + i % 300) for i in range(size)]
+        if per_song:
+            for song_id, (title, artist, duration) in zip(lookup.sync_add_many(rows), rows):
+                snapshot.song_rating_tree.insert_song(song_id, title, artist, duration, 1 + song_id % 5)
+        else:
+            songs = [(title, artist, duration, song_id) for song_id, (title, artist, duration) in enumerate(rows, 1)]
+            snapshot.playlist_engine.extend(songs)
+            lookup.load_songs((song_id, title, artist, duration) for title, artist, duration, song_id in songs)
+            snapshot.song_rating_tree.load_songs((song_id, title, artist, duration, 1 + song_id % 5)
+                                                 for title, artist, duration, song_id in songs)
+        return snapshot, lookup
+
+    for size in sizes:
+        per_song = size <= rebuild_limit
+        (snapshot, lookup), elapsed = _timed(populate, size, per_song)
+        if per_song:
+            print(f"  n={size:>9,}: per-song rebuild {elapsed:6.2f} s")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.pws")
+            _, elapsed = _timed(lambda: snapshot.save(path, song_lookup=lookup))
+            print(f"  n={size:>9,}: save {elapsed:6.2f} s, {os.path.getsize(path) / 1e6:.0f} MB")
+            snapshot = lookup = None
+            gc.collect()
+            restored, restored_lookup = system()
+            _, elapsed = _timed(lambda: restored.load(path, song_lookup=restored_lookup))
+            print(f"  n={size:>9,}: load {elapsed:6.2f} s")
+            restored = restored_lookup = None
+            gc.collect()
+
+
+def bench_journal(operations=300_000, group_size=1024, rounds=3):
+    """Throughput of a mixed mutation workload with and without the write-ahead journal."""
+    import os
+    import random
+    import tempfile
+    from song_rating_tree import SongRatingTree
+    from journal import MutationJournal
+    print("=== Mutation journal overhead ===")
+
+    def workload(playlist, rating_tree):
+        rng = random.Random(7)
+        next_id = 0
+        live = []
+        for step in range(operations):
+            op = rng.random()
+            if op < 0.5 or len(live) < 2:
+                next_id += 1
+                playlist.add_song(f"Song {next_id}", "Artist", 200, song_id=next_id)
+                live.append(next_id)
+            elif op < 0.7:
+                rating_tree.insert_song(rng.choice(live), "Title", "Artist", 200, rng.randint(1, 5))
+            elif op < 0.85:
+                position = rng.randrange(len(live))
+                live[position], live[-1] = live[-1], live[position]
+                song_id = live.pop()
+                playlist.delete_by_id(song_id)
+                rating_tree.delete_song(song_id)
+            else:
+                playlist.move_by_id(rng.choice(live), rng.randrange(playlist.size))
+
+    modes = (("in-memory", False, False), ("journal", True, True), ("journal, no fsync", True, False))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        # Modes are interleaved and the best of three rounds kept, so heap warm-up and
+        # allocator noise do not land on whichever mode happens to run first
+        for round_number in range(rounds):
+            for label, journaled, fsync in modes:
+                playlist = PlaylistEngine(indexed=True)
+                rating_tree = SongRatingTree()
+                journal = None
+                if journaled:
+                    path = os.path.join(directory, f"{label.replace(' ', '_').replace(',', '')}_{round_number}")
+                    journal = MutationJournal(path, playlist, rating_tree, group_size=group_size, fsync=fsync)
+                _, elapsed = _timed(workload, playlist, rating_tree)
+                if journal is not None:
+                    journal.close()
+                results[label] = min(elapsed, results.get(label, elapsed))
+                del playlist, rating_tree, journal
+    for label, _, _ in modes:
+        overhead = (results[label] / results["in-memory"] - 1) * 100
+        print(f"  {label:>17}: {operations / results[label]:>9,.0f} ops/s ({overhead:+5.1f}%)")
+
+def bench_versions(size=1_000_000, operations=20_000):
+    """
+    Cost of recording a version per mutation with VersionedPlaylist: time and new
+    memory per version (structural sharing keeps it O(log n)), plus undo/checkout time.
+    """
+    import random
+    import tracemalloc
+    from versioned_playlist import VersionedPlaylist
+    print("=== Versioned playlist ===")
+    playlist = PlaylistEngine(indexed=True)
+    playlist.extend((f"Song {i}", f"Artist {i % 1000}", 120 + i % 300, i) for i in range(size))
+    rng = random.Random(size)
+    picks = [(rng.randrange(size), rng.randrange(size)) for _ in range(operations)]
+
+    def run():
+        for from_index, to_index in picks:
+            playlist.move_song(from_index, to_index)
+
+    _, baseline = _timed(run)
+    versions = VersionedPlaylist(playlist)
+    _, elapsed = _timed(run)
+    tracemalloc.start()
+    run()
+    grown = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"  n={size:,}: move {baseline / operations * 1e6:6.1f} us, "
+          f"move + new version {elapsed / operations * 1e6:6.1f} us, "
+          f"{grown / operations:,.0f} bytes per version")
+    order = list(playlist)
+    _, elapsed = _timed(order.copy)
+    print(f"  for comparison, a flat copy per version: {elapsed * 1e6:,.0f} us, "
+          f"{sys.getsizeof(order):,} bytes")
+    del order
+
+    def undo_all():
+        for _ in range(operations):
+            versions.undo()
+
+    _, elapsed = _timed(undo_all)
+    print(f"  undo: {elapsed / operations * 1e6:6.1f} us per step")
+    _, elapsed = _timed(versions.checkout, len(versions.versions) - 1)
+    print(f"  checkout {operations:,} versions ahead: {elapsed * 1e3:7.1f} ms")
+    _, elapsed = _timed(versions.checkout, 0)
+    print(f"  checkout(0) (relink): {elapsed * 1e3:7.1f} ms")
+
+def bench_shuffle(size=2_000_000, pins=1_000, plays=100_000):
+    """
+    Pinned shuffle over existing nodes, and lazy shuffle play: time to the first song,
+    time per song and peak memory, which stays O(pins) rather than O(n).
+    """
+    import tracemalloc
+    from pinned_songs import PinnedSongs
+    print("=== Pinned shuffle and shuffle play ===")
+    playlist = PlaylistEngine(indexed=True)
+    playlist.extend((f"Song {i}", f"Artist {i % 1000}", 120 + i % 300, i) for i in range(size))
+    pinned = PinnedSongs(playlist, seed=size)
+    for index in range(0, size, size // pins):
+        pinned.pin_song(index, f"Song {index}", index)
+    _, elapsed = _timed(pinned.shuffle_playlist)
+    print(f"  n={size:,}, {len(pinned.pinned_indices):,} pins: shuffle_playlist {elapsed:.3f} s")
+
+    songs = pinned.shuffle_play()
+    _, first = _timed(next, songs)
+
+    def play(songs):
+        for _ in range(plays):
+            next(songs)
+
+    _, elapsed = _timed(play, songs)
+    tracemalloc.start()
+    play(pinned.shuffle_play())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"  shuffle_play: first song {first * 1e3:.2f} ms, {elapsed / plays * 1e6:.1f} us per song, "
+          f"peak {peak / 1024:.0f} KiB")
+
+def bench_pins(size=1_000_000, pins=10_000, queries=100_000):
+    """
+    Bulk pinning and pin queries on a large playlist; pins stay attached to their
+    songs through deletes, so no rescan is ever needed.
+    """
+    import random
+    from pinned_songs import PinnedSongs
+    print("=== Pins attached to song nodes ===")
+    playlist = PlaylistEngine(indexed=True)
+    playlist.extend((f"Song {i}", f"Artist {i % 1000}", 120 + i % 300, i) for i in range(size))
+    pinned = PinnedSongs(playlist)
+    rng = random.Random(size)
+    song_ids = rng.sample(range(size), pins)
+    _, elapsed = _timed(pinned.pin_songs, [(song_id, rank * (size // pins)) for rank, song_id in enumerate(song_ids)])
+    print(f"  n={size:,}: pin_songs({pins:,}) {elapsed * 1e3:8.1f} ms")
+
+    def where():
+        for step in range(queries):
+            pinned.pinned_index(song_ids[step % pins])
+
+    def which():
+        for step in range(queries):
+            pinned.pinned_at(rng.randrange(playlist.size))
+
+    def deletes():
+        for _ in range(pins):
+            playlist.delete_song(rng.randrange(playlist.size))
+
+    for label, run, count in (("pinned_index", where, queries), ("pinned_at", which, queries),
+                              ("delete_song (pins follow)", deletes, pins)):
+        _, elapsed = _timed(run)
+        print(f"  {label:>25}: {elapsed / count * 1e6:6.1f} us per call")
+    print(f"  pins left after deletes: {len(pinned.pinned_nodes):,}")
+
+
+def bench_catalog(playlists=20_000, length=25, catalog_size=20_000):
+    """
+    Memory of many small playlists drawn from one catalog: per-playlist metadata copies
+    (rows parsed per user, with or without a per-playlist SongLookup) against
+    PlaylistEngine.add_track references into a shared SongCatalog.
+    """
+    import gc
+    import random
+    import tracemalloc
+    from song_catalog import SongCatalog
+    from song_lookup import SongLookup
+    print("=== Shared catalog vs per-playlist copies ===")
+    rng = random.Random(playlists)
+    picks = [[rng.randrange(catalog_size) for _ in range(length)] for _ in range(playlists)]
+    entries = playlists * length
+
+    def parsed(track):
+        # Every user's file yields its own string and int objects for the same track
+        return f"Track {track}", f"Artist {track % 500}", int(str(120 + track % 300))
+
+    def copies(with_lookup):
+        hosted = []
+        for playlist_picks in picks:
+            playlist = PlaylistEngine()
+            lookup = SongLookup(playlist) if with_lookup else None
+            for position, track in enumerate(playlist_picks):
+                title, artist, duration = parsed(track)
+                playlist.add_song(title, artist, duration, song_id=position)
+                if lookup is not None:
+                    lookup.add_song(position, title, artist, duration)
+            hosted.append((playlist, lookup))
+        return hosted
+
+    def shared():
+        catalog = SongCatalog()
+        tracks = [catalog.add_track(*parsed(track)) for track in range(catalog_size)]
+        hosted = []
+        for playlist_picks in picks:
+            playlist = PlaylistEngine()
+            for position, track in enumerate(playlist_picks):
+                playlist.add_track(tracks[track], song_id=position)
+            hosted.append(playlist)
+        return catalog, hosted
+
+    for label, build in (("add_song + SongLookup per playlist", lambda: copies(True)),
+                         ("add_song per playlist", lambda: copies(False)),
+                         ("add_track into a shared SongCatalog", shared)):
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        keep = build()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del keep
+        print(f"  {label:>36}: {(after - before) / 2**20:7.1f} MiB, "
+              f"{(after - before) / entries:6.1f} bytes per entry")
+    print(f"  ({playlists:,} playlists x {length} songs over a {catalog_size:,}-track catalog)")
+
+
+def bench_concurrent_reads(size=100_000, threads=(1, 2, 4, 8), duration=1.0, probes=20):
+    """
+    Reader throughput while a writer keeps mutating: readers that share the writer's lock
+    and read the engine, against lock-free readers of ConcurrentPlaylist snapshots.
+    """
+    import random
+    import threading
+    from concurrent_playlist import ConcurrentPlaylist
+    print("=== Concurrent reads during writes ===")
+    playlist = PlaylistEngine()
+    playlist.extend((f"Song {i}", f"Artist {i % 1000}", 120 + i % 300, i) for i in range(size))
+    concurrent = ConcurrentPlaylist(playlist)
+
+    def locked_read(rng):
+        with concurrent.lock:
+            return [playlist.song_at(rng.randrange(playlist.size)).duration for _ in range(probes)]
+
+    def snapshot_read(rng):
+        snapshot = concurrent.snapshot()
+        return [snapshot[rng.randrange(len(snapshot))].duration for _ in range(probes)]
+
+    for label, read in (("lock + engine", locked_read), ("lock-free snapshot", snapshot_read)):
+        for count in threads:
+            stop = threading.Event()
+            reads = [0] * count
+            writes = [0]
+
+            def reader(slot):
+                rng = random.Random(slot)
+                while not stop.is_set():
+                    read(rng)
+                    reads[slot] += 1
+
+            def writer():
+                rng = random.Random(-1)
+                while not stop.is_set():
+                    with concurrent.write() as engine:
+                        engine.move_song(rng.randrange(size), rng.randrange(size))
+                    writes[0] += 1
+
+            workers = [threading.Thread(target=reader, args=(slot,)) for slot in range(count)]
+            workers.append(threading.Thread(target=writer))
+            for worker in workers:
+                worker.start()
+            time.sleep(duration)
+            stop.set()
+            for worker in workers:
+                worker.join()
+            print(f"  {label:>18}, {count} reader(s): {sum(reads) / duration:>9,.0f} reads/s "
+                  f"({probes} lookups each), {writes[0] / duration:>7,.0f} writes/s")
+    concurrent.close()
+
+
+def bench_server(clients=32, requests_per_client=1_000, write_share=0.2, size=10_000):
+    """
+    Load-generate against PlayWiseServer over local TCP: concurrent clients each keep one
+    request in flight (20% writes), with write batching on and off; reports p50/p99
+    latency and throughput.
+    """
+    import asyncio
+    import random
+    from song_lookup import SongLookup
+    from song_rating_tree import SongRatingTree
+    from playback_history import PlaybackHistory
+    from playwise_server import PlayWiseServer, PlayWiseClient
+    print("=== PlayWise server load test ===")
+
+    async def run(max_batch):
+        playlist = PlaylistEngine()
+        lookup = SongLookup(playlist)
+        song_ids = lookup.sync_add_many((f"Song {i}", f"Artist {i % 100}", 120 + i % 300) for i in range(size))
+        server = PlayWiseServer(playlist, lookup, SongRatingTree(), PlaybackHistory(playlist), max_batch=max_batch)
+        host, port = await server.start()
+        latencies = []
+
+        async def client_loop(seed):
+            rng = random.Random(seed)
+            client = PlayWiseClient()
+            await client.connect(host, port)
+            for _ in range(requests_per_client):
+                started = time.perf_counter()
+                if rng.random() < write_share:
+                    if rng.random() < 0.5:
+                        await client.call("add", title="New", artist="Artist", duration=200)
+                    else:
+                        await client.call("rate", song_id=rng.choice(song_ids), rating=rng.randint(1, 5))
+                else:
+                    await client.call("get", index=rng.randrange(size))
+                latencies.append(time.perf_counter() - started)
+            await client.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(seed) for seed in range(clients)))
+        elapsed = time.perf_counter() - started
+        batches = server.batches
+        writes = server.batched_ops
+        await server.close()
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        label = "batched" if max_batch > 1 else "one op per batch"
+        print(f"  {label:>16}: {len(latencies) / elapsed:>8,.0f} ops/s, p50 {p50 * 1e3:6.2f} ms, "
+              f"p99 {p99 * 1e3:6.2f} ms, {writes / max(batches, 1):4.1f} writes per batch")
+
+    for max_batch in (1, 256):
+        asyncio.run(run(max_batch))
+    print(f"  ({clients} clients x {requests_per_client:,} requests, {write_share:.0%} writes)")
+
+
+def bench_parallel_analytics(playlists=400, length=5_000, workers=(1, 2, 4, 8)):
+    """
+    Map-reduce summary of many playlists with ParallelAnalytics: snapshot files read by
+    the workers, and in-memory playlists encoded into columnar batches by the parent,
+    against a serial PlaylistSummary pass per playlist. Speedup is bounded by the cores
+    actually available (reported), and for in-memory input by the parent's encoding pass.
+    """
+    import os
+    import tempfile
+    from playlist_summary import PlaylistSummary
+    from parallel_analytics import ParallelAnalytics
+    from system_snapshot import SystemSnapshot
+    from song_rating_tree import SongRatingTree
+    from playback_history import PlaybackHistory
+    from playlist_sorter import PlaylistSorter
+    print("=== Parallel analytics across playlists ===")
+    engines = []
+    for p in range(playlists):
+        playlist = PlaylistEngine()
+        playlist.extend((f"Song {p}-{i}", f"Artist {(p * 31 + i) % 5000}", 120 + (p + i) % 300)
+                        for i in range(length))
+        engines.append(playlist)
+
+    def serial():
+        return [PlaylistSummary(playlist).generate_summary(verify=False) for playlist in engines]
+
+    _, baseline = _timed(serial)
+    print(f"  {'PlaylistSummary per playlist':>30}: {baseline:6.2f} s")
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for p, playlist in enumerate(engines):
+            path = os.path.join(directory, f"playlist-{p}.pws")
+            SystemSnapshot(playlist, SongRatingTree(), PlaybackHistory(playlist), PlaylistSorter(playlist)).save(path)
+            paths.append(path)
+        for count in workers:
+            runner = ParallelAnalytics(workers=count)
+            _, from_memory = _timed(runner.summarize, engines)
+            _, from_files = _timed(runner.summarize_files, paths)
+            print(f"  {count} worker(s): in-memory {from_memory:6.2f} s ({baseline / from_memory:4.1f}x), "
+                  f"snapshot files {from_files:6.2f} s ({baseline / from_files:4.1f}x)")
+    print(f"  ({playlists} playlists x {length:,} songs, {len(os.sched_getaffinity(0))} core(s) available)")
+
+
+def bench_numpy_analytics(size=1_000_000, rounds=3):
+    """
+    Duration and rating statistics at 1M songs: Python loops over the nodes against
+    PlaylistArrays' vectorized queries (arrays already current), plus the one-off cost
+    of building the arrays, which any mutation other than an append pays again.
+    """
+    import heapq
+    try:
+        from numpy_analytics import PlaylistArrays
+        import numpy  # noqa: F401
+    except ImportError:
+        print("=== NumPy analytics: skipped, NumPy is not installed ===")
+        return
+    from song_rating_tree import SongRatingTree
+    print("=== NumPy analytics vs Python loops ===")
+    playlist = PlaylistEngine()
+    playlist.extend((f"Song {i}", f"Artist {i % 1000}", 120 + (i * 7919) % 300, i) for i in range(size))
+    tree = SongRatingTree()
+    tree.load_songs((i, f"Song {i}", f"Artist {i % 1000}", 120 + (i * 7919) % 300, 1 + i % 5)
+                    for i in range(0, size, 2))
+    arrays, build = _timed(PlaylistArrays, playlist, tree)
+    ratings = tree.song_id_to_rating
+
+    def loop_percentiles():
+        durations = sorted(node.duration for node in playlist)
+        return [durations[(len(durations) - 1) * q // 100] for q in (50, 90, 99)]
+
+    def loop_histogram():
+        counts = [0] * 10
+        for node in playlist:
+            counts[min((node.duration - 120) * 10 // 300, 9)] += 1
+        return counts
+
+    def loop_artists():
+        stats = {}
+        for node in playlist:
+            entry = stats.get(node.artist)
+            if entry is None:
+                entry = stats[node.artist] = [0, 0]
+            entry[0] += 1
+            entry[1] += node.duration
+        return stats
+
+    def loop_ratings():
+        counts = {}
+        for node in playlist:
+            rating = ratings.get(node.song_id)
+            if rating is not None:
+                counts[rating] = counts.get(rating, 0) + 1
+        return counts
+
+    cases = (
+        ("total playtime", lambda: sum(node.duration for node in playlist), arrays.total_playtime),
+        ("p50/p90/p99", loop_percentiles, lambda: arrays.percentiles([50, 90, 99])),
+        ("10-bin histogram", loop_histogram, lambda: arrays.histogram(10, (120, 420))),
+        ("top 5 longest", lambda: heapq.nlargest(5, playlist, key=lambda node: node.duration),
+         lambda: arrays.top_longest(5)),
+        ("per-artist group-by", loop_artists, arrays.artist_stats),
+        ("rating distribution", loop_ratings, arrays.rating_distribution),
+    )
+    for label, loop, vectorized in cases:
+        loop_time = min(_timed(loop)[1] for _ in range(rounds))
+        array_time = min(_timed(vectorized)[1] for _ in range(rounds))
+        print(f"  {label:>20}: loop {loop_time * 1e3:8.1f} ms, NumPy {array_time * 1e3:7.2f} ms "
+              f"({loop_time / array_time:6.1f}x)")
+    print(f"  {'build arrays':>20}: {build * 1e3:8.1f} ms (once, and again after a non-append edit)")
+    arrays.close()
+
+
+BENCHMARKS = {
+    "positional_edits": bench_positional_edits,
+    "handle_deletes": bench_handle_deletes,
+    "memory_per_song": bench_memory_per_song,
+    "bulk_load": bench_bulk_load,
+    "summary_pass": bench_summary_pass,
+    "sorting": bench_sorting,
+    "multi_key_sort": bench_multi_key_sort,
+    "snapshot": bench_snapshot,
+    "rating_deletes": bench_rating_deletes,
+    "rating_tree": bench_rating_tree,
+    "search": bench_search,
+    "id_allocation": bench_id_allocation,
+    "history": bench_history,
+    "play_log": bench_play_log,
+    "snapshot_io": bench_snapshot_io,
+    "journal": bench_journal,
+    "versions": bench_versions,
+    "shuffle": bench_shuffle,
+    "pins": bench_pins,
+    "catalog": bench_catalog,
+    "concurrent_reads": bench_concurrent_reads,
+    "server": bench_server,
+    "parallel_analytics": bench_parallel_analytics,
+    "numpy_analytics": bench_numpy_analytics,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
@@ -0,0 +1,119 @@
+import threading
+from contextlib import contextmanager
+from persistent_sequence import PersistentSequence
+from versioned_playlist import next_sequence
+
+# Immutable view of the playlist at one version, handed to readers
+class PlaylistSnapshot:
+    __slots__ = ("version", "songs")
+
+    def __init__(self, version, songs):
+        """
+        Initialize a snapshot.
+        Args:
+            version (int): PlaylistEngine.version the snapshot was taken at
+            songs: PersistentSequence of SongNodes in logical order
+        """
+        self.version = version
+        self.songs = songs
+
+    def __len__(self):
+        return len(self.songs)
+
+    def __iter__(self):
+        """
+        Yield the songs in order.
+        Time Complexity: O(n) for a full pass
+        Space Complexity: O(log n) expected
+        """
+        return iter(self.songs)
+
+    def __getitem__(self, index):
+        """
+        Return the song at an index.
+        Raises:
+            IndexError: If index is out of range
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        return self.songs[index]
+
+
+# Concurrent Playlist: writers serialize through a lock; readers never lock and always
+# see a complete, immutable PlaylistSnapshot. Each write block derives the next version
+# from engine events in O(log n) per mutation (structural sharing) and publishes it with
+# a single reference assignment, which is atomic in Python (read-copy-update).
+class ConcurrentPlaylist:
+    def __init__(self, playlist_engine):
+        """
+        Start publishing snapshots of a playlist.
+        Args:
+            playlist_engine: PlaylistEngine to guard (switched to indexed mode); from now
+                on it must only be mutated inside write()
+        Time Complexity: O(n) to build the first snapshot
+        Space Complexity: O(n)
+        """
+        self.playlist_engine = playlist_engine
+        playlist_engine.enable_index()
+        self.lock = threading.RLock()
+        self.working = PersistentSequence(playlist_engine)  # Order as of the latest event
+        self.current = PlaylistSnapshot(playlist_engine.version, self.working)
+        self.depth = 0  # Nesting of write() blocks on the writing thread
+        playlist_engine.subscribe(self._on_playlist_event)
+
+    def _on_playlist_event(self, event, *args):
+        self.working, _ = next_sequence(self.working, self.playlist_engine, event, args)
+
+    @contextmanager
+    def write(self):
+        """
+        Context manager for mutating the playlist: holds the writer lock, yields the
+        PlaylistEngine, and publishes one snapshot when the outermost block exits, so
+        readers see all of a block's mutations at once or none of them.
+        Usage:
+            with concurrent.write() as playlist:
+                playlist.delete_by_id(song_id)
+                playlist.add_song(...)
+        Time Complexity: O(1) to enter/exit, plus O(log n) per mutation inside
+        (O(n) for sort/shuffle/clear)
+        Space Complexity: O(log n) new nodes per mutation
+        Note: Writes may nest on one thread; only the outermost block publishes
+        """
+        with self.lock:
+            self.depth += 1
+            try:
+                yield self.playlist_engine
+            finally:
+                self.depth -= 1
+                if not self.depth:
+                    self.publish()
+
+    def publish(self):
+        """
+        Make the latest order visible to readers, if it changed.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        with self.lock:
+            version = self.playlist_engine.version
+            if version != self.current.version:
+                self.current = PlaylistSnapshot(version, self.working)
+
+    def snapshot(self):
+        """
+        Return the latest published snapshot, without taking any lock.
+        Returns:
+            PlaylistSnapshot: Immutable; unaffected by later writes
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        return self.current
+
+    def close(self):
+        """
+        Stop publishing snapshots.
+        Time Complexity: O(l) for l listeners
+        Space Complexity: O(1)
+        """
+        with self.lock:
+            self.playlist_engine.unsubscribe(self._on_playlist_event)
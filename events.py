@@ -0,0 +1,36 @@
+# Minimal observer support shared by the mutable PlayWise structures
+class EventSource:
+    """
+    Mixin that lets other modules subscribe to mutation events.
+    A listener is any callable taking (event, *args); the classes using this mixin
+    document which events they publish and with which arguments.
+    """
+    __slots__ = ()  # Lets subclasses such as PlaylistEngine use __slots__ too
+
+    def subscribe(self, listener):
+        """
+        Register a listener for mutation events.
+        Args:
+            listener (callable): Called as listener(event, *args) after each mutation
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """
+        Remove a previously registered listener.
+        Returns:
+            bool: True if the listener was registered, False otherwise
+        Time Complexity: O(l) for l listeners
+        Space Complexity: O(1)
+        """
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+            return True
+        return False
+
+    def _notify(self, event, *args):
+        """Call every listener with the event; callers check self.listeners first."""
+        for listener in self.listeners:
+            listener(event, *args)
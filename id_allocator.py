@@ -0,0 +1,126 @@
+import time
+
+# Song ID allocators for SongLookup. Any object with allocate(), allocate_many(count)
+# and observe(song_id) can be plugged in; both allocators here return plain ints, which
+# hash faster and take less memory than the old "title_timestamp" strings.
+
+
+# Monotonic counter: dense IDs 1, 2, 3, ... for a single process
+class CounterIdAllocator:
+    def __init__(self, start=1):
+        """
+        Initialize the counter.
+        Args:
+            start (int): First ID to hand out
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.next_id = start
+
+    def allocate(self):
+        """
+        Return a new unique ID.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        song_id = self.next_id
+        self.next_id += 1
+        return song_id
+
+    def allocate_many(self, count):
+        """
+        Reserve count consecutive IDs at once.
+        Args:
+            count (int): Number of IDs
+        Returns:
+            range: The reserved IDs
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if count < 0:
+            raise ValueError("count must be non-negative")
+        ids = range(self.next_id, self.next_id + count)
+        self.next_id += count
+        return ids
+
+    def observe(self, song_id):
+        """
+        Make sure an ID assigned elsewhere (e.g. loaded from a file) is never handed out.
+        Args:
+            song_id: An ID already in use; non-integer IDs are ignored
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if isinstance(song_id, int) and song_id >= self.next_id:
+            self.next_id = song_id + 1
+
+
+# Snowflake-style 64-bit IDs: 41-bit milliseconds | 10-bit worker | 12-bit sequence.
+# IDs from different workers never collide, and IDs from one worker increase strictly.
+class SnowflakeIdAllocator:
+    WORKER_BITS = 10
+    SEQUENCE_BITS = 12
+    EPOCH_MS = 1_700_000_000_000  # 2023-11-14, keeps the timestamp field small
+
+    def __init__(self, worker_id=0, clock=None):
+        """
+        Initialize the allocator for one worker.
+        Args:
+            worker_id (int): 0..1023, unique per process/machine minting IDs
+            clock (callable): Returns the current time in milliseconds (for tests);
+                defaults to the wall clock
+        Raises:
+            ValueError: If worker_id is out of range
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if not 0 <= worker_id < (1 << self.WORKER_BITS):
+            raise ValueError(f"worker_id must be in 0..{(1 << self.WORKER_BITS) - 1}")
+        self.worker_id = worker_id
+        self.clock = clock or (lambda: time.time_ns() // 1_000_000)
+        self.timestamp = -1  # Milliseconds since EPOCH_MS of the last ID
+        self.sequence = 0    # Sequence number within that millisecond
+
+    def allocate(self):
+        """
+        Return a new unique ID.
+        When more than 4096 IDs are requested within one millisecond, or the clock
+        moves backwards, the timestamp advances logically instead of blocking, so
+        IDs stay strictly increasing.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        now = self.clock() - self.EPOCH_MS
+        if now > self.timestamp:
+            self.timestamp = now
+            self.sequence = 0
+        else:
+            self.sequence += 1
+            if self.sequence >> self.SEQUENCE_BITS:
+                self.timestamp += 1
+                self.sequence = 0
+        return ((self.timestamp << (self.WORKER_BITS + self.SEQUENCE_BITS))
+                | (self.worker_id << self.SEQUENCE_BITS) | self.sequence)
+
+    def allocate_many(self, count):
+        """
+        Return count new IDs in increasing order.
+        Args:
+            count (int): Number of IDs
+        Returns:
+            list: The IDs
+        Time Complexity: O(count)
+        Space Complexity: O(count)
+        """
+        if count < 0:
+            raise ValueError("count must be non-negative")
+        allocate = self.allocate
+        return [allocate() for _ in range(count)]
+
+    def observe(self, song_id):
+        """
+        No-op: snowflake IDs embed the worker id, so IDs minted by other workers
+        cannot collide with this one's.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
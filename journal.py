@@ -0,0 +1,387 @@
+import marshal
+import os
+import struct
+import threading
+import zlib
+from song_node import SongNode
+from snapshot_format import write_columns
+
+# Journal op codes. Each op is a tuple (code, *fields) of ints, floats, strings and None.
+ADD = 1           # (ADD, title, artist, duration, song_id)
+REMOVE = 2        # (REMOVE, song_id, position) - position only for songs without a handle
+MOVE = 3          # (MOVE, song_id1, position1, song_id2, position2) - swap of two songs, post-swap positions
+REVERSE = 4       # (REVERSE,)
+RESET = 5         # (RESET, [(title, artist, duration, song_id), ...]) - full order after a sort/shuffle/clear
+RATE = 6          # (RATE, song_id, title, artist, duration, rating)
+UNRATE = 7        # (UNRATE, song_id)
+RATING_RESET = 8  # (RATING_RESET, [(song_id, title, artist, duration, rating), ...])
+PIN = 9           # (PIN, song_id, index)
+UNPIN = 10        # (UNPIN, song_id)
+INSERT = 11       # (INSERT, title, artist, duration, song_id, index)
+REORDER = 12      # (REORDER, [(title, artist, duration, song_id), ...]) - same songs in a new order
+
+
+# Write-ahead journal of playlist, rating and pin mutations, for recovery between snapshots.
+# File layout: header (magic | marshal version | generation) followed by frames
+# (u32 length | u32 crc32 | marshal-encoded list of ops), one frame per group commit.
+class MutationJournal:
+    MAGIC = b"PWJRNL01"
+    HEADER = struct.Struct("<8sIQ")
+    FRAME = struct.Struct("<II")
+
+    def __init__(self, path, playlist_engine, song_rating_tree=None, pinned_songs=None,
+                 group_size=1024, fsync=True):
+        """
+        Open (or create) the journal and start recording mutations.
+        Args:
+            path (str): Journal file; compaction keeps the previous segment at path + ".prev"
+            playlist_engine: PlaylistEngine to record
+            song_rating_tree: Optional SongRatingTree to record
+            pinned_songs: Optional PinnedSongs to record
+            group_size (int): Ops buffered before they are written with a single fsync
+            fsync (bool): If False, flushes only hand data to the OS (not crash-safe)
+        Raises:
+            ValueError: If path exists but is not a journal written by this Python version
+        Time Complexity: O(j) to validate an existing journal of j bytes
+        Space Complexity: O(group_size) for the pending ops
+        Note: Call recover() before constructing the journal, so replayed ops are not
+        recorded a second time. Ops still buffered when the process dies are lost;
+        call flush() at points that must be durable.
+        """
+        self.path = path
+        self.playlist_engine = playlist_engine
+        self.song_rating_tree = song_rating_tree
+        self.pinned_songs = pinned_songs
+        self.group_size = group_size
+        self.fsync = fsync
+        self.pending = []
+        self.compaction = None        # Background compaction thread, if one is running
+        self.compaction_error = None  # Exception raised by the last background compaction
+        if os.path.exists(path):
+            self.generation, valid_length, _ = self._scan(path, read_ops=False)
+            self.file = open(path, "r+b")
+            self.file.truncate(valid_length)  # Drop a torn or corrupt tail
+            self.file.seek(valid_length)
+        else:
+            self._create(0)
+
+        playlist_engine.subscribe(self._on_playlist_event)
+        if song_rating_tree is not None:
+            song_rating_tree.subscribe(self._on_rating_event)
+        if pinned_songs is not None:
+            pinned_songs.subscribe(self._on_pin_event)
+
+    def _create(self, generation):
+        self.generation = generation
+        self.file = open(self.path, "wb")
+        self.file.write(self.HEADER.pack(self.MAGIC, marshal.version, generation))
+        self._sync()
+
+    def _sync(self):
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    @classmethod
+    def _scan(cls, path, read_ops=True):
+        """
+        Read a journal file up to its first torn or corrupt frame.
+        Returns:
+            tuple: (generation, length of the valid prefix, list of ops or None)
+        """
+        with open(path, "rb") as handle:
+            header = handle.read(cls.HEADER.size)
+            if len(header) < cls.HEADER.size:
+                raise ValueError(f"{path} is not a PlayWise journal")
+            magic, version, generation = cls.HEADER.unpack(header)
+            if magic != cls.MAGIC:
+                raise ValueError(f"{path} is not a PlayWise journal")
+            if version != marshal.version:
+                raise ValueError(f"{path} was written with marshal version {version}")
+            ops = [] if read_ops else None
+            valid_length = cls.HEADER.size
+            while True:
+                frame = handle.read(cls.FRAME.size)
+                if len(frame) < cls.FRAME.size:
+                    break
+                length, checksum = cls.FRAME.unpack(frame)
+                data = handle.read(length)
+                if len(data) < length or zlib.crc32(data) != checksum:
+                    break
+                if read_ops:
+                    ops.extend(marshal.loads(data))
+                valid_length += cls.FRAME.size + length
+        return generation, valid_length, ops
+
+    def _log(self, op):
+        pending = self.pending
+        pending.append(op)
+        if len(pending) >= self.group_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write pending ops as one checksummed frame and fsync it (the group commit).
+        Time Complexity: O(b) for b pending ops, plus one fsync
+        Space Complexity: O(b) for the encoded frame
+        """
+        if self.pending:
+            data = marshal.dumps(self.pending)
+            self.file.write(self.FRAME.pack(len(data), zlib.crc32(data)) + data)
+            self._sync()
+            self.pending = []
+
+    def close(self):
+        """
+        Flush, wait for a running compaction and stop recording.
+        Raises:
+            Exception: Whatever a background compaction raised
+        Time Complexity: O(b) for b pending ops, plus the running compaction
+        Space Complexity: O(1)
+        """
+        self.flush()
+        self.file.close()
+        self.playlist_engine.unsubscribe(self._on_playlist_event)
+        if self.song_rating_tree is not None:
+            self.song_rating_tree.unsubscribe(self._on_rating_event)
+        if self.pinned_songs is not None:
+            self.pinned_songs.unsubscribe(self._on_pin_event)
+        self.wait()
+
+    def _on_playlist_event(self, event, *args):
+        engine = self.playlist_engine
+        if event == "add":
+            node = args[0]
+            self._log((ADD, node.title, node.artist, node.duration, node.song_id))
+        elif event == "insert":
+            node, index = args
+            self._log((INSERT, node.title, node.artist, node.duration, node.song_id, index))
+        elif event == "remove":
+            node, index = args
+            self._log((REMOVE, node.song_id, index if node.song_id is None else None))
+        elif event == "move":
+            node1, node2 = args
+            # Both positions after the swap; a swap is symmetric, so replay swaps them back
+            self._log((MOVE, node1.song_id, engine.index_of(node1), node2.song_id, engine.index_of(node2)))
+        elif event == "reverse":
+            self._log((REVERSE,))
+        elif event in ("reorder", "reset"):
+            self._log((REORDER if event == "reorder" else RESET,
+                       [(node.title, node.artist, node.duration, node.song_id) for node in engine]))
+
+    def _on_rating_event(self, event, song_id, rating):
+        if event == "rate":
+            song = self.song_rating_tree.buckets[rating].songs[song_id]
+            self._log((RATE, song_id, song["title"], song["artist"], song["duration"], rating))
+        elif event == "unrate":
+            self._log((UNRATE, song_id))
+        elif event == "reset":
+            self._log((RATING_RESET, [(song["song_id"], song["title"], song["artist"], song["duration"], rating)
+                                      for rating, song in self.song_rating_tree.iter_by_rating()]))
+
+    def _on_pin_event(self, event, song_id, index):
+        self._log((PIN, song_id, index) if event == "pin" else (UNPIN, song_id))
+
+    @classmethod
+    def apply(cls, ops, playlist_engine, song_rating_tree=None, pinned_songs=None, song_lookup=None):
+        """
+        Re-apply journaled ops to the structures.
+        Args:
+            ops (iterable): Ops as recorded by a MutationJournal
+            playlist_engine: PlaylistEngine to update
+            song_rating_tree: Optional SongRatingTree to update
+            pinned_songs: Optional PinnedSongs to update
+            song_lookup: Optional SongLookup kept in step with added/removed handles
+                (as sync_add/sync_delete would have done)
+        Returns:
+            int: Number of ops applied
+        Time Complexity: O(k) ops, each at the cost of the original mutation
+        Space Complexity: O(1) extra
+        """
+        count = 0
+        for op in ops:
+            code = op[0]
+            if code == ADD:
+                _, title, artist, duration, song_id = op
+                playlist_engine.add_song(title, artist, duration, song_id=song_id)
+                if song_lookup is not None and song_id is not None:
+                    song_lookup.add_song(song_id, title, artist, duration)
+            elif code == INSERT:
+                _, title, artist, duration, song_id, index = op
+                playlist_engine.insert_node(index, SongNode(title, artist, duration, song_id))
+                if song_lookup is not None and song_id is not None:
+                    song_lookup.add_song(song_id, title, artist, duration)
+            elif code == REMOVE:
+                _, song_id, position = op
+                if song_id is None:
+                    playlist_engine.delete_song(position)
+                else:
+                    playlist_engine.delete_by_id(song_id)
+                    if song_lookup is not None:
+                        song_lookup.delete_song(song_id)
+            elif code == MOVE:
+                _, song_id1, position1, song_id2, position2 = op
+                if position1 is None:  # Written before positions were always logged
+                    position1 = playlist_engine.locate(song_id1)
+                if position2 is None:
+                    position2 = playlist_engine.locate(song_id2)
+                playlist_engine.move_song(position1, position2)
+            elif code == REVERSE:
+                playlist_engine.reverse_playlist()
+            elif code == RESET:
+                playlist_engine.relink([SongNode(*song) for song in op[1]])
+            elif code == REORDER:
+                nodes = cls._reuse_nodes(playlist_engine, op[1])
+                if nodes is None:
+                    playlist_engine.relink([SongNode(*song) for song in op[1]])
+                else:
+                    playlist_engine.relink(nodes, reorder_only=True)  # Keeps pins and handles
+            elif code == RATE:
+                song_rating_tree.insert_song(*op[1:])
+            elif code == UNRATE:
+                song_rating_tree.delete_song(op[1])
+            elif code == RATING_RESET:
+                song_rating_tree.load_songs(op[1])
+            elif code == PIN:
+                pinned_songs.pin_at(op[1], op[2])
+            elif code == UNPIN:
+                pinned_songs.unpin_song(op[1])
+            else:
+                raise ValueError(f"Unknown journal op {code}")
+            count += 1
+        return count
+
+    @staticmethod
+    def _reuse_nodes(playlist_engine, songs):
+        """
+        Map journaled songs onto the playlist's existing nodes: by handle, or by metadata
+        for songs without one.
+        Returns:
+            list: SongNodes in the journaled order, or None if the songs differ
+        Time Complexity: O(n)
+        Space Complexity: O(n)
+        """
+        if len(songs) != len(playlist_engine):
+            return None
+        anonymous = {}  # HashMap: (title, artist, duration) -> nodes without a handle
+        for node in playlist_engine:
+            if node.song_id is None:
+                anonymous.setdefault((node.title, node.artist, node.duration), []).append(node)
+        nodes = []
+        for title, artist, duration, song_id in songs:
+            if song_id is None:
+                pool = anonymous.get((title, artist, duration))
+                if not pool:
+                    return None
+                nodes.append(pool.pop())
+            else:
+                node = playlist_engine.get_by_id(song_id)
+                if node is None:
+                    return None
+                nodes.append(node)
+        return nodes
+
+    @classmethod
+    def recover(cls, path, system_snapshot, snapshot_path=None, song_lookup=None, pinned_songs=None):
+        """
+        Restore the state after a restart: load the last snapshot (if any), then replay
+        the journal segments written since it was taken.
+        Args:
+            path (str): Journal path, as passed to the constructor
+            system_snapshot: SystemSnapshot over the structures to restore
+            snapshot_path (str): Snapshot written by compact(), or None
+            song_lookup: Optional SongLookup to restore
+            pinned_songs: Optional PinnedSongs to restore
+        Returns:
+            int: Number of journal ops replayed
+        Time Complexity: O(snapshot + journal) size
+        Space Complexity: O(journal) for the decoded ops
+        Note: Each snapshot records the journal generation it covers, so a crash at any
+        point of a compaction never applies an op twice or loses one
+        """
+        generation = 0
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            meta = system_snapshot.load(snapshot_path, song_lookup=song_lookup, pinned_songs=pinned_songs)
+            generation = meta.get("journal_generation", 0)
+        replayed = 0
+        for segment in (path + ".prev", path):
+            if os.path.exists(segment):
+                segment_generation, _, ops = cls._scan(segment)
+                if segment_generation >= generation:
+                    replayed += cls.apply(ops, system_snapshot.playlist_engine, system_snapshot.song_rating_tree,
+                                          pinned_songs, song_lookup)
+        return replayed
+
+    def compact(self, system_snapshot, snapshot_path, song_lookup=None, background=True):
+        """
+        Fold the journal into a new snapshot and start an empty journal segment.
+        The state is captured synchronously; writing and fsyncing the snapshot, and
+        deleting the old segment, happen on a background thread unless background=False.
+        Args:
+            system_snapshot: SystemSnapshot over the journaled structures
+            snapshot_path (str): Where to write the snapshot (replaced atomically)
+            song_lookup: Optional SongLookup to include in the snapshot
+            background (bool): Write the snapshot on a background thread
+        Raises:
+            Exception: Whatever the previous background compaction raised
+        Time Complexity: O(n) on the calling thread to capture the state
+        Space Complexity: O(n) for the captured columns
+        Note: If an earlier compaction failed (its error already raised by wait()), its
+        segment is still at path + ".prev"; this call then writes the snapshot
+        synchronously, so that segment is covered before it is removed
+        """
+        self.wait()
+        self.flush()
+        next_generation = self.generation + 1
+        strings, columns = system_snapshot.collect_columns(song_lookup, self.pinned_songs,
+                                                           meta={"journal_generation": next_generation})
+        previous = self.path + ".prev"
+        if os.path.exists(previous):
+            # Left by a compaction that failed or was interrupted, so the last snapshot
+            # does not cover it. The state captured above does: write it before anything
+            # replaces that segment, and start the new segment directly
+            self._write_snapshot(snapshot_path, strings, columns)
+            self.file.close()
+            os.remove(previous)
+            self._create(next_generation)
+            return
+        self.file.close()
+        os.replace(self.path, previous)
+        self._create(next_generation)
+
+        def write_snapshot():
+            self._write_snapshot(snapshot_path, strings, columns)
+            os.remove(previous)
+
+        if not background:
+            write_snapshot()
+            return
+
+        def run():
+            try:
+                write_snapshot()
+            except Exception as error:  # Surfaced by the next wait()/compact()/close()
+                self.compaction_error = error
+
+        self.compaction = threading.Thread(target=run, name="journal-compaction", daemon=True)
+        self.compaction.start()
+
+    def _write_snapshot(self, snapshot_path, strings, columns):
+        temporary = snapshot_path + ".tmp"
+        write_columns(temporary, strings, columns, fsync=self.fsync)
+        os.replace(temporary, snapshot_path)
+
+    def wait(self):
+        """
+        Block until a running background compaction has finished.
+        Raises:
+            Exception: Whatever the background compaction raised
+        Time Complexity: O(1) if no compaction is running
+        Space Complexity: O(1)
+        """
+        if self.compaction is not None:
+            self.compaction.join()
+            self.compaction = None
+        if self.compaction_error is not None:
+            error, self.compaction_error = self.compaction_error, None
+            raise error
@@ -0,0 +1,134 @@
+import bisect
+from collections import deque
+
+# Live statistics kept up to date from mutation events, so snapshots never rescan
+class LiveStats:
+    def __init__(self, playlist_engine, playback_history, song_rating_tree, recent_size=5):
+        """
+        Seed the aggregates from the current state and subscribe to further changes.
+        Args:
+            playlist_engine: Instance of PlaylistEngine
+            playback_history: Instance of PlaybackHistory
+            song_rating_tree: Instance of SongRatingTree
+            recent_size (int): Number of recent plays kept in the ring
+        Time Complexity: O(n) one-off seeding
+        Space Complexity: O(n) for the duration index, O(recent_size) for the ring
+        """
+        self.playlist_engine = playlist_engine
+        self.playback_history = playback_history
+        self.song_rating_tree = song_rating_tree
+        self.recent_size = recent_size
+
+        self.duration_buckets = {}  # HashMap: duration -> insertion-ordered dict of nodes
+        self.durations = []         # Sorted list of the distinct durations in the playlist
+        self.recent_plays = deque(reversed(playback_history.recent(recent_size)), maxlen=recent_size)
+        self.rating_counts = song_rating_tree.count_by_rating()
+        self._index_playlist()
+
+        playlist_engine.subscribe(self._on_playlist_event)
+        playback_history.subscribe(self._on_history_event)
+        song_rating_tree.subscribe(self._on_rating_event)
+
+    def close(self):
+        """
+        Stop listening to the underlying structures.
+        Time Complexity: O(l) for l listeners per structure
+        Space Complexity: O(1)
+        """
+        self.playlist_engine.unsubscribe(self._on_playlist_event)
+        self.playback_history.unsubscribe(self._on_history_event)
+        self.song_rating_tree.unsubscribe(self._on_rating_event)
+
+    def _index_playlist(self):
+        buckets = {}
+        for node in self.playlist_engine:
+            bucket = buckets.get(node.duration)
+            if bucket is None:
+                bucket = buckets[node.duration] = {}
+            bucket[node] = None
+        self.duration_buckets = buckets
+        self.durations = sorted(buckets)
+
+    def _add_node(self, node):
+        bucket = self.duration_buckets.get(node.duration)
+        if bucket is None:
+            bucket = self.duration_buckets[node.duration] = {}
+            bisect.insort(self.durations, node.duration)
+        bucket[node] = None
+
+    def _remove_node(self, node):
+        bucket = self.duration_buckets[node.duration]
+        del bucket[node]
+        if not bucket:
+            del self.duration_buckets[node.duration]
+            del self.durations[bisect.bisect_left(self.durations, node.duration)]
+
+    def _on_playlist_event(self, event, *args):
+        if event == "add" or event == "insert":
+            self._add_node(args[0])
+        elif event == "remove":
+            self._remove_node(args[0])
+        elif event == "reset":
+            self._index_playlist()
+        # move/reverse/reorder change positions only, which these stats ignore
+
+    def _on_history_event(self, event, entry):
+        if event == "play":
+            self.recent_plays.append(entry)
+        elif event == "undo":
+            self.recent_plays.pop()
+            # Backfill the oldest slot from the history the ring had evicted
+            older = self.playback_history.recent(self.recent_size)
+            if len(older) == self.recent_size:
+                self.recent_plays.appendleft(older[-1])
+
+    def _on_rating_event(self, event, song_id, rating):
+        if event == "rate":
+            self.rating_counts[rating] = self.rating_counts.get(rating, 0) + 1
+        elif event == "unrate":
+            self.rating_counts[rating] -= 1
+            if not self.rating_counts[rating]:
+                del self.rating_counts[rating]
+        elif event == "reset":
+            self.rating_counts = self.song_rating_tree.count_by_rating()
+
+    def top_longest(self, k):
+        """
+        Return the k longest songs with their playlist positions, longest first; ties
+        are broken by playlist position.
+        Returns:
+            list: Up to k (SongNode, position) pairs
+        Time Complexity: O(t log n) in indexed mode for the t songs at least as long as
+        the k-th (one O(n) pass to find their positions otherwise), plus O(t log t) to
+        order them
+        Space Complexity: O(t)
+        """
+        if k <= 0:
+            return []
+        candidates = []
+        for position in range(len(self.durations) - 1, -1, -1):
+            if len(candidates) >= k:
+                break
+            candidates.extend(self.duration_buckets[self.durations[position]])
+        engine = self.playlist_engine
+        if engine.index is not None:
+            ranked = [(node, engine.index_of(node)) for node in candidates]
+        else:
+            wanted = set(candidates)
+            positions = {}
+            for position, node in enumerate(engine):
+                if node in wanted:
+                    positions[node] = position
+                    if len(positions) == len(wanted):
+                        break
+            ranked = [(node, positions[node]) for node in candidates]
+        ranked.sort(key=lambda pair: (-pair[0].duration, pair[1]))
+        return ranked[:k]
+
+    def latest_plays(self):
+        """
+        Return the most recent plays, most recent first.
+        Time Complexity: O(recent_size)
+        Space Complexity: O(recent_size) for the output
+        """
+        return list(reversed(self.recent_plays))
@@ -0,0 +1,223 @@
+try:
+    import numpy as np
+except ImportError:  # Optional dependency: only this module needs it
+    np = None
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("numpy_analytics needs NumPy; install it with `pip install numpy`")
+
+
+# Playlist Arrays: durations, ratings and artist codes in NumPy arrays aligned with
+# playlist order, so statistics run as vectorized array operations instead of Python
+# loops over nodes. Appends are buffered and spliced in on the next query; any other
+# mutation (or a rating change) marks the arrays stale and the next query rebuilds
+# them in one pass, so a burst of edits costs one rebuild, not one per edit.
+class PlaylistArrays:
+    def __init__(self, playlist_engine, song_rating_tree=None):
+        """
+        Start tracking a playlist.
+        Args:
+            playlist_engine: PlaylistEngine to analyze
+            song_rating_tree: Optional SongRatingTree; songs are matched by song_id, and
+                unrated songs (or every song, without a tree) have rating NaN
+        Raises:
+            ImportError: If NumPy is not installed
+        Time Complexity: O(n) for the first build
+        Space Complexity: O(n) for the arrays
+        """
+        _require_numpy()
+        self.playlist_engine = playlist_engine
+        self.song_rating_tree = song_rating_tree
+        self.nodes = []          # SongNodes in playlist order
+        self.artist_names = []   # Artist code -> artist name
+        self.artist_codes = {}   # HashMap: artist name -> code
+        self.durations = np.zeros(0, dtype=np.int64)
+        self.artists = np.zeros(0, dtype=np.int64)   # Artist code of each song
+        self.ratings = np.zeros(0, dtype=np.float64)
+        self.appended = []       # Nodes added since the last refresh, in order
+        self.stale = True        # Rebuild everything on the next query
+        self.ratings_stale = False
+        playlist_engine.subscribe(self._on_playlist_event)
+        if song_rating_tree is not None:
+            song_rating_tree.subscribe(self._on_rating_event)
+        self.refresh()
+
+    def close(self):
+        """
+        Stop tracking the playlist and rating tree.
+        Time Complexity: O(l) for l listeners
+        Space Complexity: O(1)
+        """
+        self.playlist_engine.unsubscribe(self._on_playlist_event)
+        if self.song_rating_tree is not None:
+            self.song_rating_tree.unsubscribe(self._on_rating_event)
+
+    def _on_playlist_event(self, event, *args):
+        if event == "add" and not self.stale:
+            self.appended.append(args[0])  # "add" always targets the logical end
+        else:
+            self.stale = True
+            self.appended = []
+
+    def _on_rating_event(self, event, song_id, rating):
+        self.ratings_stale = True
+
+    def _encode_artists(self, nodes):
+        codes = self.artist_codes
+        names = self.artist_names
+        result = []
+        for node in nodes:
+            code = codes.get(node.artist)
+            if code is None:
+                code = codes[node.artist] = len(names)
+                names.append(node.artist)
+            result.append(code)
+        return np.array(result, dtype=np.int64)
+
+    def _ratings_of(self, nodes):
+        if self.song_rating_tree is None:
+            return np.full(len(nodes), np.nan)
+        get = self.song_rating_tree.song_id_to_rating.get
+        return np.array([get(node.song_id, np.nan) for node in nodes], dtype=np.float64)
+
+    def refresh(self):
+        """
+        Bring the arrays up to date with the playlist and ratings. Every query calls
+        this first; it is public for callers that want to pay the cost up front.
+        Time Complexity: O(1) when nothing changed, O(a) for a buffered appends
+        (plus an O(n) copy to splice them in), O(n) after any other change
+        Space Complexity: O(n)
+        """
+        if self.stale:
+            self.nodes = list(self.playlist_engine)
+            self.artist_codes = {}
+            self.artist_names = []
+            self.durations = np.array([node.duration for node in self.nodes], dtype=np.int64)
+            self.artists = self._encode_artists(self.nodes)
+            self.ratings = self._ratings_of(self.nodes)
+            self.stale = self.ratings_stale = False
+            self.appended = []
+            return
+        if self.appended:
+            added = self.appended
+            self.appended = []
+            self.nodes.extend(added)
+            self.durations = np.concatenate((self.durations,
+                                             np.array([node.duration for node in added], dtype=np.int64)))
+            self.artists = np.concatenate((self.artists, self._encode_artists(added)))
+            if not self.ratings_stale:
+                self.ratings = np.concatenate((self.ratings, self._ratings_of(added)))
+        if self.ratings_stale:
+            self.ratings = self._ratings_of(self.nodes)
+            self.ratings_stale = False
+
+    def total_playtime(self):
+        """
+        Return the total duration of the playlist in seconds.
+        Time Complexity: O(n) vectorized
+        Space Complexity: O(1)
+        """
+        self.refresh()
+        return int(self.durations.sum())
+
+    def percentiles(self, q):
+        """
+        Return duration percentiles (linear interpolation, as numpy.percentile).
+        Args:
+            q (float or sequence): Percentile(s) between 0 and 100
+        Returns:
+            float or list: One value per requested percentile
+        Raises:
+            ValueError: If the playlist is empty or q is outside 0-100
+        Time Complexity: O(n) vectorized (introselect)
+        Space Complexity: O(n) for the partitioned copy
+        """
+        self.refresh()
+        if not len(self.durations):
+            raise ValueError("Cannot take percentiles of an empty playlist")
+        result = np.percentile(self.durations, q)
+        return result.tolist() if np.ndim(result) else float(result)
+
+    def histogram(self, bins=10, value_range=None):
+        """
+        Return a histogram of song durations.
+        Args:
+            bins (int or sequence): Number of equal-width bins, or the bin edges
+            value_range (tuple): Optional (low, high) for equal-width bins
+        Returns:
+            tuple: (counts list, bin edges list)
+        Time Complexity: O(n) vectorized
+        Space Complexity: O(bins)
+        """
+        self.refresh()
+        counts, edges = np.histogram(self.durations, bins=bins, range=value_range)
+        return counts.tolist(), edges.tolist()
+
+    def top_longest(self, k):
+        """
+        Return the k longest songs, longest first (ties in playlist order).
+        Returns:
+            list: Up to k SongNodes
+        Time Complexity: O(n) vectorized selection (argpartition) plus O(t log t)
+        to order the t songs at least as long as the k-th
+        Space Complexity: O(n) for the partition indexes
+        """
+        self.refresh()
+        durations = self.durations
+        size = len(durations)
+        if k <= 0 or not size:
+            return []
+        if k < size:
+            threshold = durations[np.argpartition(durations, size - k)[size - k]]
+            candidates = np.flatnonzero(durations >= threshold)
+        else:
+            candidates = np.arange(size)
+        order = candidates[np.argsort(-durations[candidates], kind="stable")[:k]]
+        nodes = self.nodes
+        return [nodes[position] for position in order.tolist()]
+
+    def artist_stats(self):
+        """
+        Group the playlist by artist.
+        Returns:
+            dict: Artist -> {"songs": count, "playtime": total seconds,
+                "mean_duration": seconds, "mean_rating": mean of rated songs or None}
+        Time Complexity: O(n) vectorized (bincount) plus O(a) for a artists in the output
+        Space Complexity: O(a)
+        """
+        self.refresh()
+        size = len(self.artist_names)
+        counts = np.bincount(self.artists, minlength=size)
+        playtime = np.bincount(self.artists, weights=self.durations, minlength=size)
+        rated = ~np.isnan(self.ratings)
+        # Weighted bincounts over every song avoid copying out the rated subset
+        rated_counts = np.bincount(self.artists, weights=rated, minlength=size)
+        rating_sums = np.bincount(self.artists, weights=np.where(rated, self.ratings, 0.0), minlength=size)
+        stats = {}
+        for code, (songs, total, rated_count, rating_sum) in enumerate(zip(
+                counts.tolist(), playtime.tolist(), rated_counts.tolist(), rating_sums.tolist())):
+            if songs:  # Codes of artists no longer in the playlist stay until a rebuild
+                stats[self.artist_names[code]] = {
+                    "songs": songs,
+                    "playtime": int(total),
+                    "mean_duration": total / songs,
+                    "mean_rating": rating_sum / rated_count if rated_count else None
+                }
+        return stats
+
+    def rating_distribution(self):
+        """
+        Count the playlist's songs per rating (unrated songs are left out).
+        Returns:
+            dict: Rating -> song count, in ascending rating order; whole-number ratings
+                are returned as ints, like SongRatingTree.count_by_rating
+        Time Complexity: O(n log n) vectorized (numpy.unique sorts)
+        Space Complexity: O(n)
+        """
+        self.refresh()
+        ratings = self.ratings[~np.isnan(self.ratings)]
+        values, counts = np.unique(ratings, return_counts=True)
+        return {int(value) if value.is_integer() else value: count
+                for value, count in zip(values.tolist(), counts.tolist())}
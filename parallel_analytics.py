@@ -0,0 +1,337 @@
+import heapq
+import math
+import os
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b
+from snapshot_format import read_columns
+
+# Map-reduce analytics over many playlists.
+# Map: each worker summarizes one columnar batch (a string table plus flat arrays; see
+# encode_playlists) into a PartialSummary. Reduce: the parent merges the partials in
+# batch order. A batch pickles as flat int64 arrays plus string lists, instead of a
+# linked graph of SongNodes that pickle would have to walk object by object.
+
+
+# HyperLogLog: mergeable estimate of the number of distinct artists
+class HyperLogLog:
+    def __init__(self, precision=12):
+        """
+        Initialize an empty sketch.
+        Args:
+            precision (int): log2 of the register count, 4 <= precision <= 16; the
+                standard error is about 1.04 / sqrt(2 ** precision) (1.6% at 12)
+        Raises:
+            ValueError: If precision is out of range
+        Time Complexity: O(m) for m = 2 ** precision registers
+        Space Complexity: O(m) bytes
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError("precision must be between 4 and 16")
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, text):
+        """
+        Add a string to the sketch.
+        Time Complexity: O(len(text))
+        Space Complexity: O(1)
+        """
+        self.update((text,))
+
+    def update(self, texts):
+        """
+        Add many strings to the sketch.
+        Time Complexity: O(total length of texts)
+        Space Complexity: O(1)
+        """
+        registers = self.registers
+        bits = 64 - self.precision
+        mask = (1 << bits) - 1
+        from_bytes = int.from_bytes
+        for text in texts:
+            # blake2b rather than hash(): str hashes are salted per process
+            value = from_bytes(blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+            rank = bits - (value & mask).bit_length() + 1
+            slot = value >> bits
+            if rank > registers[slot]:
+                registers[slot] = rank
+
+    def merge(self, other):
+        """
+        Fold another sketch into this one (the union of both sets).
+        Raises:
+            ValueError: If the sketches have different precisions
+        Time Complexity: O(m)
+        Space Complexity: O(m) transient
+        """
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches of different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        """
+        Estimate the number of distinct strings added.
+        Returns:
+            int: The estimate (exact-ish below a few hundred, via linear counting)
+        Time Complexity: O(m)
+        Space Complexity: O(1)
+        """
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / math.fsum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            estimate = size * math.log(size / zeros)
+        return round(estimate)
+
+
+# Partial Summary: the mergeable result of summarizing some of the playlists
+class PartialSummary:
+    def __init__(self, top_k=5, precision=12):
+        """
+        Initialize an empty partial summary.
+        Args:
+            top_k (int): Number of longest songs to keep
+            precision (int): HyperLogLog precision for the artist count
+        Time Complexity: O(2 ** precision)
+        Space Complexity: O(g + k + 2 ** precision) for g genres
+        """
+        self.top_k = top_k
+        self.playlist_count = 0
+        self.song_count = 0
+        self.total_playtime = 0
+        self.genre_counts = {}  # HashMap: genre -> songs
+        self.artists = HyperLogLog(precision)
+        self.longest = []       # Up to top_k (duration, title, artist), longest first
+
+    def merge(self, other):
+        """
+        Fold another partial summary into this one. Merging in playlist order keeps the
+        result identical to a serial pass (ties in top_k go to the earlier song).
+        Returns:
+            PartialSummary: self
+        Time Complexity: O(g + k + 2 ** precision)
+        Space Complexity: O(k)
+        """
+        self.playlist_count += other.playlist_count
+        self.song_count += other.song_count
+        self.total_playtime += other.total_playtime
+        for genre, count in other.genre_counts.items():
+            self.genre_counts[genre] = self.genre_counts.get(genre, 0) + count
+        self.artists.merge(other.artists)
+        self.longest = heapq.nlargest(self.top_k, self.longest + other.longest, key=lambda song: song[0])
+        return self
+
+    def result(self):
+        """
+        Return the summary in the shape of PlaylistSummary/SystemSnapshot output.
+        Returns:
+            dict: playlist_count, song_count, total_playtime, genre_distribution,
+                artist_count (HyperLogLog estimate) and top_longest (list of dicts)
+        Time Complexity: O(g + k + 2 ** precision)
+        Space Complexity: O(g + k)
+        """
+        return {
+            "playlist_count": self.playlist_count,
+            "song_count": self.song_count,
+            "total_playtime": self.total_playtime,
+            "genre_distribution": dict(self.genre_counts),
+            "artist_count": self.artists.count(),
+            "top_longest": [{"title": title, "artist": artist, "duration": duration}
+                            for duration, title, artist in self.longest]
+        }
+
+
+def encode_playlists(playlists, genre_of=None):
+    """
+    Pack playlists into one columnar batch.
+    Args:
+        playlists (iterable): PlaylistEngines
+        genre_of (callable): Returns the genre of a SongNode; every song is "Unknown"
+            when omitted (e.g. PlaylistSummary(engine)._genre_of)
+    Returns:
+        dict: Columns "offsets" (playlist starts, plus the total) and "duration" as
+            int64 arrays, and "title"/"artist"/"genre" as lists of str. Node strings are
+            interned, so pickle writes each distinct string once and a repeated artist
+            or genre costs a short memo reference
+    Time Complexity: O(n) for n songs
+    Space Complexity: O(n) for the columns
+    """
+    offsets = array("q", [0])
+    titles = []
+    artists = []
+    genres = []
+    durations = array("q")
+    for playlist in playlists:
+        nodes = list(playlist)
+        titles.extend([node.title for node in nodes])
+        artists.extend([node.artist for node in nodes])
+        if genre_of is None:
+            genres.extend(["Unknown"] * len(nodes))
+        else:
+            genres.extend(map(genre_of, nodes))
+        durations.extend([node.duration for node in nodes])
+        offsets.append(len(durations))
+    return {"offsets": offsets, "title": titles, "artist": artists, "genre": genres, "duration": durations}
+
+
+def _longest(top_k, durations, titles, artists, text=None):
+    """Top-k (duration, title, artist) of one column set, earliest first among ties."""
+    positions = heapq.nlargest(top_k, range(len(durations)), key=durations.__getitem__)
+    if text is None:
+        return [(durations[position], titles[position], artists[position]) for position in positions]
+    return [(durations[position], text(titles[position]), text(artists[position])) for position in positions]
+
+
+def summarize_batch(batch, top_k=5, precision=12):
+    """
+    Map step: summarize one columnar batch (runs in a worker process).
+    Args:
+        batch (dict): Columns from encode_playlists
+        top_k (int): Number of longest songs to keep
+        precision (int): HyperLogLog precision
+    Returns:
+        PartialSummary: The batch's summary
+    Time Complexity: O(n + a) for n songs and a distinct artists; summing, counting,
+    deduplicating and top-k selection each run in C over a flat column
+    Space Complexity: O(g + a + k)
+    """
+    durations = batch["duration"]
+    partial = PartialSummary(top_k, precision)
+    partial.playlist_count = len(batch["offsets"]) - 1
+    partial.song_count = len(durations)
+    partial.total_playtime = sum(durations)
+    partial.genre_counts = dict(Counter(batch["genre"]))
+    partial.artists.update(set(batch["artist"]))
+    partial.longest = _longest(top_k, durations, batch["title"], batch["artist"])
+    return partial
+
+
+def summarize_snapshots(paths, top_k=5, precision=12):
+    """
+    Map step over files written by SystemSnapshot.save: the worker reads the playlist
+    columns itself, so the parent only ships paths. Artists are deduplicated across all
+    the task's files before they are hashed into the sketch.
+    Args:
+        paths (list): Snapshot files, one playlist each
+        top_k (int): Number of longest songs to keep
+        precision (int): HyperLogLog precision
+    Returns:
+        PartialSummary: The summary of the files' playlists (genres are "Unknown")
+    Raises:
+        ValueError: If a file is not a valid snapshot
+    Time Complexity: O(b) for b bytes in the files
+    Space Complexity: O(largest file + a) for a distinct artists
+    """
+    partial = PartialSummary(top_k, precision)
+    artists = set()
+    candidates = []
+    for path in paths:
+        strings, columns = read_columns(path)
+        durations = columns["playlist_duration"]
+        partial.playlist_count += 1
+        partial.song_count += len(durations)
+        partial.total_playtime += sum(durations)
+        artists.update(map(strings.__getitem__, set(columns["playlist_artist"])))
+        candidates.extend(_longest(top_k, durations, columns["playlist_title"], columns["playlist_artist"],
+                                   strings.__getitem__))
+    if partial.song_count:
+        partial.genre_counts = {"Unknown": partial.song_count}
+    partial.artists.update(artists)
+    partial.longest = heapq.nlargest(top_k, candidates, key=lambda song: song[0])
+    return partial
+
+
+# Parallel Analytics: map-reduce summary over many playlists on a ProcessPoolExecutor
+class ParallelAnalytics:
+    def __init__(self, workers=None, batch_songs=100_000, top_k=5, precision=12):
+        """
+        Initialize the runner.
+        Args:
+            workers (int): Worker processes (defaults to os.cpu_count()); 1 runs the
+                map step in this process, with no pool
+            batch_songs (int): Songs per batch; whole playlists are kept together
+            top_k (int): Number of longest songs to report
+            precision (int): HyperLogLog precision for the artist count
+        Raises:
+            ValueError: If workers or batch_songs is less than 1
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        workers = workers if workers is not None else os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if batch_songs < 1:
+            raise ValueError("batch_songs must be at least 1")
+        self.workers = workers
+        self.batch_songs = batch_songs
+        self.top_k = top_k
+        self.precision = precision
+
+    def summarize(self, playlists, genre_of=None):
+        """
+        Summarize in-memory playlists. The parent walks the nodes once to encode the
+        batches (workers start on the first batch while later ones are encoded).
+        Args:
+            playlists (iterable): PlaylistEngines
+            genre_of (callable): Returns the genre of a SongNode (see encode_playlists)
+        Returns:
+            dict: See PartialSummary.result
+        Time Complexity: O(n) in the parent to encode, plus O(n / w) per worker
+        Space Complexity: O(w * batch_songs) for the batches in flight
+        """
+        batches = (encode_playlists(group, genre_of) for group in self._groups(playlists))
+        return self._reduce(summarize_batch, batches)
+
+    def summarize_files(self, paths):
+        """
+        Summarize playlists saved with SystemSnapshot.save; each map task reads a run
+        of consecutive files.
+        Args:
+            paths (iterable): Snapshot files
+        Returns:
+            dict: See PartialSummary.result
+        Raises:
+            ValueError: If a file is not a valid snapshot
+        Time Complexity: O(b / w) for b bytes over w workers; the parent only merges
+        Space Complexity: O(largest file) per worker
+        """
+        paths = list(paths)
+        per_task = -(-len(paths) // (4 * self.workers)) or 1  # About four tasks per worker
+        return self._reduce(summarize_snapshots, (paths[start:start + per_task]
+                                                  for start in range(0, len(paths), per_task)))
+
+    def _groups(self, playlists):
+        """Yield lists of whole playlists holding about batch_songs songs each."""
+        group = []
+        songs = 0
+        for playlist in playlists:
+            group.append(playlist)
+            songs += len(playlist)
+            if songs >= self.batch_songs:
+                yield group
+                group = []
+                songs = 0
+        if group:
+            yield group
+
+    def _reduce(self, map_task, items):
+        total = PartialSummary(self.top_k, self.precision)
+        tail = (self.top_k, self.precision)
+        if self.workers == 1:
+            for item in items:
+                total.merge(map_task(item, *tail))
+            return total.result()
+        # Keep about two tasks per worker in flight, merging in submission order, so
+        # the parent never holds more than a few batches at once
+        with ProcessPoolExecutor(self.workers) as pool:
+            in_flight = deque()
+            for item in items:
+                in_flight.append(pool.submit(map_task, item, *tail))
+                if len(in_flight) >= 2 * self.workers:
+                    total.merge(in_flight.popleft().result())
+            while in_flight:
+                total.merge(in_flight.popleft().result())
+        return total.result()
@@ -0,0 +1,221 @@
+import random
+
+# Node of the persistent treap; never modified once a sequence references it
+class PersistentNode:
+    __slots__ = ("value", "priority", "count", "left", "right")
+
+    def __init__(self, value, priority, left=None, right=None, count=None):
+        """
+        Initialize an immutable treap node.
+        Args:
+            value: The item stored at this position
+            priority (float): Random heap priority that keeps the treap balanced
+            left: Subtree of earlier positions
+            right: Subtree of later positions
+            count (int): Subtree size, if the caller already knows it
+        """
+        self.value = value
+        self.priority = priority
+        self.left = left
+        self.right = right
+        if count is None:
+            count = 1 + (left.count if left else 0) + (right.count if right else 0)
+        self.count = count  # Number of positions in this subtree
+
+
+def _count(node):
+    return node.count if node else 0
+
+
+def _merge(left, right):
+    """Concatenate two treaps, copying only the nodes on the merge path."""
+    if not left:
+        return right
+    if not right:
+        return left
+    if left.priority > right.priority:
+        return PersistentNode(left.value, left.priority, left.left, _merge(left.right, right))
+    return PersistentNode(right.value, right.priority, _merge(left, right.left), right.right)
+
+
+def _split(node, k):
+    """Split a treap into (first k positions, the rest), copying only the split path."""
+    if not node:
+        return None, None
+    left_count = _count(node.left)
+    if left_count >= k:
+        left, right = _split(node.left, k)
+        return left, PersistentNode(node.value, node.priority, right, node.right)
+    left, right = _split(node.right, k - left_count - 1)
+    return PersistentNode(node.value, node.priority, node.left, left), right
+
+
+def _assign(node, position, value):
+    """Return a copy of the path to position with the value there replaced."""
+    path = []
+    while True:
+        left_count = node.left.count if node.left else 0
+        if position == left_count:
+            break
+        path.append((node, position < left_count))
+        if position < left_count:
+            node = node.left
+        else:
+            position -= left_count + 1
+            node = node.right
+    # Subtree sizes do not change, so every copy reuses its original's count
+    copy = PersistentNode(value, node.priority, node.left, node.right, node.count)
+    for parent, went_left in reversed(path):
+        if went_left:
+            copy = PersistentNode(parent.value, parent.priority, copy, parent.right, parent.count)
+        else:
+            copy = PersistentNode(parent.value, parent.priority, parent.left, copy, parent.count)
+    return copy
+
+
+def _build(values):
+    """
+    Build a treap from values in order using the Cartesian-tree stack method.
+    Nodes are patched while still private to the build, then never again.
+    Time Complexity: O(k)
+    Space Complexity: O(k)
+    """
+    spine = []
+    last = None
+    for value in values:
+        node = PersistentNode(value, random.random())
+        last = None
+        while spine and spine[-1].priority < node.priority:
+            last = spine.pop()
+            last.count = 1 + _count(last.left) + _count(last.right)
+        node.left = last
+        if spine:
+            spine[-1].right = node
+        spine.append(node)
+    while spine:
+        last = spine.pop()
+        last.count = 1 + _count(last.left) + _count(last.right)
+    return last
+
+
+# Immutable sequence (persistent implicit treap): every update returns a new sequence
+# that shares all untouched nodes with the old one, so old versions stay valid for free
+class PersistentSequence:
+    __slots__ = ("root", "reversed")
+
+    def __init__(self, values=(), _root=None, _reversed=False):
+        """
+        Initialize a sequence holding values in order.
+        Args:
+            values (iterable): Initial items
+        Time Complexity: O(k) for k values
+        Space Complexity: O(k)
+        """
+        self.root = _root if _root is not None else _build(values)
+        self.reversed = _reversed  # Lazy reversal flag, as in PlaylistEngine
+
+    def _derive(self, root, reversed_state=None):
+        return PersistentSequence(_root=root, _reversed=self.reversed if reversed_state is None else reversed_state)
+
+    def __len__(self):
+        return _count(self.root)
+
+    def _physical(self, index):
+        size = _count(self.root)
+        if index < 0 or index >= size:
+            raise IndexError("Invalid index")
+        return size - 1 - index if self.reversed else index
+
+    def __getitem__(self, index):
+        """
+        Return the item at a logical index.
+        Raises:
+            IndexError: If index is out of range
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        position = self._physical(index)
+        node = self.root
+        while True:
+            left_count = _count(node.left)
+            if position < left_count:
+                node = node.left
+            elif position == left_count:
+                return node.value
+            else:
+                position -= left_count + 1
+                node = node.right
+
+    def __iter__(self):
+        """
+        Yield items in logical order.
+        Time Complexity: O(n) for a full pass
+        Space Complexity: O(log n) expected for the traversal stack
+        """
+        first, second = ("right", "left") if self.reversed else ("left", "right")
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = getattr(node, first)
+            node = stack.pop()
+            yield node.value
+            node = getattr(node, second)
+
+    def insert(self, index, value):
+        """
+        Return a new sequence with value inserted so it ends up at the logical index.
+        Args:
+            index (int): 0 <= index <= len(self)
+            value: Item to insert
+        Raises:
+            IndexError: If index is out of range
+        Time Complexity: O(log n) expected
+        Space Complexity: O(log n) expected new nodes; the rest is shared
+        """
+        size = _count(self.root)
+        if index < 0 or index > size:
+            raise IndexError("Invalid index")
+        position = size - index if self.reversed else index
+        left, right = _split(self.root, position)
+        return self._derive(_merge(_merge(left, PersistentNode(value, random.random())), right))
+
+    def append(self, value):
+        """
+        Return a new sequence with value added at the logical end.
+        Time Complexity: O(log n) expected
+        Space Complexity: O(log n) expected new nodes
+        """
+        return self.insert(_count(self.root), value)
+
+    def delete(self, index):
+        """
+        Return a new sequence without the item at the logical index.
+        Raises:
+            IndexError: If index is out of range
+        Time Complexity: O(log n) expected
+        Space Complexity: O(log n) expected new nodes
+        """
+        position = self._physical(index)
+        left, rest = _split(self.root, position)
+        _, right = _split(rest, 1)
+        return self._derive(_merge(left, right))
+
+    def set(self, index, value):
+        """
+        Return a new sequence with the item at the logical index replaced.
+        Raises:
+            IndexError: If index is out of range
+        Time Complexity: O(log n) expected
+        Space Complexity: O(log n) expected new nodes
+        """
+        return self._derive(_assign(self.root, self._physical(index), value))
+
+    def reverse(self):
+        """
+        Return the sequence in reverse order, sharing every node.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        return self._derive(self.root, not self.reversed)
@@ -1,58 +1,226 @@
+import bisect
 import random
 from playlist_engine import PlaylistEngine
+from events import EventSource
 
-# Pinned Songs for fixing songs at specific indices during shuffles
-class PinnedSongs:
-    def __init__(self, playlist_engine):
+
+def _random_permutation(size, rng, rounds=4):
+    """
+    Lazily yield range(size) in a random order without storing it.
+    A keyed Feistel network permutes the smallest even-bit domain >= size (at most 4x
+    larger); counting through that domain and skipping outputs >= size visits every
+    value below size exactly once.
+    Time Complexity: O(1) amortized per value
+    Space Complexity: O(1)
+    """
+    if size <= 1:
+        yield from range(size)
+        return
+    half = ((size - 1).bit_length() + 1) // 2
+    mask = (1 << half) - 1
+    keys = [rng.getrandbits(32) for _ in range(rounds)]
+    for counter in range(1 << (2 * half)):
+        left, right = counter >> half, counter & mask
+        for key in keys:
+            mixed = (right * 0x9E3779B1 + key) & 0xFFFFFFFF
+            mixed ^= mixed >> 15
+            mixed = (mixed * 0x2C1B3C6D) & 0xFFFFFFFF
+            mixed ^= mixed >> 12
+            left, right = right, left ^ (mixed & mask)
+        value = (left << half) | right
+        if value < size:
+            yield value
+
+# Pinned Songs for fixing songs at specific indices during shuffles.
+# A pin is attached to the song's node, not to a number: it follows the song through
+# deletes, moves and reversals of other songs, and its index is read from the playlist's
+# PositionIndex in O(log n). Removing a pinned song from the playlist unpins it.
+# Published events (see subscribe): ("pin", song_id, index) and ("unpin", song_id, index,
+# or None when the song left the playlist)
+class PinnedSongs(EventSource):
+    def __init__(self, playlist_engine, seed=None):
         """
         Initialize the pinned songs module.
         Args:
-            playlist_engine: Instance of PlaylistEngine
-        Time Complexity: O(1)
-        Space Complexity: O(1)
+            playlist_engine: Instance of PlaylistEngine (switched to indexed mode)
+            seed: Optional seed for this instance's random generator, so shuffles
+                can be reproduced (the global random module is not touched)
+        Time Complexity: O(n) one-off if the playlist was not indexed yet, else O(1)
+        Space Complexity: O(1), O(n) for a newly built index
         """
         self.playlist_engine = playlist_engine
-        self.pinned_indices = {}  # HashMap: song_id -> pinned index
-        self.index_to_song_id = {}  # HashMap: index -> song_id for pinned positions
+        playlist_engine.enable_index()
+        self.random = random.Random(seed)
+        self.pinned_nodes = {}  # HashMap: song_id -> pinned SongNode
+        self.pin_ids = {}       # HashMap: pinned SongNode -> song_id
+        self.listeners = []  # Mutation event listeners
+        playlist_engine.subscribe(self._on_playlist_event)
+
+    def close(self):
+        """
+        Stop following playlist changes.
+        Time Complexity: O(l) for l listeners
+        Space Complexity: O(1)
+        """
+        self.playlist_engine.unsubscribe(self._on_playlist_event)
+
+    def _on_playlist_event(self, event, *args):
+        if event == "remove":
+            if args[0] in self.pin_ids:
+                self._detach(self.pin_ids[args[0]], None)
+        elif event == "reset":
+            # The song set may have changed: keep only pins whose nodes are still linked
+            root = self.playlist_engine.index.root
+            for node, song_id in list(self.pin_ids.items()):
+                slot = node.index_node
+                while slot is not None and slot.parent is not None:
+                    slot = slot.parent
+                if slot is None or slot is not root:
+                    self._detach(song_id, None)
+
+    def _attach(self, song_id, node, index):
+        self.pinned_nodes[song_id] = node
+        self.pin_ids[node] = song_id
+        if self.listeners:
+            self._notify("pin", song_id, index)
+
+    def _detach(self, song_id, index):
+        del self.pin_ids[self.pinned_nodes.pop(song_id)]
+        if self.listeners:
+            self._notify("unpin", song_id, index)
+
+    def _check_pin(self, song_id, index):
+        if index < 0 or index >= self.playlist_engine.size:
+            raise IndexError("Invalid index")
+        if song_id in self.pinned_nodes:
+            raise ValueError("Song is already pinned")
+        if self.playlist_engine.song_at(index) in self.pin_ids:
+            raise ValueError("Index is already pinned")
+
+    @property
+    def pinned_indices(self):
+        """
+        HashMap: song_id -> current index of every pin (a fresh dict).
+        Time Complexity: O(p log n) for p pins
+        """
+        index_of = self.playlist_engine.index_of
+        return {song_id: index_of(node) for song_id, node in self.pinned_nodes.items()}
+
+    @property
+    def index_to_song_id(self):
+        """
+        HashMap: current index -> song_id of every pin (a fresh dict).
+        Time Complexity: O(p log n) for p pins
+        """
+        index_of = self.playlist_engine.index_of
+        return {index_of(node): song_id for song_id, node in self.pinned_nodes.items()}
+
+    def pinned_index(self, song_id):
+        """
+        Return where a pinned song currently is.
+        Returns:
+            int: Its index, or None if song_id is not pinned
+        Time Complexity: O(log n)
+        Space Complexity: O(1)
+        """
+        node = self.pinned_nodes.get(song_id)
+        return None if node is None else self.playlist_engine.index_of(node)
+
+    def pinned_at(self, index):
+        """
+        Return which pin sits at an index.
+        Returns:
+            The song_id pinned there, or None if the song at index is not pinned
+        Raises:
+            IndexError: If index is invalid
+        Time Complexity: O(log n)
+        Space Complexity: O(1)
+        """
+        return self.pin_ids.get(self.playlist_engine.song_at(index))
 
     def pin_song(self, song_id, title, index):
         """
         Pin a song to a specific index in the playlist.
         Args:
             song_id (str): Unique identifier for the song
-            title (str): Song title (for lookup in PlaylistEngine)
+            title (str): Song title, used to find the song when song_id is not
+                a PlaylistEngine handle
             index (int): Desired index for pinning
         Raises:
             IndexError: If index is invalid
             ValueError: If song_id is already pinned or index is occupied
-        Time Complexity: O(n) due to move_song and traversal
+        Time Complexity: O(log n) for a handle, O(n) when searching by title
         Space Complexity: O(1)
         """
-        if index < 0 or index >= self.playlist_engine.size:
-            raise IndexError("Invalid index")
-        if song_id in self.pinned_indices:
-            raise ValueError("Song is already pinned")
-        if index in self.index_to_song_id:
-            raise ValueError("Index is already pinned")
-
-        # Find the song in the playlist
-        current = self.playlist_engine.head
-        current_index = 0
-        found = False
-        while current:
-            if current.title == title:
-                found = True
-                break
-            current = current.next if not self.playlist_engine.reversed else current.prev
-            current_index += 1
+        self._check_pin(song_id, index)
 
-        if not found:
-            raise ValueError("Song not found in playlist")
+        # Find the song in the playlist: by handle if the song_id is one, else by title
+        current_index = self.playlist_engine.locate(song_id)
+        if current_index is None:
+            current_index = next((position for position, node in enumerate(self.playlist_engine)
+                                  if node.title == title), None)
+            if current_index is None:
+                raise ValueError("Song not found in playlist")
+        if self.playlist_engine.song_at(current_index) in self.pin_ids:
+            raise ValueError("Song is pinned under another id")
 
         # Move song to the desired index
         self.playlist_engine.move_song(current_index, index)
-        self.pinned_indices[song_id] = index
-        self.index_to_song_id[index] = song_id
+        self._attach(song_id, self.playlist_engine.song_at(index), index)
+
+    def pin_songs(self, pins):
+        """
+        Pin many songs by handle, each moved to its index (like pin_song).
+        Args:
+            pins (iterable): (song_id, index) pairs; every song_id must be a
+                PlaylistEngine handle
+        Raises:
+            KeyError: If a song_id is not a handle in the playlist
+            IndexError, ValueError: As pin_song; pins before the failing one are kept
+        Time Complexity: O(p log n) for p pins
+        Space Complexity: O(1) extra
+        """
+        engine = self.playlist_engine
+        for song_id, index in pins:
+            self._check_pin(song_id, index)
+            node = engine.get_by_id(song_id)
+            if node is None:
+                raise KeyError(song_id)
+            if node in self.pin_ids:
+                raise ValueError("Song is pinned under another id")
+            engine.move_by_id(song_id, index)
+            self._attach(song_id, node, index)
+
+    def pin_at(self, song_id, index):
+        """
+        Pin whichever song is at index under song_id, without moving anything.
+        Args:
+            song_id: Identifier for the pin
+            index (int): Index of the song to pin
+        Raises:
+            IndexError: If index is invalid
+            ValueError: If song_id is already pinned or index is occupied
+        Time Complexity: O(log n)
+        Space Complexity: O(1)
+        """
+        self._check_pin(song_id, index)
+        self._attach(song_id, self.playlist_engine.song_at(index), index)
+
+    def load_pins(self, pins):
+        """
+        Replace every pin with the given ones, pinning the songs at those indices
+        in place (used to restore saved pins).
+        Args:
+            pins (iterable): (song_id, index) pairs
+        Raises:
+            IndexError, ValueError: As pin_at
+        Time Complexity: O(p log n) for p pins
+        Space Complexity: O(p)
+        """
+        for song_id in list(self.pinned_nodes):
+            self.unpin_song(song_id)
+        for song_id, index in pins:
+            self.pin_at(song_id, index)
 
     def unpin_song(self, song_id):
         """
@@ -61,63 +229,62 @@ class PinnedSongs:
             song_id (str): Unique identifier of the song
         Returns:
             bool: True if unpinned, False if song_id not pinned
-        Time Complexity: O(1)
+        Time Complexity: O(log n) to report the index to listeners, else O(1)
         Space Complexity: O(1)
         """
-        if song_id not in self.pinned_indices:
+        node = self.pinned_nodes.get(song_id)
+        if node is None:
             return False
-        index = self.pinned_indices[song_id]
-        del self.pinned_indices[song_id]
-        del self.index_to_song_id[index]
+        self._detach(song_id, self.playlist_engine.index_of(node) if self.listeners else None)
         return True
 
     def shuffle_playlist(self):
         """
         Shuffle the playlist, keeping pinned songs at their fixed positions.
-        Time Complexity: O(n) for Fisher-Yates shuffle
-        Space Complexity: O(n) for temporary array
-        Note: Uses Fisher-Yates shuffle for unbiased randomization of non-pinned songs
-        """
-        # Extract songs, respecting reversed state
-        songs = []
-        current = self.playlist_engine.head
-        index = 0
-        while current:
-            songs.append({
-                "title": current.title,
-                "artist": current.artist,
-                "duration": current.duration,
-                "index": index
-            })
-            current = current.next if not self.playlist_engine.reversed else current.prev
-            index += 1
-
-        # Create list of available indices (excluding pinned ones)
-        available_indices = [i for i in range(len(songs)) if i not in self.index_to_song_id]
-
-        # Fisher-Yates shuffle for non-pinned songs
-        non_pinned_songs = [song for song in songs if song["index"] not in self.index_to_song_id]
-        for i in range(len(non_pinned_songs) - 1, 0, -1):
-            j = random.randint(0, i)
-            non_pinned_songs[i], non_pinned_songs[j] = non_pinned_songs[j], non_pinned_songs[i]
-
-        # Reconstruct playlist with pinned songs in place
-        result = [None] * len(songs)
-        for idx in self.index_to_song_id:
-            for song in songs:
-                if song["index"] == idx:
-                    result[idx] = song
-                    break
-
-        non_pinned_idx = 0
-        for i in range(len(songs)):
-            if i not in self.index_to_song_id:
-                result[i] = non_pinned_songs[non_pinned_idx]
-                non_pinned_idx += 1
-
-        # Rebuild playlist
-        self.playlist_engine.head = None
-        self.playlist_engine.tail = None
-        self.playlist_engine.size = 0
-        for song in result:
-            self.playlist_engine.add_song(song["title"], song["artist"], song["duration"])
\ No newline at end of file
+        Time Complexity: O(n) for Fisher-Yates shuffle and relinking
+        Space Complexity: O(n) for the list of node references
+        Note: Uses Fisher-Yates shuffle (random.Random.shuffle on this instance's
+        generator) for unbiased randomization of non-pinned songs; the existing nodes
+        are relinked, so song handles survive the shuffle
+        """
+        nodes = list(self.playlist_engine)
+        pinned = self.pin_ids
+
+        non_pinned_songs = [node for node in nodes if node not in pinned]
+        self.random.shuffle(non_pinned_songs)
+
+        # Put the shuffled songs back into the non-pinned positions
+        if pinned:
+            shuffled = iter(non_pinned_songs)
+            nodes = [node if node in pinned else next(shuffled) for node in nodes]
+        else:
+            nodes = non_pinned_songs
+
+        self.playlist_engine.relink(nodes, reorder_only=True)
+
+    def shuffle_play(self):
+        """
+        Lazily yield every song once in a random order, with pinned songs at their
+        pinned positions, without materializing the order or touching the playlist.
+        Yields:
+            SongNode: The song to play next
+        Raises:
+            RuntimeError: If the playlist changes during iteration
+        Time Complexity: O(log n + log p) per song, after O(p log n) to find the pins
+        Space Complexity: O(p) for p pinned positions
+        """
+        engine = self.playlist_engine
+        pinned = sorted(self.index_to_song_id)  # Pins as of the start of iteration
+        pinned_set = set(pinned)
+        # Free slots before each pinned index; the j-th free slot is j + bisect_right(gaps, j)
+        gaps = [index - rank for rank, index in enumerate(pinned)]
+        order = _random_permutation(engine.size - len(pinned), self.random)
+        version = engine.version
+        for position in range(engine.size):
+            if engine.version != version:
+                raise RuntimeError("Playlist changed during shuffle play")
+            if position in pinned_set:
+                yield engine.song_at(position)
+            else:
+                slot = next(order)
+                yield engine.song_at(slot + bisect.bisect_right(gaps, slot))
@@ -0,0 +1,175 @@
+import mmap
+import os
+import struct
+import time
+
+# Append-only binary log of play events with fixed 24-byte records:
+#   int64 song handle | int64 timestamp (ns since epoch) | int32 duration played | uint8 op | 3 pad bytes
+# The file starts with an 8-byte magic/version header. Appends are buffered and written
+# with one fsync per group of records (group commit); replay maps the file and scans it
+# backwards, so recovery only reads the tail that is still relevant.
+class PlayLog:
+    MAGIC = b"PWPLAY01"
+    RECORD = struct.Struct("<qqiB3x")
+    FIELDS = {"handle": "<q", "timestamp_ns": "<q", "duration": "<i", "op": "<B"}  # Format of each slot
+    PLAY = 1
+    UNDO = 2
+
+    def __init__(self, path, group_size=4096, fsync=True):
+        """
+        Open (or create) a play log for appending.
+        Args:
+            path (str): Log file path
+            group_size (int): Records buffered before they are written and fsynced together
+            fsync (bool): If False, flushes only hand data to the OS (faster, not crash-safe)
+        Raises:
+            ValueError: If the file exists but is not a play log
+        Time Complexity: O(1)
+        Space Complexity: O(group_size) for the write buffer
+        Note: A torn record left by a crash mid-write is truncated away on open
+        """
+        self.path = path
+        self.group_size = group_size
+        self.fsync = fsync
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.file = open(path, "a+b")
+        size = self.file.seek(0, os.SEEK_END)
+        if size == 0:
+            self.file.write(self.MAGIC)
+            self._sync()
+            size = len(self.MAGIC)
+        else:
+            self.file.seek(0)
+            if self.file.read(len(self.MAGIC)) != self.MAGIC:
+                self.file.close()
+                raise ValueError(f"{path} is not a PlayWise play log")
+            whole = len(self.MAGIC) + (size - len(self.MAGIC)) // self.RECORD.size * self.RECORD.size
+            if whole != size:
+                self.file.truncate(whole)
+                size = whole
+        self.durable_records = (size - len(self.MAGIC)) // self.RECORD.size
+
+    def __len__(self):
+        """Number of records, including buffered ones not yet written."""
+        return self.durable_records + self.buffered
+
+    def append(self, handle, duration, op=PLAY, timestamp_ns=None):
+        """
+        Buffer one event; every group_size events are written with a single fsync.
+        Args:
+            handle (int): Song handle (integer song_id)
+            duration (int): Seconds played
+            op (int): PlayLog.PLAY or PlayLog.UNDO
+            timestamp_ns (int): Event time, defaults to now
+        Raises:
+            TypeError: If a field is not an integer (the message names the field)
+            ValueError: If a field does not fit its record slot
+        Time Complexity: O(1) amortized
+        Space Complexity: O(1)
+        """
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+        try:
+            self.buffer += self.RECORD.pack(handle, timestamp_ns, duration, op)
+        except struct.error:
+            self._check_fields(handle=handle, timestamp_ns=timestamp_ns, duration=duration, op=op)
+            raise
+        self.buffered += 1
+        if self.buffered >= self.group_size:
+            self.flush()
+
+    @classmethod
+    def _check_fields(cls, **fields):
+        """Raise TypeError/ValueError naming the first field that does not fit the record."""
+        for name, value in fields.items():
+            if not isinstance(value, int):
+                raise TypeError(f"Play log {name} must be an integer, got {value!r}")
+            try:
+                struct.pack(cls.FIELDS[name], value)
+            except struct.error:
+                raise ValueError(f"Play log {name} is out of range: {value!r}") from None
+
+    def append_many(self, events):
+        """
+        Buffer many (handle, timestamp_ns, duration, op) events in one call.
+        Args:
+            events (iterable): Event tuples in record field order
+        Returns:
+            int: Number of events appended
+        Time Complexity: O(k) for k events
+        Space Complexity: O(k) until the next flush
+        """
+        pack = self.RECORD.pack
+        chunk = b"".join([pack(*event) for event in events])
+        count = len(chunk) // self.RECORD.size
+        self.buffer += chunk
+        self.buffered += count
+        if self.buffered >= self.group_size:
+            self.flush()
+        return count
+
+    def flush(self):
+        """
+        Write buffered records and fsync them (the group commit).
+        Time Complexity: O(b) for b buffered records, plus one fsync
+        Space Complexity: O(1)
+        """
+        if self.buffered:
+            self.file.write(self.buffer)
+            self._sync()
+            self.durable_records += self.buffered
+            self.buffer = bytearray()
+            self.buffered = 0
+
+    def _sync(self):
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        """
+        Flush pending records and close the file.
+        Time Complexity: O(b) for b buffered records
+        Space Complexity: O(1)
+        """
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def replay(self, limit):
+        """
+        Reconstruct the newest plays that survive all undos, without reading the whole log.
+        Args:
+            limit (int): Maximum number of plays to recover (e.g. the history capacity)
+        Returns:
+            list: (handle, timestamp_ns, duration) tuples, oldest first
+        Time Complexity: O(t) for the t most recent records that have to be scanned,
+        independent of the total log length (unless undos cancel most of it)
+        Space Complexity: O(limit)
+        """
+        self.flush()
+        size = len(self.MAGIC) + self.durable_records * self.RECORD.size
+        if self.durable_records == 0 or limit <= 0:
+            return []
+        plays = []
+        undone = 0  # UNDO records seen that still have to cancel an older PLAY
+        chunk_records = 65536
+        with open(self.path, "rb") as handle:
+            with mmap.mmap(handle.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+                end = size
+                while end > len(self.MAGIC) and len(plays) < limit:
+                    start = max(len(self.MAGIC), end - chunk_records * self.RECORD.size)
+                    records = list(self.RECORD.iter_unpack(mapped[start:end]))
+                    for song, timestamp_ns, duration, op in reversed(records):
+                        if op == self.UNDO:
+                            undone += 1
+                        elif undone:
+                            undone -= 1
+                        else:
+                            plays.append((song, timestamp_ns, duration))
+                            if len(plays) == limit:
+                                break
+                    end = start
+        plays.reverse()
+        return plays
@@ -1,29 +1,95 @@
+import json
 from playlist_engine import PlaylistEngine
+from events import EventSource
+from ring_buffer import RingBuffer
 
-# Playback History using a stack to track recently played songs
-class PlaybackHistory:
-    def __init__(self, playlist_engine):
+# Playback History using a bounded stack (ring buffer) to track recently played songs
+# Published events (see subscribe): ("play", entry) and ("undo", entry)
+class PlaybackHistory(EventSource):
+    DEFAULT_CAPACITY = 10_000
+
+    def __init__(self, playlist_engine, capacity=DEFAULT_CAPACITY, spill_path=None,
+                 play_log=None, song_lookup=None):
         """
         Initialize the playback history stack.
         Args:
             playlist_engine: Instance of PlaylistEngine to interact with the playlist
-        Time Complexity: O(1)
-        Space Complexity: O(1)
+            capacity (int): Maximum number of plays kept in memory (and undoable);
+                older plays are evicted
+            spill_path (str): Optional JSON Lines file that evicted plays are appended to
+            play_log: Optional PlayLog; every play and undo is appended to it, and the
+                newest surviving plays are replayed from it into the ring on startup
+            song_lookup: Optional SongLookup used to resolve replayed handles of songs
+                no longer in the playlist
+        Raises:
+            ValueError: If capacity is less than 1
+        Time Complexity: O(capacity) to preallocate the ring (and to replay the log tail)
+        Space Complexity: O(capacity), independent of how many songs are played
         """
-        self.history = []  # Stack to store recently played songs
+        self.history = RingBuffer(capacity)  # Stack to store recently played songs
         self.playlist_engine = playlist_engine  # Reference to the playlist engine
+        self.spill_path = spill_path
+        self.spill_file = None  # Opened lazily on the first eviction
+        self.spilled = 0        # Number of plays written to spill_path
+        self.play_log = play_log
+        self.song_lookup = song_lookup
+        self.listeners = []  # Mutation event listeners
+        if play_log is not None:
+            for song_id, _, duration in play_log.replay(capacity):
+                self.history.append(self._resolve(song_id, duration))
+
+    def _resolve(self, song_id, duration):
+        """Rebuild a history entry for a replayed handle."""
+        song = self.song_lookup.lookup_by_id(song_id) if self.song_lookup is not None else None
+        if song is None:
+            song = self.playlist_engine.get_by_id(song_id)
+            song = {"title": song.title, "artist": song.artist} if song is not None else {}
+        return {"title": song.get("title", "Unknown"), "artist": song.get("artist", "Unknown"),
+                "duration": duration, "song_id": song_id}
 
-    def add_played_song(self, title, artist, duration):
+    def add_played_song(self, title, artist, duration, song_id=None):
         """
         Push a played song onto the history stack.
         Args:
             title (str): Song title
             artist (str): Song artist
             duration (int): Song duration in seconds
+            song_id (int): Song handle; required when a play_log is attached
+        Raises:
+            ValueError: If a play_log is attached and song_id is missing
         Time Complexity: O(1)
-        Space Complexity: O(1) per song
+        Space Complexity: O(1); the oldest play is evicted once the ring is full
         """
-        self.history.append({"title": title, "artist": artist, "duration": duration})
+        entry = {"title": title, "artist": artist, "duration": duration}
+        if song_id is not None:
+            entry["song_id"] = song_id
+        if self.play_log is not None:
+            if song_id is None:
+                raise ValueError("A song_id is required to log plays")
+            self.play_log.append(song_id, duration)
+        evicted = self.history.append(entry)
+        if evicted is not None and self.spill_path is not None:
+            self._spill(evicted)
+        if self.listeners:
+            self._notify("play", entry)
+
+    def _spill(self, entry):
+        if self.spill_file is None:
+            self.spill_file = open(self.spill_path, "a", encoding="utf-8")
+        self.spill_file.write(json.dumps(entry) + "\n")
+        self.spilled += 1
+
+    def close(self):
+        """
+        Flush and close the spill file and the play log, if any.
+        Time Complexity: O(1) plus the buffered writes
+        Space Complexity: O(1)
+        """
+        if self.play_log is not None:
+            self.play_log.close()
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
 
     def undo_last_play(self):
         """
@@ -32,19 +98,40 @@ class PlaybackHistory:
             dict: The song that was re-added, or None if history is empty
         Time Complexity: O(1) for pop, O(1) for adding to playlist
         Space Complexity: O(1)
+        Note: Plays evicted from the ring (and possibly spilled) cannot be undone
         """
         if not self.history:
             return None
         last_song = self.history.pop()
-        self.playlist_engine.add_song(last_song["title"], last_song["artist"], last_song["duration"])
+        song_id = last_song.get("song_id")
+        if self.play_log is not None:
+            self.play_log.append(song_id, last_song["duration"], self.play_log.UNDO)
+        if self.listeners:
+            self._notify("undo", last_song)
+        if song_id is not None and self.playlist_engine.get_by_id(song_id) is not None:
+            song_id = None  # Still in the playlist: the re-added copy gets no handle
+        self.playlist_engine.add_song(last_song["title"], last_song["artist"], last_song["duration"],
+                                      song_id=song_id)
         return last_song
 
+    def recent(self, k):
+        """
+        Return the k most recent plays, most recent first, as a view over the ring.
+        Args:
+            k (int): Number of plays
+        Returns:
+            RecentView: Sized, indexable, iterable view (use list() to keep a copy)
+        Time Complexity: O(1) to create, O(1) per entry read
+        Space Complexity: O(1)
+        """
+        return self.history.recent(k)
+
     def get_history(self):
         """
         Return a copy of the current playback history.
         Returns:
-            list: List of song dictionaries in the history stack
-        Time Complexity: O(n) to copy the list
+            list: List of song dictionaries in the history stack, oldest first
+        Time Complexity: O(n) to copy the n <= capacity entries; prefer recent(k)
         Space Complexity: O(n) for the returned list
         """
-        return self.history.copy()
\ No newline at end of file
+        return list(self.history)
@@ -1,10 +1,23 @@
+from collections import deque
 from song_node import SongNode
+from position_index import PositionIndex
+from events import EventSource
 
 # Optimized Playlist Engine using Doubly Linked List
-class PlaylistEngine:
-    def __init__(self):
+# Published events (see subscribe): ("add", node), ("insert", node, index),
+# ("remove", node, index or None; always the index in indexed mode), ("move", node1, node2),
+# ("reverse",), ("reorder",) and ("reset",) when the whole song set may have changed.
+class PlaylistEngine(EventSource):
+    # Fixed attribute layout: hosts keep many small playlists, so no per-instance __dict__
+    __slots__ = ("head", "tail", "size", "reversed", "index", "handles", "version",
+                 "membership_version", "listeners")
+
+    def __init__(self, indexed=False):
         """
         Initialize the playlist engine with a doubly linked list.
+        Args:
+            indexed (bool): If True, also maintain a PositionIndex so index lookup,
+                delete_song and move_song run in O(log n) instead of O(n)
         Time Complexity: O(1)
         Space Complexity: O(1)
         """
@@ -12,18 +25,30 @@ class PlaylistEngine:
         self.tail = None  # Tail of the doubly linked list
         self.size = 0     # Number of songs in the playlist
         self.reversed = False  # Flag for lazy reversal to optimize reverse operation
+        self.index = PositionIndex() if indexed else None  # Optional order-statistic index
+        self.handles = {}  # HashMap: song_id -> SongNode for O(1) access by handle
+        self.version = 0             # Bumped on every mutation (order or membership)
+        self.membership_version = 0  # Bumped only when songs are added or removed
+        self.listeners = []  # Mutation event listeners
 
-    def add_song(self, title, artist, duration):
+    def add_song(self, title, artist, duration, song_id=None):
         """
         Add a song to the end of the playlist (or front if reversed).
         Args:
             title (str): Song title
             artist (str): Song artist
             duration (int): Song duration in seconds
-        Time Complexity: O(1) for appending to tail or head
+            song_id: Optional stable handle for delete_by_id/move_by_id/locate
+        Returns:
+            SongNode: The newly linked node
+        Raises:
+            ValueError: If song_id is already used by another song in the playlist
+        Time Complexity: O(1) for appending to tail or head, O(log n) in indexed mode
         Space Complexity: O(1) for node creation
         """
-        new_node = SongNode(title, artist, duration)
+        if song_id is not None and song_id in self.handles:
+            raise ValueError("Duplicate song_id")
+        new_node = SongNode(title, artist, duration, song_id)
         if self.reversed:
             # Add to front (logical end in reversed state)
             if not self.head:
@@ -42,7 +67,400 @@ class PlaylistEngine:
                 new_node.prev = self.tail
                 self.tail.next = new_node
                 self.tail = new_node
+        if self.index is not None:
+            if self.reversed:
+                self.index.prepend(new_node)
+            else:
+                self.index.append(new_node)
+        if song_id is not None:
+            self.handles[song_id] = new_node
+        self.size += 1
+        self.version += 1
+        self.membership_version += 1
+        if self.listeners:
+            self._notify("add", new_node)
+        return new_node
+
+    def add_track(self, track, song_id=None):
+        """
+        Add a SongCatalog track to the end of the playlist (or front if reversed).
+        The node refers to the track's own title, artist and duration objects, so
+        playlists built from one catalog share a single copy of the metadata.
+        Args:
+            track: Track from a SongCatalog
+            song_id: Optional stable handle, as in add_song
+        Returns:
+            SongNode: The newly linked node
+        Raises:
+            ValueError: If song_id is already used by another song in the playlist
+        Time Complexity: O(1), O(log n) in indexed mode
+        Space Complexity: O(1), one node of references
+        """
+        return self.add_song(track.title, track.artist, track.duration, song_id)
+
+    def insert_node(self, index, node):
+        """
+        Link a detached SongNode (such as one removed earlier) so it ends up at index.
+        Args:
+            index (int): Logical index, 0 <= index <= size
+            node: SongNode that is not in any playlist
+        Raises:
+            IndexError: If index is invalid
+            ValueError: If the node's song_id is already used by another song
+        Time Complexity: O(n) to reach index, O(log n) in indexed mode
+        Space Complexity: O(1)
+        """
+        if index < 0 or index > self.size:
+            raise IndexError("Invalid index")
+        if node.song_id is not None and node.song_id in self.handles:
+            raise ValueError("Duplicate song_id")
+        # Physical neighbours: the logical successor sits after the node, or before it if reversed
+        if index == self.size:
+            before, after = (None, self.head) if self.reversed else (self.tail, None)
+        else:
+            successor = self._node_at(index)
+            before, after = (successor, successor.next) if self.reversed else (successor.prev, successor)
+        node.prev = before
+        node.next = after
+        if before:
+            before.next = node
+        else:
+            self.head = node
+        if after:
+            after.prev = node
+        else:
+            self.tail = node
+        if self.index is not None:
+            self.index.insert(self.size - index if self.reversed else index, node)
+        if node.song_id is not None:
+            self.handles[node.song_id] = node
         self.size += 1
+        self.version += 1
+        self.membership_version += 1
+        if self.listeners:
+            self._notify("insert", node, index)
+
+    def extend(self, songs):
+        """
+        Append many songs in one pass (to the front if reversed, like add_song).
+        Args:
+            songs (iterable): (title, artist, duration) or (title, artist, duration, song_id)
+                tuples in logical order
+        Returns:
+            int: Number of songs added
+        Raises:
+            ValueError: If a song_id is already used; songs before it are kept
+        Time Complexity: O(k) for k songs, plus O(log n) in indexed mode
+        Space Complexity: O(k) for node creation, O(1) extra
+        Optimization: New nodes are chained together and spliced onto the list once,
+        so the reversed check and head/tail updates happen per batch, not per song
+        """
+        handles = self.handles
+        reversed_state = self.reversed
+        first = last = None
+        count = 0
+        try:
+            for song in songs:
+                song_id = song[3] if len(song) > 3 else None
+                if song_id is not None and song_id in handles:
+                    raise ValueError("Duplicate song_id")
+                node = SongNode(song[0], song[1], song[2], song_id)
+                if song_id is not None:
+                    handles[song_id] = node
+                if first is None:
+                    first = last = node
+                elif reversed_state:
+                    # Logical end is the physical front: grow the chain backwards
+                    node.next = first
+                    first.prev = node
+                    first = node
+                else:
+                    node.prev = last
+                    last.next = node
+                    last = node
+                count += 1
+        finally:
+            if count:
+                self._splice_chain(first, last, count)
+        return count
+
+    def _splice_chain(self, first, last, count):
+        """
+        Attach an already linked chain of new nodes at the logical end of the playlist.
+        Time Complexity: O(1), plus O(k + log n) in indexed mode
+        Space Complexity: O(1)
+        """
+        if not self.head:
+            self.head = first
+            self.tail = last
+        elif self.reversed:
+            last.next = self.head
+            self.head.prev = last
+            self.head = first
+        else:
+            first.prev = self.tail
+            self.tail.next = first
+            self.tail = last
+        if self.index is not None:
+            self.index.extend(self._iter_chain(first, last), front=self.reversed)
+        self.size += count
+        self.version += 1
+        self.membership_version += 1
+        if self.listeners:
+            # Announce the songs in logical order: when reversed, that is last back to first
+            if self.reversed:
+                current = last
+                while True:
+                    self._notify("add", current)
+                    if current is first:
+                        break
+                    current = current.prev
+            else:
+                for node in self._iter_chain(first, last):
+                    self._notify("add", node)
+
+    def __len__(self):
+        """
+        Return the number of songs in the playlist.
+        Time Complexity: O(1)
+        """
+        return self.size
+
+    def __iter__(self):
+        """
+        Yield the song nodes in logical order, respecting the reversed state.
+        Nodes are yielded as-is (no copies); the next node is read before each
+        yield, so the consumer may unlink the node it was just given.
+        Time Complexity: O(1) per song
+        Space Complexity: O(1)
+        """
+        if self.reversed:
+            current = self.tail
+            while current:
+                following = current.prev
+                yield current
+                current = following
+        else:
+            current = self.head
+            while current:
+                following = current.next
+                yield current
+                current = following
+
+    def __reversed__(self):
+        """
+        Yield the song nodes from the logical end to the logical start.
+        Time Complexity: O(1) per song
+        Space Complexity: O(1)
+        """
+        if self.reversed:
+            current = self.head
+            while current:
+                following = current.next
+                yield current
+                current = following
+        else:
+            current = self.tail
+            while current:
+                following = current.prev
+                yield current
+                current = following
+
+    def iter_slice(self, start=0, stop=None):
+        """
+        Lazily yield the nodes at logical indices start..stop-1 (slice semantics,
+        negative indices allowed).
+        Args:
+            start (int): First index
+            stop (int): Index to stop before, or None for the end of the playlist
+        Time Complexity: O(log n) in indexed mode (otherwise O(n)) to reach start,
+        then O(1) per song
+        Space Complexity: O(1)
+        """
+        start, stop, _ = slice(start, stop).indices(self.size)
+        if start >= stop:
+            return
+        current = self._node_at(start)
+        for _ in range(stop - start):
+            following = current.prev if self.reversed else current.next
+            yield current
+            current = following
+
+    def iter_windows(self, width, step=1):
+        """
+        Lazily yield tuples of `width` consecutive nodes, advancing `step` songs at a time.
+        Args:
+            width (int): Songs per window
+            step (int): Songs to advance between windows
+        Raises:
+            ValueError: If width or step is not positive
+        Time Complexity: O(width) per window
+        Space Complexity: O(width) for the window being built
+        """
+        if width < 1 or step < 1:
+            raise ValueError("width and step must be positive")
+        window = deque(maxlen=width)
+        skip = 0
+        for node in self:
+            window.append(node)
+            if skip:
+                skip -= 1
+                continue
+            if len(window) == width:
+                yield tuple(window)
+                skip = step - 1
+
+    def relink(self, nodes, reorder_only=False):
+        """
+        Re-link the playlist so that its logical order is exactly `nodes`.
+        Used for in-place reordering (sort, shuffle) without allocating new nodes;
+        node identity and song handles are preserved and the reversed flag is kept.
+        Args:
+            nodes (iterable): SongNodes in the desired logical order
+            reorder_only (bool): True if nodes are exactly the current songs, so only
+                the order changes (keeps membership_version and the index's slots)
+        Time Complexity: O(n), including rebuilding the index in indexed mode
+        Space Complexity: O(1) extra (O(n) for an index rebuild when songs changed)
+        """
+        first = last = None  # Physical head and tail of the new chain
+        handles = {}
+        count = 0
+        for node in nodes:
+            if first is None:
+                first = last = node
+            elif self.reversed:
+                node.next = first
+                first.prev = node
+                first = node
+            else:
+                node.prev = last
+                last.next = node
+                last = node
+            if node.song_id is not None:
+                handles[node.song_id] = node
+            count += 1
+        if first is not None:
+            first.prev = None
+            last.next = None
+        self.head = first
+        self.tail = last
+        self.size = count
+        self.handles = handles
+        if self.index is not None:
+            if reorder_only and len(self.index) == count:
+                self.index.reassign(self._iter_physical())  # Same slots, new occupants
+            else:
+                self.index.rebuild(self._iter_physical())
+        self.version += 1
+        if not reorder_only:
+            self.membership_version += 1
+        if self.listeners:
+            self._notify("reorder" if reorder_only else "reset")
+
+    def adopt_chain(self, head):
+        """
+        Take a physically reordered chain of this playlist's own nodes, linked through
+        `next` only (as left by an in-place sort), and restore prev pointers, tail and index.
+        Args:
+            head: First node of the chain (physical order, i.e. ignoring the reversed flag)
+        Time Complexity: O(n), including refilling the index in indexed mode
+        Space Complexity: O(1) extra
+        """
+        previous = None
+        current = head
+        while current:
+            current.prev = previous
+            previous = current
+            current = current.next
+        self.head = head
+        self.tail = previous
+        if self.index is not None:
+            self.index.reassign(self._iter_physical())
+        self.version += 1
+        if self.listeners:
+            self._notify("reorder")
+
+    def enable_index(self):
+        """
+        Switch an existing playlist to indexed mode by building its PositionIndex.
+        Time Complexity: O(n) one-off build
+        Space Complexity: O(n) for the index
+        """
+        if self.index is None:
+            self.index = PositionIndex()
+            self.index.rebuild(self._iter_physical())
+
+    def clear(self):
+        """
+        Remove every song from the playlist, keeping the reversed flag and mode.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.head = None
+        self.tail = None
+        self.size = 0
+        self.handles.clear()
+        if self.index is not None:
+            self.index.clear()
+        self.version += 1
+        self.membership_version += 1
+        if self.listeners:
+            self._notify("reset")
+
+    def _iter_physical(self):
+        """Yield nodes from head to tail, ignoring the reversed flag."""
+        current = self.head
+        while current:
+            yield current
+            current = current.next
+
+    @staticmethod
+    def _iter_chain(first, last):
+        """Yield the nodes of a chain from first to last, inclusive."""
+        current = first
+        while True:
+            yield current
+            if current is last:
+                return
+            current = current.next
+
+    def _node_at(self, index):
+        """
+        Return the node at a logical index, respecting the reversed state.
+        Args:
+            index (int): Logical index, assumed to be valid
+        Time Complexity: O(log n) in indexed mode, otherwise O(n) walking from
+        whichever end of the list is closer
+        Space Complexity: O(1)
+        """
+        # Adjust index for reversed state
+        if self.reversed:
+            index = self.size - 1 - index
+        if self.index is not None:
+            return self.index.song_at(index)
+        if index <= self.size // 2:
+            current = self.head
+            for _ in range(index):
+                current = current.next
+        else:
+            current = self.tail
+            for _ in range(self.size - 1 - index):
+                current = current.prev
+        return current
+
+    def song_at(self, index):
+        """
+        Return the song node at a logical index.
+        Args:
+            index (int): 0 <= index < size
+        Raises:
+            IndexError: If index is invalid
+        Time Complexity: O(log n) in indexed mode, otherwise O(n)
+        Space Complexity: O(1)
+        """
+        if index < 0 or index >= self.size:
+            raise IndexError("Invalid index")
+        return self._node_at(index)
 
     def delete_song(self, index):
         """
@@ -51,21 +469,26 @@ class PlaylistEngine:
             index (int): Index of the song to delete
         Raises:
             IndexError: If index is invalid
-        Time Complexity: O(n) to traverse to index
+        Time Complexity: O(n) to traverse to index, O(log n) in indexed mode
         Space Complexity: O(1) for pointer updates
         """
         if index < 0 or index >= self.size or not self.head:
             raise IndexError("Invalid index")
 
-        # Adjust index for reversed state
-        if self.reversed:
-            index = self.size - 1 - index
-
-        current = self.head
-        # Fix: Remove the incorrect traversal logic that was causing the bug
-        for _ in range(index):
-            current = current.next
+        self._unlink(self._node_at(index), index)
 
+    def _unlink(self, current, index=None):
+        """
+        Unlink a node from the list, the index and the handle map.
+        Args:
+            current: SongNode currently in this playlist
+            index (int): Its logical index if the caller knows it (passed to listeners;
+                looked up in indexed mode when listeners are subscribed)
+        Time Complexity: O(1), plus O(log n) in indexed mode
+        Space Complexity: O(1)
+        """
+        if index is None and self.listeners and self.index is not None:
+            index = self.index_of(current)
         # If deleting the only node
         if self.size == 1:
             self.head = None
@@ -82,7 +505,107 @@ class PlaylistEngine:
         else:
             current.prev.next = current.next
             current.next.prev = current.prev
+        current.prev = None
+        current.next = None
+        if self.index is not None:
+            self.index.remove(current)
+        if current.song_id is not None:
+            self.handles.pop(current.song_id, None)
         self.size -= 1
+        self.version += 1
+        self.membership_version += 1
+        if self.listeners:
+            self._notify("remove", current, index)
+
+    def get_by_id(self, song_id):
+        """
+        Return the node for a song handle.
+        Args:
+            song_id: Stable handle given to add_song
+        Returns:
+            SongNode: The node, or None if the handle is not in the playlist
+        Time Complexity: O(1) average case
+        Space Complexity: O(1)
+        """
+        return self.handles.get(song_id)
+
+    def index_of(self, node):
+        """
+        Return the logical index of a node in this playlist.
+        Args:
+            node: SongNode currently in this playlist
+        Time Complexity: O(log n) in indexed mode, otherwise O(n) to count from the head
+        Space Complexity: O(1)
+        """
+        if self.index is not None:
+            position = self.index.position_of(node)
+        else:
+            position = 0
+            current = node.prev
+            while current:
+                position += 1
+                current = current.prev
+        return self.size - 1 - position if self.reversed else position
+
+    def locate(self, song_id):
+        """
+        Return the logical index of the song with the given handle.
+        Args:
+            song_id: Stable handle given to add_song
+        Returns:
+            int: Current index, or None if the handle is not in the playlist
+        Time Complexity: O(log n) in indexed mode, otherwise O(n)
+        Space Complexity: O(1)
+        """
+        node = self.handles.get(song_id)
+        if node is None:
+            return None
+        return self.index_of(node)
+
+    def delete_by_id(self, song_id):
+        """
+        Delete the song with the given handle.
+        Args:
+            song_id: Stable handle given to add_song
+        Returns:
+            bool: True if deletion was successful, False if the handle is unknown
+        Time Complexity: O(1) to unlink, plus O(log n) in indexed mode
+        Space Complexity: O(1)
+        """
+        node = self.handles.get(song_id)
+        if node is None:
+            return False
+        self._unlink(node)
+        return True
+
+    def move_by_id(self, song_id, to_index):
+        """
+        Move the song with the given handle to to_index, swapping it with the
+        song currently there (same semantics as move_song).
+        Args:
+            song_id: Stable handle given to add_song
+            to_index (int): Destination index
+        Raises:
+            KeyError: If the handle is unknown
+            IndexError: If to_index is invalid
+        Time Complexity: O(1) to find the song, plus the cost of reaching to_index
+        (O(log n) in indexed mode, otherwise O(n))
+        Space Complexity: O(1)
+        """
+        from_node = self.handles.get(song_id)
+        if from_node is None:
+            raise KeyError(song_id)
+        if to_index < 0 or to_index >= self.size:
+            raise IndexError("Invalid index")
+        to_node = self._node_at(to_index)
+        if from_node is to_node:
+            return
+        self._swap_nodes(from_node, to_node)
+        if self.index is not None:
+            self.index.swap(from_node, to_node)
+        self.version += 1
+        if self.listeners:
+            self._notify("move", from_node, to_node)
 
     def move_song(self, from_index, to_index):
         """
@@ -92,7 +615,7 @@ class PlaylistEngine:
             to_index (int): Destination index
         Raises:
             IndexError: If indices are invalid
-        Time Complexity: O(n) to traverse to indices, O(1) for swap
+        Time Complexity: O(n) to traverse to indices (O(log n) in indexed mode), O(1) for swap
         Space Complexity: O(1) for pointer updates
         Optimization: Uses constant-time node swaps instead of re-linking
         """
@@ -101,22 +624,17 @@ class PlaylistEngine:
         if from_index == to_index:
             return
 
-        # Adjust indices for reversed state
-        if self.reversed:
-            from_index = self.size - 1 - from_index
-            to_index = self.size - 1 - to_index
-
         # Find nodes at from_index and to_index
-        from_node = self.head
-        for _ in range(from_index):
-            from_node = from_node.next if not self.reversed else from_node.prev
-
-        to_node = self.head
-        for _ in range(to_index):
-            to_node = to_node.next if not self.reversed else to_node.prev
+        from_node = self._node_at(from_index)
+        to_node = self._node_at(to_index)
 
         # Swap nodes
         self._swap_nodes(from_node, to_node)
+        if self.index is not None:
+            self.index.swap(from_node, to_node)
+        self.version += 1
+        if self.listeners:
+            self._notify("move", from_node, to_node)
 
     def _swap_nodes(self, node1, node2):
         """
@@ -177,6 +695,9 @@ class PlaylistEngine:
         Space Complexity: O(1)
         """
         self.reversed = not self.reversed
+        self.version += 1
+        if self.listeners:
+            self._notify("reverse")
 
     def print_playlist(self):
         """
@@ -187,13 +708,5 @@ class PlaylistEngine:
         if not self.head:
             print("Empty playlist")
             return
-        if self.reversed:
-            current = self.tail
-            while current:
-                print(f"{current.title} by {current.artist} ({current.duration}s)")
-                current = current.prev
-        else:
-            current = self.head
-            while current:
-                print(f"{current.title} by {current.artist} ({current.duration}s)")
-                current = current.next
\ No newline at end of file
+        for current in self:
+            print(f"{current.title} by {current.artist} ({current.duration}s)")
\ No newline at end of file
@@ -0,0 +1,109 @@
+import csv
+import json
+from itertools import islice
+
+# Streaming bulk loaders that build a PlaylistEngine from CSV or JSON Lines files.
+# Each row needs "title", "artist" and "duration"; "song_id" and "rating" are optional.
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _chunks(rows, chunk_size):
+    """Yield lists of at most chunk_size rows, reading the source lazily."""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_rating(value):
+    """Ratings may be numbers (JSON) or text (CSV); keep whole numbers as ints."""
+    if isinstance(value, str):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def load_rows(rows, playlist_engine, song_lookup=None, rating_tree=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Append song rows to a playlist in chunks, optionally filling the lookup and rating tree.
+    Args:
+        rows (iterable): Dicts with title, artist, duration and optional song_id, rating
+        playlist_engine: PlaylistEngine to append to
+        song_lookup: Optional SongLookup to register every song in
+        rating_tree: Optional SongRatingTree; rows with a rating are inserted into it
+        chunk_size (int): Number of rows held in memory at a time
+    Returns:
+        int: Number of songs loaded
+    Raises:
+        ValueError: If a row is missing a required field or has a bad duration
+    Time Complexity: O(n) for n rows
+    Space Complexity: O(chunk_size) besides the loaded songs themselves
+    Note: Rows without a song_id get one generated through song_lookup when it is
+    given; otherwise they get no handle and are skipped by rating_tree
+    """
+    loaded = 0
+    for chunk in _chunks(rows, chunk_size):
+        songs = []
+        for row in chunk:
+            try:
+                title = row["title"]
+                artist = row["artist"]
+                duration = int(row["duration"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Invalid song row: {row!r}")
+            song_id = row.get("song_id")
+            if song_id == "":
+                song_id = None  # Empty CSV cell
+            elif isinstance(song_id, str) and song_id.isdigit():
+                song_id = int(song_id)  # Numeric IDs are stored as ints, as generated ones are
+            if song_lookup is not None:
+                if song_id is None:
+                    song_id = song_lookup.generate_song_id(title)
+                else:
+                    song_lookup.id_allocator.observe(song_id)
+            songs.append((title, artist, duration, song_id))
+        loaded += playlist_engine.extend(songs)
+
+        if song_lookup is not None:
+            for title, artist, duration, song_id in songs:
+                song_lookup.add_song(song_id, title, artist, duration)
+        if rating_tree is not None:
+            for row, (title, artist, duration, song_id) in zip(chunk, songs):
+                rating = row.get("rating")
+                if rating not in (None, "") and song_id is not None:
+                    rating_tree.insert_song(song_id, title, artist, duration, _parse_rating(rating))
+    return loaded
+
+
+def load_csv(path, playlist_engine, song_lookup=None, rating_tree=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream a CSV file with a header row into a playlist.
+    Args:
+        path (str): CSV file with title, artist, duration[, song_id, rating] columns
+        playlist_engine, song_lookup, rating_tree, chunk_size: See load_rows
+    Returns:
+        int: Number of songs loaded
+    Time Complexity: O(n) for n rows
+    Space Complexity: O(chunk_size)
+    """
+    with open(path, newline="", encoding="utf-8") as handle:
+        return load_rows(csv.DictReader(handle), playlist_engine, song_lookup, rating_tree, chunk_size)
+
+
+def load_jsonl(path, playlist_engine, song_lookup=None, rating_tree=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream a JSON Lines file (one JSON object per line) into a playlist.
+    Args:
+        path (str): JSONL file; blank lines are skipped
+        playlist_engine, song_lookup, rating_tree, chunk_size: See load_rows
+    Returns:
+        int: Number of songs loaded
+    Time Complexity: O(n) for n rows
+    Space Complexity: O(chunk_size)
+    """
+    with open(path, encoding="utf-8") as handle:
+        rows = (json.loads(line) for line in handle if line.strip())
+        return load_rows(rows, playlist_engine, song_lookup, rating_tree, chunk_size)
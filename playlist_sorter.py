@@ -1,7 +1,12 @@
+from operator import attrgetter
 from playlist_engine import PlaylistEngine
+from song_node import SongNode
 
 # Playlist Sorter using Merge Sort for stable sorting
 class PlaylistSorter:
+    COLLATIONS = ('casefold', 'locale', None)
+    SORT_CACHE_SIZE = 4  # Number of sort specs whose last result is remembered
+
     def __init__(self, playlist_engine):
         """
         Initialize the playlist sorter.
@@ -11,6 +16,7 @@ class PlaylistSorter:
         Space Complexity: O(1)
         """
         self.playlist_engine = playlist_engine
+        self._sort_cache = {}  # Normalized sort spec -> playlist version right after that sort
 
     def merge_sort(self, songs, key, reverse=False):
         """
@@ -23,22 +29,35 @@ class PlaylistSorter:
             list: Sorted list of song dictionaries
         Time Complexity: O(n log n) for recursive sorting
         Space Complexity: O(n) for temporary arrays
+        Optimization: Each song's key is read once up front (decorate-sort-undecorate)
+        instead of on every comparison
+        """
+        if key == 'added_order':
+            decorated = [(-song[key], song) for song in songs]  # Higher index is more recent
+        else:
+            decorated = [(song[key], song) for song in songs]
+        return [song for _, song in self._merge_sort_decorated(decorated, reverse)]
+
+    def _merge_sort_decorated(self, pairs, reverse):
+        """
+        Recursive merge sort over (key, song) pairs.
+        Time Complexity: O(n log n)
+        Space Complexity: O(n) for temporary arrays
         """
-        if len(songs) <= 1:
-            return songs
+        if len(pairs) <= 1:
+            return pairs
 
-        mid = len(songs) // 2
-        left = self.merge_sort(songs[:mid], key, reverse)
-        right = self.merge_sort(songs[mid:], key, reverse)
-        return self._merge(left, right, key, reverse)
+        mid = len(pairs) // 2
+        left = self._merge_sort_decorated(pairs[:mid], reverse)
+        right = self._merge_sort_decorated(pairs[mid:], reverse)
+        return self._merge(left, right, reverse)
 
-    def _merge(self, left, right, key, reverse):
+    def _merge(self, left, right, reverse):
         """
-        Merge two sorted lists based on the key.
+        Merge two sorted lists of (key, song) pairs.
         Args:
             left (list): Left half of songs
             right (list): Right half of songs
-            key (str): Sorting criterion
             reverse (bool): If True, sort in descending order
         Returns:
             list: Merged sorted list
@@ -47,13 +66,10 @@ class PlaylistSorter:
         """
         result = []
         i = j = 0
-        while i < len(left) and j < len(right):
-            left_val = left[i][key]
-            right_val = right[j][key]
-            if key == 'added_order':
-                left_val = -left_val  # Higher index is more recent
-                right_val = -right_val
-            if (left_val <= right_val) != reverse:
+        left_len = len(left)
+        right_len = len(right)
+        while i < left_len and j < right_len:
+            if (left[i][0] <= right[j][0]) != reverse:
                 result.append(left[i])
                 i += 1
             else:
@@ -65,42 +81,185 @@ class PlaylistSorter:
 
     def sort_playlist(self, criterion='title', reverse=False):
         """
-        Sort the playlist based on the specified criterion.
+        Sort the playlist based on the specified criterion, relinking the existing
+        nodes in place with a bottom-up linked-list merge sort.
         Args:
             criterion (str): 'title', 'duration', or 'recently_added'
             reverse (bool): If True, sort in descending order
         Raises:
             ValueError: If criterion is invalid
-        Time Complexity: O(n log n) for sorting, O(n) for reconstructing playlist
-        Space Complexity: O(n) for temporary list
+        Time Complexity: O(n log n) for sorting, O(n) for restoring prev pointers
+        Space Complexity: O(1) extra (plus the index rebuild in indexed mode)
+        Note: Stable in logical order. 'recently_added' is the current order reversed,
+        which the lazy reversal flag provides in O(1).
         """
         if criterion not in ['title', 'duration', 'recently_added']:
             raise ValueError("Invalid sorting criterion")
 
-        # Extract songs from the playlist, respecting reversed state
-        songs = []
-        current = self.playlist_engine.head
-        index = 0
-        while current:
-            songs.append({
-                'title': current.title,
-                'artist': current.artist,
-                'duration': current.duration,
-                'added_order': index
-            })
-            current = current.next if not self.playlist_engine.reversed else current.prev
-            index += 1
-
-        # Map criterion to key
-        key = 'added_order' if criterion == 'recently_added' else criterion
-        sorted_songs = self.merge_sort(songs, key, reverse)
-
-        # Reconstruct the playlist
-        self.playlist_engine.head = None
-        self.playlist_engine.tail = None
-        self.playlist_engine.size = 0
-        for song in sorted_songs:
-            self.playlist_engine.add_song(song['title'], song['artist'], song['duration'])
+        engine = self.playlist_engine
+        if criterion == 'recently_added':
+            # Most recent first is the current order reversed; ascending is the current order
+            if not reverse:
+                engine.reverse_playlist()
+            return
+        if engine.size < 2:
+            return
+
+        # The chain is sorted physically. In the reversed state the logical order is the
+        # physical order read backwards, so a stable sort in the opposite direction gives
+        # a stable logical sort.
+        descending = reverse != engine.reversed
+        head = self._merge_sort_chain(engine.head, engine.size, attrgetter(criterion), descending)
+        engine.adopt_chain(head)
+
+    def _merge_sort_chain(self, head, length, key, descending):
+        """
+        Stable bottom-up merge sort of a chain linked through `next`.
+        Args:
+            head: First node of the chain
+            length (int): Number of nodes in the chain
+            key: Function returning the sort key of a node
+            descending (bool): If True, sort in descending order
+        Returns:
+            SongNode: New first node; prev pointers are left for the caller to fix
+        Time Complexity: O(n log n)
+        Space Complexity: O(1), runs are split and merged by relinking next pointers
+        """
+        sentinel = SongNode(None, None, 0)
+        sentinel.next = head
+        width = 1
+        while width < length:
+            tail = sentinel
+            current = sentinel.next
+            while current:
+                left = current
+                right = self._cut(left, width)
+                current = self._cut(right, width)
+                tail = self._merge_runs(left, right, tail, key, descending)
+            width *= 2
+        head = sentinel.next
+        sentinel.next = None
+        return head
+
+    @staticmethod
+    def _cut(node, count):
+        """
+        Detach the first `count` nodes starting at node from the rest of the chain.
+        Returns:
+            SongNode: The first node after the detached run, or None
+        Time Complexity: O(count)
+        Space Complexity: O(1)
+        """
+        for _ in range(count - 1):
+            if node is None:
+                return None
+            node = node.next
+        if node is None:
+            return None
+        rest = node.next
+        node.next = None
+        return rest
+
+    @staticmethod
+    def _merge_runs(left, right, tail, key, descending):
+        """
+        Merge two sorted runs and append the result after tail.
+        Ties take the left run first, which keeps the sort stable.
+        Returns:
+            SongNode: The last node of the merged run
+        Time Complexity: O(len(left) + len(right))
+        Space Complexity: O(1)
+        """
+        while left and right:
+            left_val = key(left)
+            right_val = key(right)
+            if (right_val > left_val) if descending else (right_val < left_val):
+                tail.next = right
+                right = right.next
+            else:
+                tail.next = left
+                left = left.next
+            tail = tail.next
+        tail.next = left if left else right
+        while tail.next:
+            tail = tail.next
+        return tail
+
+    def sort_by(self, spec, collation='casefold'):
+        """
+        Sort the playlist by a composite spec, e.g. artist ascending, then duration
+        descending, then title: [('artist', 'asc'), ('duration', 'desc'), 'title'].
+        Args:
+            spec (list): Sort keys, most significant first. Each entry is a field name
+                ('title', 'artist', 'duration', 'recently_added') or a (field, direction)
+                pair with direction 'asc' or 'desc'
+            collation (str): How text keys compare: 'casefold' (case-insensitive),
+                'locale' (locale.strxfrm under the current LC_COLLATE) or None (raw)
+        Raises:
+            ValueError: If a field, direction or collation is invalid
+        Time Complexity: O(k * n log n) for k keys with each key computed once per song;
+        O(1) if the playlist is unchanged since the last sort with this spec
+        Space Complexity: O(k * n) for the key columns
+        Note: Any change since the last sort, even a pure reorder, sorts again: ties and
+        'recently_added' depend on the current order
+        """
+        spec = self._normalize_spec(spec, collation)
+        engine = self.playlist_engine
+        if self._sort_cache.get(spec) == engine.version:
+            return
+
+        nodes = list(engine)
+        order = list(range(len(nodes)))
+        # Stable sorts from least to most significant key; each key is computed once per song
+        for field, descending in reversed(spec[:-1]):
+            if field == 'recently_added':
+                column = range(0, -len(nodes), -1)  # Higher index is more recent
+            else:
+                transform = self._collation_key(collation) if field in ('title', 'artist') else None
+                get = attrgetter(field)
+                column = [transform(get(node)) for node in nodes] if transform else [get(node) for node in nodes]
+            order.sort(key=column.__getitem__, reverse=descending)
+        order = [nodes[i] for i in order]
+        engine.relink(order, reorder_only=True)
+        self._remember(spec)
+
+    def _remember(self, spec):
+        """Record the version spec's sort produced, keeping only the most recently used specs."""
+        self._sort_cache.pop(spec, None)
+        self._sort_cache[spec] = self.playlist_engine.version
+        while len(self._sort_cache) > self.SORT_CACHE_SIZE:
+            del self._sort_cache[next(iter(self._sort_cache))]
+
+    def _normalize_spec(self, spec, collation):
+        """
+        Turn a user sort spec into a hashable tuple of (field, descending) pairs,
+        followed by the collation, for use as a cache key.
+        """
+        if collation not in self.COLLATIONS:
+            raise ValueError("Invalid collation")
+        if isinstance(spec, (str, tuple)):
+            spec = [spec]
+        normalized = []
+        for entry in spec:
+            field, direction = (entry, 'asc') if isinstance(entry, str) else entry
+            if field not in ('title', 'artist', 'duration', 'recently_added'):
+                raise ValueError("Invalid sorting criterion")
+            if direction not in ('asc', 'desc'):
+                raise ValueError("Invalid sort direction")
+            normalized.append((field, direction == 'desc'))
+        if not normalized:
+            raise ValueError("Empty sort spec")
+        return tuple(normalized) + (collation,)
+
+    @staticmethod
+    def _collation_key(collation):
+        """Return the function that maps a text value to its collation key, or None."""
+        if collation == 'casefold':
+            return str.casefold
+        if collation == 'locale':
+            import locale
+            return locale.strxfrm
+        return None
 
     def sort_playlist_builtin(self, criterion='title', reverse=False):
         """
@@ -110,31 +269,19 @@ class PlaylistSorter:
             reverse (bool): If True, sort in descending order
         Raises:
             ValueError: If criterion is invalid
-        Time Complexity: O(n log n) for Timsort, O(n) for reconstructing playlist
-        Space Complexity: O(n) for temporary list
+        Time Complexity: O(n log n) for Timsort, O(n) for relinking the playlist
+        Space Complexity: O(n) for the list of node references
         """
         if criterion not in ['title', 'duration', 'recently_added']:
             raise ValueError("Invalid sorting criterion")
 
-        songs = []
-        current = self.playlist_engine.head
-        index = 0
-        while current:
-            songs.append({
-                'title': current.title,
-                'artist': current.artist,
-                'duration': current.duration,
-                'added_order': index
-            })
-            current = current.next if not self.playlist_engine.reversed else current.prev
-            index += 1
-
-        key = 'added_order' if criterion == 'recently_added' else criterion
-        songs.sort(key=lambda x: (-x[key] if key == 'added_order' else x[key]), reverse=reverse)
-
-        # Reconstruct the playlist
-        self.playlist_engine.head = None
-        self.playlist_engine.tail = None
-        self.playlist_engine.size = 0
-        for song in songs:
-            self.playlist_engine.add_song(song['title'], song['artist'], song['duration'])
\ No newline at end of file
+        nodes = list(self.playlist_engine)
+        if criterion == 'recently_added':
+            # Most recent first is exactly the reverse of the current order
+            if not reverse:
+                nodes.reverse()
+        else:
+            nodes.sort(key=attrgetter(criterion), reverse=reverse)
+
+        # Re-link the existing nodes in sorted order
+        self.playlist_engine.relink(nodes, reorder_only=True)
\ No newline at end of file
@@ -4,25 +4,118 @@ from playlist_engine import PlaylistEngine
 class PlaylistSummary:
     def __init__(self, playlist_engine):
         """
-        Initialize the playlist summary generator.
+        Initialize the playlist summary generator and its incremental aggregates.
         Args:
             playlist_engine: Instance of PlaylistEngine
-        Time Complexity: O(1)
-        Space Complexity: O(1)
+        Time Complexity: O(n) one-off seeding of the aggregates
+        Space Complexity: O(k) where k is the number of unique genres/artists
         """
         self.playlist_engine = playlist_engine
+        self.genres = {}  # HashMap: song_id -> genre, registered once per song
+        self._recount()
+        playlist_engine.subscribe(self._on_playlist_event)
+
+    def _recount(self):
+        """Rebuild the incremental aggregates from a full pass over the playlist."""
+        self.genre_counts = {}   # HashMap: genre -> songs in the playlist
+        self.artist_counts = {}  # Multiset: artist -> songs in the playlist
+        self.total_playtime = 0
+        for node in self.playlist_engine:
+            self._count(node, 1)
+
+    def _genre_of(self, node):
+        if node.song_id is None:
+            return "Unknown"
+        return self.genres.get(node.song_id, "Unknown")
+
+    def _count(self, node, delta):
+        """Add (delta=1) or remove (delta=-1) one song from the aggregates."""
+        self._bump(self.genre_counts, self._genre_of(node), delta)
+        self._bump(self.artist_counts, node.artist, delta)
+        self.total_playtime += delta * node.duration
+
+    @staticmethod
+    def _bump(counts, key, delta):
+        count = counts.get(key, 0) + delta
+        if count:
+            counts[key] = count
+        else:
+            del counts[key]
+
+    def _on_playlist_event(self, event, *args):
+        if event == "add" or event == "insert":
+            self._count(args[0], 1)
+        elif event == "remove":
+            self._count(args[0], -1)
+        elif event == "reset":
+            self._recount()
+        # move/reverse/reorder do not change any aggregate
+
+    def register_genre(self, song_id, genre):
+        """
+        Register (or change) the genre of a song by its stable handle.
+        Args:
+            song_id: Song handle, as used by PlaylistEngine/SongLookup
+            genre (str): Genre name
+        Time Complexity: O(1) average case
+        Space Complexity: O(1)
+        """
+        node = self.playlist_engine.get_by_id(song_id)
+        if node is not None:
+            self._count(node, -1)
+        self.genres[song_id] = genre
+        if node is not None:
+            self._count(node, 1)
+
+    def register_genres(self, genre_by_id):
+        """
+        Register many genres at once.
+        Args:
+            genre_by_id (dict): Mapping of song handles to genres
+        Time Complexity: O(m) for m entries
+        Space Complexity: O(m)
+        """
+        for song_id, genre in genre_by_id.items():
+            self.register_genre(song_id, genre)
 
-    def generate_summary(self, genre_map):
+    def generate_summary(self, genre_map=None, verify=False):
         """
         Generate a summary of the playlist including genre distribution,
         total playtime, and artist count.
         Args:
-            genre_map (dict): Mapping of song titles to genres
+            genre_map (dict): Optional mapping of song titles to genres. When given,
+                the playlist is walked and titles are resolved against it (legacy mode);
+                otherwise the genres registered with register_genre are used
+            verify (bool): If True, recompute the incremental summary from scratch and
+                raise RuntimeError if the two disagree (intended for tests)
         Returns:
             dict: Summary containing:
                 - genre_distribution: Dict of genre to count
                 - total_playtime: Total duration in seconds
                 - artist_count: Number of unique artists
+        Raises:
+            RuntimeError: If verify is True and the incremental aggregates are out of sync
+        Time Complexity: O(g) for g genres from the incremental aggregates;
+        O(n) in legacy mode or with verify
+        Space Complexity: O(k) where k is the number of unique genres/artists
+        """
+        if genre_map is not None:
+            return self._summarize(lambda node: genre_map.get(node.title, "Unknown"))
+
+        summary = {
+            "genre_distribution": dict(self.genre_counts),
+            "total_playtime": self.total_playtime,
+            "artist_count": len(self.artist_counts)
+        }
+        if verify and summary != self._summarize(self._genre_of):
+            raise RuntimeError("Incremental summary is out of sync with the playlist")
+        return summary
+
+    def _summarize(self, genre_of):
+        """
+        Walk the playlist and build the summary from scratch.
+        Args:
+            genre_of (callable): Returns the genre of a SongNode
         Time Complexity: O(n) for traversing the playlist
         Space Complexity: O(k) where k is the number of unique genres/artists
         """
@@ -37,26 +130,19 @@ class PlaylistSummary:
         artist_set = set()
         total_duration = 0
 
-        # Traverse playlist, respecting reversed state
-        current = self.playlist_engine.head
-        while current:
-            title = current.title
-            artist = current.artist
-            duration = current.duration
-
+        # Traverse playlist nodes directly; nothing is copied per song
+        for node in self.playlist_engine:
             # Update genre distribution
-            genre = genre_map.get(title, "Unknown")
+            genre = genre_of(node)
             genre_counts[genre] = genre_counts.get(genre, 0) + 1
 
             # Update artist set
-            artist_set.add(artist)
+            artist_set.add(node.artist)
 
             # Update total playtime
-            total_duration += duration
-
-            current = current.next if not self.playlist_engine.reversed else current.prev
+            total_duration += node.duration
 
         summary["genre_distribution"] = genre_counts
         summary["total_playtime"] = total_duration
         summary["artist_count"] = len(artist_set)
-        return summary
\ No newline at end of file
+        return summary
@@ -0,0 +1,322 @@
+import asyncio
+import itertools
+import json
+from concurrent_playlist import ConcurrentPlaylist
+
+# JSON-lines protocol: one object per line in each direction.
+#   request   {"id": 7, "op": "add", "args": {"title": "...", "artist": "...", "duration": 200}}
+#   response  {"id": 7, "ok": true, "result": 42}  or  {"id": 7, "ok": false, "error": "..."}
+# Requests may be pipelined; responses carry the request id and can arrive out of order
+# (reads are answered at once, writes after their batch is applied).
+WRITE_OPS = ("add", "delete", "move", "reverse", "rate", "play")
+READ_OPS = ("size", "get", "slice", "lookup", "rating", "top_rated", "recent")
+
+
+def _song(node):
+    return {"title": node.title, "artist": node.artist, "duration": node.duration, "song_id": node.song_id}
+
+
+def _resolve(future, result=None, error=None):
+    # A request's future is cancelled if its response task was (e.g. on shutdown); the
+    # op itself is still applied, there is just no one left to answer
+    if future.done():
+        return
+    if error is None:
+        future.set_result(result)
+    else:
+        future.set_exception(error)
+
+
+# PlayWise Server: asyncio front-end over one playlist, its lookup, rating tree and history.
+# Writes from all connections go through one queue; a single writer task drains whatever
+# has queued up (up to max_batch ops) and applies it as one batch: runs of "add" become a
+# single SongLookup.sync_add_many splice, and readers get one new snapshot per batch.
+class PlayWiseServer:
+    def __init__(self, playlist_engine, song_lookup, song_rating_tree, playback_history, max_batch=256):
+        """
+        Initialize the server (call start() to listen).
+        Args:
+            playlist_engine: PlaylistEngine to serve (guarded by a ConcurrentPlaylist)
+            song_lookup: SongLookup synced with the playlist
+            song_rating_tree: SongRatingTree for "rate"/"rating"/"top_rated"
+            playback_history: PlaybackHistory for "play"/"recent"
+            max_batch (int): Most write ops applied per batch
+        Raises:
+            ValueError: If max_batch is less than 1
+        Time Complexity: O(n) to build the first snapshot
+        Space Complexity: O(n)
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.concurrent = ConcurrentPlaylist(playlist_engine)
+        self.song_lookup = song_lookup
+        self.song_rating_tree = song_rating_tree
+        self.playback_history = playback_history
+        self.max_batch = max_batch
+        self.queue = None   # asyncio.Queue of (op, args, future), created by start()
+        self.server = None
+        self.writer_task = None
+        self.batches = 0      # Number of batches applied
+        self.batched_ops = 0  # Number of write ops applied
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Start listening on TCP (host, port) or, if path is given, on a Unix socket.
+        Returns:
+            tuple or str: The bound (host, port), or the socket path
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.queue = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self._apply_batches())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=path)
+            return path
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """
+        Stop listening, finish queued writes and stop the writer task.
+        Time Complexity: O(q) for q queued writes
+        Space Complexity: O(1)
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None:
+            await self.queue.join()
+            self.writer_task.cancel()
+            try:
+                await self.writer_task
+            except asyncio.CancelledError:
+                pass
+        self.concurrent.close()
+
+    async def _handle_connection(self, reader, writer):
+        pending = set()  # Write responses still waiting for their batch
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                    op = request["op"]
+                    args = request.get("args") or {}
+                except (ValueError, KeyError, AttributeError) as error:
+                    self._respond(writer, None, error=f"Bad request: {error}")
+                    continue
+                if op in WRITE_OPS:
+                    future = asyncio.get_running_loop().create_future()
+                    self.queue.put_nowait((op, args, future))
+                    task = asyncio.create_task(self._respond_when_done(writer, request_id, future))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                elif op in READ_OPS:
+                    try:
+                        self._respond(writer, request_id, result=self._read(op, args))
+                    except Exception as error:
+                        self._respond(writer, request_id, error=f"{type(error).__name__}: {error}")
+                else:
+                    self._respond(writer, request_id, error=f"Unknown op {op!r}")
+                await writer.drain()
+            if pending:
+                await asyncio.gather(*pending)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def _respond(self, writer, request_id, result=None, error=None):
+        if error is None:
+            message = {"id": request_id, "ok": True, "result": result}
+        else:
+            message = {"id": request_id, "ok": False, "error": error}
+        writer.write(json.dumps(message).encode("utf-8") + b"\n")
+
+    async def _respond_when_done(self, writer, request_id, future):
+        try:
+            self._respond(writer, request_id, result=await future)
+        except Exception as error:
+            self._respond(writer, request_id, error=f"{type(error).__name__}: {error}")
+
+    def _read(self, op, args):
+        """Answer a read op from the latest snapshot and the read-only structures."""
+        if op == "size":
+            return len(self.concurrent.snapshot())
+        if op == "get":
+            return _song(self.concurrent.snapshot()[args["index"]])
+        if op == "slice":
+            snapshot = self.concurrent.snapshot()
+            start, stop, _ = slice(args.get("start", 0), args.get("stop")).indices(len(snapshot))
+            return [_song(snapshot[index]) for index in range(start, stop)]
+        if op == "lookup":
+            return self.song_lookup.lookup_by_id(args["song_id"])
+        if op == "rating":
+            return self.song_rating_tree.get_rating(args["song_id"])
+        if op == "top_rated":
+            return [{"rating": rating, **song} for rating, song in self.song_rating_tree.top_n(args.get("n", 10))]
+        return list(self.playback_history.recent(args.get("k", 10)))  # "recent"
+
+    async def _apply_batches(self):
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                with self.concurrent.write():
+                    self._apply(batch)
+            except Exception as error:
+                # Keep the writer alive: fail only the ops the batch left unanswered
+                for _, _, future in batch:
+                    _resolve(future, error=error)
+            finally:
+                self.batches += 1
+                self.batched_ops += len(batch)
+                for _ in batch:
+                    queue.task_done()
+
+    def _apply(self, batch):
+        """
+        Apply one batch of write ops in order, resolving each op's future.
+        Time Complexity: O(b log n) for b ops (adds are spliced in one pass)
+        Space Complexity: O(b)
+        """
+        position = 0
+        while position < len(batch):
+            op, args, future = batch[position]
+            if op == "add":
+                # Coalesce a run of adds into one sync_add_many call
+                end = position
+                while end < len(batch) and batch[end][0] == "add":
+                    end += 1
+                rows = []
+                waiting = []
+                for _, args, future in batch[position:end]:
+                    try:
+                        rows.append((args["title"], args["artist"], int(args["duration"])))
+                    except Exception as error:
+                        _resolve(future, error=error)  # Only the malformed request fails
+                    else:
+                        waiting.append(future)
+                try:
+                    song_ids = self.song_lookup.sync_add_many(rows) if rows else []
+                except Exception as error:
+                    for future in waiting:
+                        _resolve(future, error=error)
+                else:
+                    for future, song_id in zip(waiting, song_ids):
+                        _resolve(future, song_id)
+                position = end
+                continue
+            try:
+                result = self._apply_one(op, args)
+            except Exception as error:
+                _resolve(future, error=error)
+            else:
+                _resolve(future, result)
+            position += 1
+
+    def _apply_one(self, op, args):
+        engine = self.concurrent.playlist_engine
+        if op == "delete":
+            return self.song_lookup.sync_delete(args["song_id"])
+        if op == "move":
+            engine.move_by_id(args["song_id"], args["to_index"])
+            return None
+        if op == "reverse":
+            engine.reverse_playlist()
+            return None
+        song = self.song_lookup.lookup_by_id(args["song_id"])
+        if song is None:
+            raise KeyError(args["song_id"])
+        if op == "rate":
+            self.song_rating_tree.insert_song(song["song_id"], song["title"], song["artist"],
+                                              song["duration"], args["rating"])
+            return None
+        self.playback_history.add_played_song(song["title"], song["artist"], song["duration"],
+                                              song_id=song["song_id"])  # "play"
+        return None
+
+
+# PlayWise Client: pipelined asyncio client for PlayWiseServer
+class PlayWiseClient:
+    def __init__(self):
+        """
+        Initialize an unconnected client (call connect()).
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.reader = None
+        self.writer = None
+        self.waiting = {}  # HashMap: request id -> future for its response
+        self.ids = itertools.count(1)
+        self.receiver = None
+
+    async def connect(self, host="127.0.0.1", port=None, path=None):
+        """
+        Connect over TCP (host, port) or, if path is given, a Unix socket.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(host, port)
+        self.receiver = asyncio.create_task(self._receive())
+
+    async def _receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self.waiting.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if response["ok"]:
+                    future.set_result(response["result"])
+                else:
+                    future.set_exception(RuntimeError(response["error"]))
+        finally:
+            for future in self.waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed"))
+            self.waiting.clear()
+
+    async def call(self, op, **args):
+        """
+        Send one request and wait for its response; calls from several tasks share the
+        connection and are pipelined.
+        Args:
+            op (str): Operation name (see WRITE_OPS and READ_OPS)
+            **args: The operation's arguments
+        Returns:
+            The operation's result
+        Raises:
+            RuntimeError: If the server reports an error
+            ConnectionError: If the connection closes first
+        Time Complexity: O(1) plus the round trip
+        Space Complexity: O(1)
+        """
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write(json.dumps({"id": request_id, "op": op, "args": args}).encode("utf-8") + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        """
+        Close the connection.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+        if self.receiver is not None:
+            await self.receiver
@@ -0,0 +1,264 @@
+import random
+
+# Node of the implicit treap, holding one song slot in playlist order
+class IndexNode:
+    __slots__ = ("song", "priority", "count", "left", "right", "parent")
+
+    def __init__(self, song, priority):
+        """
+        Initialize a treap node for a song slot.
+        Args:
+            song: The SongNode stored in this slot
+            priority (float): Random heap priority that keeps the treap balanced
+        """
+        self.song = song          # SongNode currently occupying this slot
+        self.priority = priority  # Heap priority (max-heap)
+        self.count = 1            # Number of slots in this subtree
+        self.left = None          # Left child (earlier positions)
+        self.right = None         # Right child (later positions)
+        self.parent = None        # Parent pointer for O(log n) rank queries
+
+
+def _count(node):
+    return node.count if node else 0
+
+
+def _update(node):
+    """Recompute the subtree size of node and repoint its children at it."""
+    node.count = 1 + _count(node.left) + _count(node.right)
+    if node.left:
+        node.left.parent = node
+    if node.right:
+        node.right.parent = node
+
+
+def _merge(left, right):
+    """Concatenate two treaps where every slot of left precedes every slot of right."""
+    if not left:
+        return right
+    if not right:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+def _split(node, k):
+    """Split a treap into (first k slots, remaining slots)."""
+    if not node:
+        return None, None
+    if _count(node.left) >= k:
+        left, right = _split(node.left, k)
+        node.left = right
+        _update(node)
+        return left, node
+    left, right = _split(node.right, k - _count(node.left) - 1)
+    node.right = left
+    _update(node)
+    return node, right
+
+
+# Positional index over the playlist using an implicit treap (order-statistic tree)
+class PositionIndex:
+    def __init__(self):
+        """
+        Initialize an empty positional index.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        Note: Positions are physical (head to tail); PlaylistEngine maps logical
+        indices onto them so the lazy reversal flag keeps working.
+        """
+        self.root = None
+        self._random = random.random
+
+    def __len__(self):
+        return _count(self.root)
+
+    def _new_node(self, song):
+        node = IndexNode(song, self._random())
+        song.index_node = node
+        return node
+
+    def _set_root(self, root):
+        if root:
+            root.parent = None
+        self.root = root
+
+    def append(self, song):
+        """
+        Add a song slot after the last position.
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        self._set_root(_merge(self.root, self._new_node(song)))
+
+    def prepend(self, song):
+        """
+        Add a song slot before the first position.
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        self._set_root(_merge(self._new_node(song), self.root))
+
+    def insert(self, position, song):
+        """
+        Insert a song slot so that it ends up at the given position.
+        Args:
+            position (int): Physical position, 0 <= position <= len(self)
+            song: SongNode to insert
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        left, right = _split(self.root, position)
+        self._set_root(_merge(_merge(left, self._new_node(song)), right))
+
+    def extend(self, songs, front=False):
+        """
+        Add many song slots at once after the last position (or before the first).
+        Args:
+            songs (iterable): SongNodes in physical order
+            front (bool): If True, place the new slots before the first position
+        Time Complexity: O(k + log n) expected for k new songs
+        Space Complexity: O(k) for the new slots
+        """
+        if front:
+            self._set_root(_merge(self._build(songs), self.root))
+        else:
+            self._set_root(_merge(self.root, self._build(songs)))
+
+    def rebuild(self, songs):
+        """
+        Replace the whole index with the given songs.
+        Time Complexity: O(n)
+        Space Complexity: O(n)
+        """
+        self._set_root(self._build(songs))
+
+    def reassign(self, songs):
+        """
+        Put songs into the existing slots in order, keeping the treap's shape.
+        Used for pure reorders (sort, shuffle), where the slot count is unchanged.
+        Args:
+            songs (iterable): Exactly len(self) SongNodes in physical order
+        Time Complexity: O(n), with no allocation
+        Space Complexity: O(log n) expected for the traversal stack
+        """
+        songs = iter(songs)
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            song = next(songs)
+            node.song = song
+            song.index_node = node
+            node = node.right
+
+    def _build(self, songs):
+        """
+        Build a treap from songs in order using the Cartesian-tree stack method.
+        Time Complexity: O(k)
+        Space Complexity: O(h) for the right-spine stack
+        """
+        spine = []
+        last = None
+        for song in songs:
+            node = self._new_node(song)
+            last = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+                _update(last)
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        while spine:
+            last = spine.pop()
+            _update(last)
+        if last:
+            last.parent = None
+        return last
+
+    def clear(self):
+        """
+        Drop every slot.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.root = None
+
+    def song_at(self, position):
+        """
+        Return the song at the given physical position.
+        Args:
+            position (int): 0 <= position < len(self)
+        Raises:
+            IndexError: If position is out of range
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        if position < 0 or position >= _count(self.root):
+            raise IndexError("Invalid index")
+        node = self.root
+        while True:
+            left_count = _count(node.left)
+            if position < left_count:
+                node = node.left
+            elif position == left_count:
+                return node.song
+            else:
+                position -= left_count + 1
+                node = node.right
+
+    def position_of(self, song):
+        """
+        Return the physical position of a song stored in the index.
+        Time Complexity: O(log n) expected, by walking parent pointers
+        Space Complexity: O(1)
+        """
+        node = song.index_node
+        position = _count(node.left)
+        while node.parent:
+            if node is node.parent.right:
+                position += _count(node.parent.left) + 1
+            node = node.parent
+        return position
+
+    def remove(self, song):
+        """
+        Remove a song's slot; later positions shift down by one.
+        Time Complexity: O(log n) expected
+        Space Complexity: O(1)
+        """
+        node = song.index_node
+        child = _merge(node.left, node.right)
+        parent = node.parent
+        if child:
+            child.parent = parent
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+        while parent:
+            parent.count -= 1
+            parent = parent.parent
+        song.index_node = None
+
+    def swap(self, song1, song2):
+        """
+        Exchange the positions of two songs by swapping their slots' contents.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        node1 = song1.index_node
+        node2 = song2.index_node
+        node1.song, node2.song = song2, song1
+        song1.index_node, song2.index_node = node2, node1
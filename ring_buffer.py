@@ -0,0 +1,122 @@
+# Fixed-capacity ring buffer: appending to a full buffer evicts the oldest item
+class RingBuffer:
+    def __init__(self, capacity):
+        """
+        Initialize an empty ring buffer with preallocated slots.
+        Args:
+            capacity (int): Maximum number of items kept
+        Raises:
+            ValueError: If capacity is less than 1
+        Time Complexity: O(capacity)
+        Space Complexity: O(capacity), fixed for the buffer's lifetime
+        """
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1")
+        self.capacity = capacity
+        self.slots = [None] * capacity
+        self.start = 0  # Slot of the oldest item
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, item):
+        """
+        Add an item as the newest entry.
+        Args:
+            item: Item to store
+        Returns:
+            The evicted oldest item if the buffer was full, otherwise None
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        end = (self.start + self.size) % self.capacity
+        evicted = None
+        if self.size == self.capacity:
+            evicted = self.slots[end]
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.size += 1
+        self.slots[end] = item
+        return evicted
+
+    def pop(self):
+        """
+        Remove and return the newest item.
+        Raises:
+            IndexError: If the buffer is empty
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if not self.size:
+            raise IndexError("pop from empty ring buffer")
+        self.size -= 1
+        end = (self.start + self.size) % self.capacity
+        item = self.slots[end]
+        self.slots[end] = None  # Drop the reference so the item can be freed
+        return item
+
+    def __getitem__(self, index):
+        """
+        Return the item at index, oldest first; negative indices count from the newest.
+        Raises:
+            IndexError: If index is out of range
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("ring buffer index out of range")
+        return self.slots[(self.start + index) % self.capacity]
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield self.slots[(self.start + index) % self.capacity]
+
+    def recent(self, k=None):
+        """
+        Return a view of the k newest items, newest first, without copying.
+        Args:
+            k (int): Number of items, or None for all of them
+        Returns:
+            RecentView: Sized, indexable and iterable; it reads the live buffer, so
+            wrap it in list() to keep a stable copy
+        Time Complexity: O(1) to create, O(1) per item read
+        Space Complexity: O(1)
+        """
+        return RecentView(self, self.capacity if k is None else k)
+
+    def clear(self):
+        """
+        Remove all items.
+        Time Complexity: O(capacity)
+        Space Complexity: O(1)
+        """
+        self.slots = [None] * self.capacity
+        self.start = 0
+        self.size = 0
+
+
+# Newest-first window over the tail of a RingBuffer
+class RecentView:
+    def __init__(self, buffer, k):
+        self.buffer = buffer
+        self.k = k
+
+    def __len__(self):
+        return max(0, min(self.k, len(self.buffer)))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("recent view index out of range")
+        return self.buffer[-1 - index]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.buffer[-1 - index]
+
+    def __repr__(self):
+        return f"RecentView({list(self)!r})"
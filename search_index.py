@@ -0,0 +1,237 @@
+import bisect
+import heapq
+from collections import Counter
+
+
+def normalize(text):
+    """Case-fold and collapse whitespace so searches ignore case and spacing."""
+    return " ".join(str(text).casefold().split())
+
+
+def trigrams(normalized):
+    """Return the set of character trigrams of a word, padded with spaces."""
+    padded = f" {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Text search index: a sorted array for prefix search and a word trigram index for typos
+class SearchIndex:
+    def __init__(self):
+        """
+        Initialize an empty search index over (song_id, text) pairs.
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.ids_by_text = {}    # HashMap: normalized text -> insertion-ordered dict of song_ids
+        self.texts_by_word = {}  # HashMap: word -> set of normalized texts containing it
+        self.grams = {}          # HashMap: trigram -> set of distinct words containing it
+        self._sorted = []      # Sorted distinct texts for prefix search (may hold stale entries)
+        self._pending = []     # Texts added since the last sort
+        self._stale = 0        # Removed texts still present in _sorted
+
+    def __len__(self):
+        return len(self.ids_by_text)
+
+    def add(self, song_id, text):
+        """
+        Index a song under the given text.
+        Args:
+            song_id: Song identifier
+            text (str): Title or artist to index
+        Time Complexity: O(L) for a text of length L; sorting is deferred to the next prefix query
+        Space Complexity: O(L) for a new distinct text
+        """
+        key = normalize(text)
+        ids = self.ids_by_text.get(key)
+        if ids is None:
+            ids = self.ids_by_text[key] = {}
+            self._pending.append(key)
+            for word in set(key.split()):
+                texts = self.texts_by_word.get(word)
+                if texts is None:
+                    texts = self.texts_by_word[word] = set()
+                    for gram in trigrams(word):
+                        words = self.grams.get(gram)
+                        if words is None:
+                            words = self.grams[gram] = set()
+                        words.add(word)
+                texts.add(key)
+        ids[song_id] = None
+
+    def remove(self, song_id, text):
+        """
+        Remove a song from the entry for the given text.
+        Args:
+            song_id: Song identifier
+            text (str): The text the song was indexed under
+        Returns:
+            bool: True if the song was indexed under text, False otherwise
+        Time Complexity: O(L) when the last song with this text is removed, else O(1)
+        Space Complexity: O(1)
+        """
+        key = normalize(text)
+        ids = self.ids_by_text.get(key)
+        if ids is None or song_id not in ids:
+            return False
+        del ids[song_id]
+        if not ids:
+            del self.ids_by_text[key]
+            for word in set(key.split()):
+                texts = self.texts_by_word[word]
+                texts.discard(key)
+                if not texts:
+                    del self.texts_by_word[word]
+                    for gram in trigrams(word):
+                        words = self.grams[gram]
+                        words.discard(word)
+                        if not words:
+                            del self.grams[gram]
+            self._stale += 1
+        return True
+
+    def _refresh(self):
+        """
+        Merge pending texts into the sorted array and drop stale entries when they pile up.
+        Time Complexity: O(n + p log p) after p additions (Timsort merges the sorted run),
+        O(1) when nothing changed
+        Space Complexity: O(n) while rebuilding
+        """
+        if self._pending:
+            self._sorted.extend(self._pending)
+            self._pending = []
+            self._sorted.sort()
+        if self._stale and self._stale * 2 >= len(self._sorted):
+            live = self.ids_by_text
+            previous = None
+            compacted = []
+            for text in self._sorted:
+                if text != previous and text in live:
+                    compacted.append(text)
+                previous = text
+            self._sorted = compacted
+            self._stale = 0
+
+    def prefix(self, prefix, k=10):
+        """
+        Return up to k song_ids whose text starts with prefix, in alphabetical order.
+        Args:
+            prefix (str): Text typed so far
+            k (int): Maximum number of results
+        Returns:
+            list: song_ids
+        Time Complexity: O(log n + k) once the index is sorted
+        Space Complexity: O(k) for the output
+        """
+        self._refresh()
+        key = normalize(prefix)
+        live = self.ids_by_text
+        results = []
+        position = bisect.bisect_left(self._sorted, key)
+        previous = None
+        while position < len(self._sorted) and len(results) < k:
+            text = self._sorted[position]
+            if not text.startswith(key):
+                break
+            # Skip stale entries and duplicates left by remove/re-add
+            if text != previous and text in live:
+                for song_id in live[text]:
+                    results.append(song_id)
+                    if len(results) == k:
+                        break
+            previous = text
+            position += 1
+        return results
+
+    def similar_words(self, word, limit=8, min_score=0.3):
+        """
+        Return up to limit indexed words closest to word, as (score, word) pairs, best first.
+        Similarity is the Dice coefficient of the two words' trigram sets.
+        Args:
+            word (str): Normalized query word
+            limit (int): Maximum number of matches
+            min_score (float): Minimum similarity (0..1)
+        Returns:
+            list: (score, word) pairs
+        Time Complexity: O(p) for p word postings of the query's trigrams (bounded by the
+        vocabulary, not the number of songs)
+        Space Complexity: O(p)
+        """
+        word_grams = trigrams(word)
+        shared = Counter()
+        for gram in word_grams:
+            words = self.grams.get(gram)
+            if words:
+                shared.update(words)
+        scored = []
+        for candidate, common in shared.items():
+            score = 2.0 * common / (len(word_grams) + len(candidate))  # A word of length L has <= L trigrams
+            if score >= min_score:
+                scored.append((score, candidate))
+        return heapq.nlargest(limit, scored)
+
+    def fuzzy(self, query, k=10, min_score=0.3, max_candidates=2000):
+        """
+        Return up to k song_ids whose text best matches query, tolerating typos.
+        Each query word is matched against the indexed vocabulary by trigram similarity;
+        a text scores the best similarity per query word it contains, normalized by the
+        larger of the two word counts. Query words with the fewest matching texts are
+        processed first; once max_candidates texts are collected, later words only
+        re-score existing candidates, so common words cannot blow up the latency.
+        Args:
+            query (str): Possibly misspelled text
+            k (int): Maximum number of results
+            min_score (float): Minimum per-word similarity (0..1)
+            max_candidates (int): Cap on the number of texts scored
+        Returns:
+            list: song_ids, best match first
+        Time Complexity: O(p + c * w) for p vocabulary postings, c <= max_candidates
+        candidate texts and w query words; independent of the total number of songs
+        Space Complexity: O(c)
+        """
+        words = list(dict.fromkeys(normalize(query).split()))
+        if not words:
+            return []
+        per_word = []
+        for word in words:
+            matches = self.similar_words(word, limit=4, min_score=min_score)
+            if matches:
+                # Keep only near-best spellings: weaker ones rarely change the ranking
+                # but multiply the number of candidate texts
+                matches = [match for match in matches if match[0] >= 0.8 * matches[0][0]]
+                postings = [(score, self.texts_by_word[match]) for score, match in matches]
+                per_word.append((sum(len(texts) for _, texts in postings), postings))
+        per_word.sort(key=lambda item: item[0])
+
+        scores = {}  # HashMap: candidate text -> summed best similarity per query word
+        for _, postings in per_word:
+            best = {}
+            added = 0
+            for score, texts in postings:
+                if len(scores) + added >= max_candidates:
+                    break
+                for text in texts:
+                    if text not in best:
+                        best[text] = score
+                        if text not in scores:
+                            added += 1
+                            if len(scores) + added >= max_candidates:
+                                break
+            # Candidates this word's postings were not fully scanned for
+            for text in scores:
+                if text not in best:
+                    for score, texts in postings:
+                        if text in texts:
+                            best[text] = score
+                            break
+            for text, score in best.items():
+                scores[text] = scores.get(text, 0.0) + score
+
+        ranked = heapq.nlargest(k, ((total / max(len(words), text.count(" ") + 1), text)
+                                    for text, total in scores.items()))
+        results = []
+        for _, text in ranked:
+            for song_id in self.ids_by_text[text]:
+                results.append(song_id)
+                if len(results) == k:
+                    return results
+        return results
@@ -0,0 +1,151 @@
+import mmap
+import os
+import struct
+import zlib
+from array import array
+
+# Versioned, checksummed columnar container used by SystemSnapshot.save/load.
+#
+# Layout (little-endian):
+#   header     magic "PWSNAP01" | u16 format version | u16 column count | u32 crc32 | u64 body length
+#   body       directory: per column 24-byte name | 1-byte typecode | 7 pad | u64 count | u64 offset
+#              data: each column's raw array bytes, 8-byte aligned, at offset from the body start
+# Strings are stored once in a string table (NUL-separated UTF-8, column "strings") and
+# referenced by index, so loading the table is a single decode + split.
+
+MAGIC = b"PWSNAP01"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHIQ")
+DIRECTORY_ENTRY = struct.Struct("<24sc7xQQ")
+NAME_SIZE = 24
+
+
+# String table: assigns each distinct string a stable index while a snapshot is written
+class StringTable:
+    def __init__(self):
+        self.index = {}  # HashMap: string -> position in the table, in first-seen order
+
+    def add(self, text):
+        """
+        Return the table index of text, adding it if new.
+        Time Complexity: O(1) average case
+        Space Complexity: O(1) per distinct string
+        """
+        index = self.index
+        return index.setdefault(text, len(index))
+
+    def add_all(self, texts):
+        """
+        Return an array('I') of table indexes for many strings.
+        Time Complexity: O(k) for k strings, with a single dict operation each
+        Space Complexity: O(k) for the output
+        """
+        index = self.index
+        return array("I", [index.setdefault(text, len(index)) for text in texts])
+
+    @property
+    def strings(self):
+        """
+        Distinct strings in index order.
+        Raises:
+            ValueError: If a string contains a NUL character (the table separator)
+            TypeError: If a value is not a string
+        """
+        strings = list(self.index)
+        for text in strings:
+            if "\x00" in text:
+                raise ValueError(f"Strings in a snapshot must not contain NUL: {text!r}")
+        return strings
+
+
+def write_columns(path, strings, columns, fsync=False):
+    """
+    Write a snapshot file.
+    Args:
+        path (str): Destination file
+        strings (list): String table, referenced by index from the columns
+        columns (dict): name -> array.array, written in insertion order
+        fsync (bool): Force the file to stable storage before returning
+    Time Complexity: O(b) for b bytes written, plus one crc32 pass
+    Space Complexity: O(b) for the assembled body
+    """
+    columns = dict(columns)
+    columns["strings"] = array("B", "\x00".join(strings).encode("utf-8"))
+    columns["string_count"] = array("q", [len(strings)])
+
+    directory_size = DIRECTORY_ENTRY.size * len(columns)
+    offset = directory_size
+    entries = []
+    for name, data in columns.items():
+        if len(name) > NAME_SIZE:
+            raise ValueError(f"Column name too long: {name}")
+        offset += -offset % 8
+        entries.append(DIRECTORY_ENTRY.pack(name.encode("ascii"), data.typecode.encode("ascii"),
+                                            len(data), offset))
+        offset += len(data) * data.itemsize
+
+    body = bytearray(offset)
+    body[:directory_size] = b"".join(entries)
+    for entry, data in zip(entries, columns.values()):
+        _, _, _, start = DIRECTORY_ENTRY.unpack(entry)
+        raw = data.tobytes()
+        body[start:start + len(raw)] = raw
+
+    with open(path, "wb") as handle:
+        handle.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(columns), zlib.crc32(body), len(body)))
+        handle.write(body)
+        if fsync:
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+def read_columns(path, verify=True):
+    """
+    Map a snapshot file and decode its columns.
+    Args:
+        path (str): Snapshot file
+        verify (bool): Check the crc32 of the body
+    Returns:
+        tuple: (strings list, dict of column name -> list of values)
+    Raises:
+        ValueError: If the file is not a snapshot, has an unsupported version, is
+            truncated or fails the checksum
+    Time Complexity: O(b) for b bytes; every column is cast straight from the mapping
+    and converted to a list in C, with no per-record parsing
+    Space Complexity: O(b) for the decoded lists
+    """
+    with open(path, "rb") as handle:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) < HEADER.size:
+                raise ValueError(f"{path} is not a PlayWise snapshot")
+            magic, version, column_count, checksum, body_length = HEADER.unpack_from(mapped)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a PlayWise snapshot")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version}")
+            if len(mapped) != HEADER.size + body_length:
+                raise ValueError(f"{path} is truncated")
+            view = memoryview(mapped)
+            body = view[HEADER.size:]
+            try:
+                if verify and zlib.crc32(body) != checksum:
+                    raise ValueError(f"{path} failed its checksum")
+                columns = {}
+                for position in range(column_count):
+                    name, typecode, count, offset = DIRECTORY_ENTRY.unpack_from(body, position * DIRECTORY_ENTRY.size)
+                    name = name.rstrip(b"\x00").decode("ascii")
+                    typecode = typecode.decode("ascii")
+                    with body[offset:offset + count * array(typecode).itemsize] as column:
+                        if typecode == "B":
+                            columns[name] = bytes(column)
+                        else:
+                            with column.cast(typecode) as values:
+                                columns[name] = values.tolist()
+            finally:
+                body.release()
+                view.release()
+
+    string_count = columns.pop("string_count")[0]
+    blob = columns.pop("strings")
+    strings = blob.decode("utf-8").split("\x00") if string_count else []
+    return strings, columns
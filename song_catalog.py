@@ -0,0 +1,118 @@
+from id_allocator import CounterIdAllocator
+from song_node import intern_text
+
+# Catalog track: the one shared copy of a song's metadata
+class Track:
+    # Fixed attribute layout: no per-track __dict__
+    __slots__ = ("track_id", "title", "artist", "duration")
+
+    def __init__(self, track_id, title, artist, duration):
+        """
+        Initialize a catalog track.
+        Args:
+            track_id (int): Catalog-wide integer ID
+            title (str): Song title (interned)
+            artist (str): Song artist (interned)
+            duration (int): Song duration in seconds
+        """
+        self.track_id = track_id
+        self.title = title
+        self.artist = artist
+        self.duration = duration
+
+    def __repr__(self):
+        return f"Track({self.track_id}, {self.title!r}, {self.artist!r}, {self.duration})"
+
+
+# Song Catalog: flyweight store of track metadata shared by any number of playlists.
+# Each (title, artist, duration) is stored once as a Track; PlaylistEngine.add_track links
+# nodes that point at the track's own string and int objects, so a playlist entry costs
+# one node of references and no metadata copies.
+class SongCatalog:
+    def __init__(self, id_allocator=None):
+        """
+        Initialize an empty catalog.
+        Args:
+            id_allocator: Source of new track IDs (see id_allocator.py); defaults to
+                a CounterIdAllocator handing out 1, 2, 3, ...
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        self.tracks = {}       # HashMap: track_id -> Track
+        self.by_metadata = {}  # HashMap: (title, artist, duration) -> Track
+        self.id_allocator = id_allocator if id_allocator is not None else CounterIdAllocator()
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def __contains__(self, track_id):
+        return track_id in self.tracks
+
+    def __iter__(self):
+        """
+        Yield the tracks in insertion order.
+        Time Complexity: O(1) per track
+        Space Complexity: O(1)
+        """
+        return iter(self.tracks.values())
+
+    def add_track(self, title, artist, duration, track_id=None):
+        """
+        Return the catalog track for this metadata, adding it if it is new.
+        Args:
+            title (str): Song title
+            artist (str): Song artist
+            duration (int): Song duration in seconds
+            track_id (int): Optional explicit ID (e.g. from an external catalog);
+                allocated when omitted
+        Returns:
+            Track: The existing track with the same metadata, or the new one
+        Raises:
+            TypeError: If track_id is not an int
+            ValueError: If track_id belongs to a track with different metadata, or
+                the metadata is already stored under another track_id
+        Time Complexity: O(1) average case
+        Space Complexity: O(1) per new track; repeats cost nothing
+        """
+        title = intern_text(title)
+        artist = intern_text(artist)
+        key = (title, artist, duration)
+        track = self.by_metadata.get(key)
+        if track_id is None:
+            if track is not None:
+                return track
+            track_id = self.id_allocator.allocate()
+        else:
+            if type(track_id) is not int:
+                raise TypeError("track_id must be an int")
+            if track is not None:
+                if track.track_id != track_id:
+                    raise ValueError(f"Track already in the catalog as {track.track_id}")
+                return track
+            if track_id in self.tracks:
+                raise ValueError(f"Track ID {track_id} is already in use")
+            self.id_allocator.observe(track_id)
+        track = Track(track_id, title, artist, duration)
+        self.tracks[track_id] = track
+        self.by_metadata[key] = track
+        return track
+
+    def get(self, track_id):
+        """
+        Return the track with the given ID, or None.
+        Time Complexity: O(1) average case
+        Space Complexity: O(1)
+        """
+        return self.tracks.get(track_id)
+
+    def track_for(self, node):
+        """
+        Return the catalog track a playlist node refers to (matched on its metadata).
+        Args:
+            node: SongNode, e.g. one linked by PlaylistEngine.add_track
+        Returns:
+            Track: The matching track, or None if the song is not in the catalog
+        Time Complexity: O(1) average case
+        Space Complexity: O(1)
+        """
+        return self.by_metadata.get((node.title, node.artist, node.duration))
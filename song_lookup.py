@@ -1,53 +1,75 @@
 from playlist_engine import PlaylistEngine
+from song_node import intern_text
+from search_index import SearchIndex
+from id_allocator import CounterIdAllocator
 
 # Song Lookup using HashMap for O(1) access by song_id or title
 class SongLookup:
-    def __init__(self, playlist_engine):
+    def __init__(self, playlist_engine, id_allocator=None):
         """
         Initialize the song lookup HashMap.
         Args:
             playlist_engine: Instance of PlaylistEngine to sync with
+            id_allocator: Source of new song_ids (see id_allocator.py); defaults to
+                a CounterIdAllocator handing out 1, 2, 3, ...
         Time Complexity: O(1)
         Space Complexity: O(1)
         """
         self.song_id_map = {}       # HashMap: song_id -> metadata
-        self.title_to_id = {}       # HashMap: title -> list of song_ids
+        self.title_to_id = {}       # HashMap: title -> insertion-ordered dict of song_ids
+        self.title_index = SearchIndex()   # Prefix/typo-tolerant search over titles
+        self.artist_index = SearchIndex()  # Prefix/typo-tolerant search over artists
+        self.search_stale = False  # True after a bulk load until the next search rebuilds the indexes
         self.playlist_engine = playlist_engine
+        self.id_allocator = id_allocator if id_allocator is not None else CounterIdAllocator()
 
     def add_song(self, song_id, title, artist, duration):
         """
         Add or update a song in the HashMap.
         Args:
-            song_id (str): Unique identifier for the song
+            song_id (int): Unique identifier for the song
             title (str): Song title
             artist (str): Song artist
             duration (int): Song duration in seconds
-        Time Complexity: O(1) average case
-        Space Complexity: O(1) per song
+        Time Complexity: O(L) for title/artist length L (search index upkeep)
+        Space Complexity: O(L) per song
+        Note: Updating an existing song_id first removes its old entry, so the
+        title and search indexes never keep stale mappings
         """
-        song_data = {"song_id": song_id, "title": title, "artist": artist, "duration": duration}
+        if song_id in self.song_id_map:
+            self.delete_song(song_id)
+        else:
+            self.id_allocator.observe(song_id)
+        song_data = {"song_id": song_id, "title": intern_text(title), "artist": intern_text(artist), "duration": duration}
         self.song_id_map[song_id] = song_data
-        if title not in self.title_to_id:
-            self.title_to_id[title] = []
-        self.title_to_id[title].append(song_id)
+        song_ids = self.title_to_id.get(title)
+        if song_ids is None:
+            song_ids = self.title_to_id[title] = {}
+        song_ids[song_id] = None
+        if not self.search_stale:
+            self.title_index.add(song_id, title)
+            self.artist_index.add(song_id, artist)
 
     def delete_song(self, song_id):
         """
         Delete a song from the HashMap by song_id.
         Args:
-            song_id (str): Unique identifier of the song
+            song_id (int): Unique identifier of the song
         Returns:
             bool: True if deletion was successful, False if song_id not found
-        Time Complexity: O(1) average case
+        Time Complexity: O(L) for title/artist length L (search index upkeep)
         Space Complexity: O(1)
         """
         if song_id not in self.song_id_map:
             return False
         song_data = self.song_id_map[song_id]
         title = song_data["title"]
-        self.title_to_id[title].remove(song_id)
+        del self.title_to_id[title][song_id]
         if not self.title_to_id[title]:
             del self.title_to_id[title]
+        if not self.search_stale:
+            self.title_index.remove(song_id, title)
+            self.artist_index.remove(song_id, song_data["artist"])
         del self.song_id_map[song_id]
         return True
 
@@ -55,7 +77,7 @@ class SongLookup:
         """
         Retrieve song metadata by song_id.
         Args:
-            song_id (str): Unique identifier of the song
+            song_id (int): Unique identifier of the song
         Returns:
             dict: Song metadata, or None if not found
         Time Complexity: O(1) average case
@@ -74,48 +96,176 @@ class SongLookup:
         Space Complexity: O(1) excluding output
         Note: Returns a list to handle non-unique titles
         """
-        song_ids = self.title_to_id.get(title, [])
+        song_ids = self.title_to_id.get(title, ())
         return [self.song_id_map[sid] for sid in song_ids]
 
+    def load_songs(self, songs, intern_strings=True):
+        """
+        Replace the contents of the lookup with many songs at once (e.g. from a snapshot).
+        The search indexes are rebuilt lazily on the next search instead of per song.
+        Args:
+            songs (iterable): (song_id, title, artist, duration) tuples
+            intern_strings (bool): Intern titles/artists; callers passing already
+                deduplicated strings (e.g. a snapshot's string table) can skip it
+        Time Complexity: O(k) for k songs
+        Space Complexity: O(k)
+        """
+        song_id_map = {}
+        title_to_id = {}
+        largest = None
+        for song_id, title, artist, duration in songs:
+            if intern_strings:
+                title = intern_text(title)
+                artist = intern_text(artist)
+            song_id_map[song_id] = {"song_id": song_id, "title": title, "artist": artist, "duration": duration}
+            song_ids = title_to_id.get(title)
+            if song_ids is None:
+                song_ids = title_to_id[title] = {}
+            song_ids[song_id] = None
+            if type(song_id) is int and (largest is None or song_id > largest):
+                largest = song_id
+        self.song_id_map = song_id_map
+        self.title_to_id = title_to_id
+        if largest is not None:
+            self.id_allocator.observe(largest)
+        self.search_stale = True
+
+    def _search_index(self, field):
+        if self.search_stale:
+            self.title_index = SearchIndex()
+            self.artist_index = SearchIndex()
+            for song_id, song in self.song_id_map.items():
+                self.title_index.add(song_id, song["title"])
+                self.artist_index.add(song_id, song["artist"])
+            self.search_stale = False
+        if field == "title":
+            return self.title_index
+        if field == "artist":
+            return self.artist_index
+        raise ValueError("Search field must be 'title' or 'artist'")
+
+    def search_prefix(self, prefix, k=10, field="title"):
+        """
+        Autocomplete: songs whose title (or artist) starts with prefix, ignoring case.
+        Args:
+            prefix (str): Text typed so far
+            k (int): Maximum number of results
+            field (str): 'title' or 'artist'
+        Returns:
+            list: Up to k song metadata dictionaries, in alphabetical order
+        Raises:
+            ValueError: If field is not 'title' or 'artist'
+        Time Complexity: O(log n + k) via binary search over the sorted index
+        Space Complexity: O(k) for the output
+        """
+        song_ids = self._search_index(field).prefix(prefix, k)
+        return [self.song_id_map[sid] for sid in song_ids]
+
+    def search_fuzzy(self, query, k=10, field="title"):
+        """
+        Typo-tolerant search: songs whose title (or artist) is closest to query.
+        Args:
+            query (str): Possibly misspelled title or artist
+            k (int): Maximum number of results
+            field (str): 'title' or 'artist'
+        Returns:
+            list: Up to k song metadata dictionaries, best match first
+        Raises:
+            ValueError: If field is not 'title' or 'artist'
+        Time Complexity: O(c * g) for c candidates sharing a rare trigram with the
+        query and g query trigrams; independent of the total number of songs
+        Space Complexity: O(c)
+        """
+        song_ids = self._search_index(field).fuzzy(query, k)
+        return [self.song_id_map[sid] for sid in song_ids]
+
+    def generate_song_id(self, title=None):
+        """
+        Generate a song_id for a new song from the configured allocator.
+        Args:
+            title (str): Song title (unused; kept for callers of the old API)
+        Returns:
+            int: Generated song_id, unique within this lookup
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        return self.id_allocator.allocate()
+
     def sync_add(self, title, artist, duration):
         """
         Sync with PlaylistEngine by adding a song to both the playlist and HashMap.
+        The generated song_id doubles as the playlist node's stable handle.
         Args:
             title (str): Song title
             artist (str): Song artist
             duration (int): Song duration in seconds
         Returns:
-            str: Generated song_id
-        Time Complexity: O(1) average case
+            int: Generated song_id
+        Time Complexity: O(L) for title/artist length L
         Space Complexity: O(1)
         """
-        import time
-        song_id = f"{title}_{int(time.time())}"  # Simple unique ID generation
+        song_id = self.generate_song_id(title)
+        self.playlist_engine.add_song(title, artist, duration, song_id=song_id)
         self.add_song(song_id, title, artist, duration)
-        self.playlist_engine.add_song(title, artist, duration)
         return song_id
 
+    def sync_add_many(self, songs):
+        """
+        Batch version of sync_add: allocate IDs in one call and append all songs to the
+        playlist in a single splice.
+        Args:
+            songs (iterable): (title, artist, duration) tuples
+        Returns:
+            list: Generated song_ids, in input order
+        Raises:
+            ValueError: If an allocated ID is already a playlist handle (e.g. one the
+                allocator never saw); nothing is added
+        Time Complexity: O(k) for k songs (plus search index upkeep)
+        Space Complexity: O(k)
+        """
+        songs = list(songs)
+        song_ids = self.id_allocator.allocate_many(len(songs))
+        handles = self.playlist_engine.handles
+        for song_id in song_ids:
+            if song_id in handles:
+                raise ValueError(f"Song ID {song_id} is already used in the playlist")
+        rows = [(title, artist, duration, song_id)
+                for (title, artist, duration), song_id in zip(songs, song_ids)]
+        try:
+            self.playlist_engine.extend(rows)
+        finally:
+            # Register whatever was spliced in, even if extend stopped partway
+            handles = self.playlist_engine.handles
+            for title, artist, duration, song_id in rows:
+                if song_id in handles:
+                    self.add_song(song_id, title, artist, duration)
+        return list(song_ids)
+
     def sync_delete(self, song_id):
         """
         Sync with PlaylistEngine by deleting a song from both the playlist and HashMap.
         Args:
-            song_id (str): Unique identifier of the song
+            song_id (int): Unique identifier of the song
         Returns:
             bool: True if deletion was successful, False otherwise
-        Time Complexity: O(n) due to PlaylistEngine traversal
+        Time Complexity: O(1) average case for songs added via sync_add (deleted by handle),
+        O(n) scan for songs that were added to the playlist directly
         Space Complexity: O(1)
+        Note: Without a handle, only a node that has no handle of its own and the same
+        title, artist and duration is deleted; if there is none, the stale lookup entry
+        is dropped and False is returned
         """
         song_data = self.lookup_by_id(song_id)
         if not song_data:
             return False
-        title = song_data["title"]
-        current = self.playlist_engine.head
-        index = 0
-        while current:
-            if current.title == title:
-                self.delete_song(song_id)
+        if self.playlist_engine.delete_by_id(song_id):
+            self.delete_song(song_id)
+            return True
+        title, artist, duration = song_data["title"], song_data["artist"], song_data["duration"]
+        self.delete_song(song_id)
+        for index, node in enumerate(self.playlist_engine):
+            if (node.song_id is None and node.title == title and node.artist == artist
+                    and node.duration == duration):
                 self.playlist_engine.delete_song(index)
                 return True
-            current = current.next if not self.playlist_engine.reversed else current.prev
-            index += 1
         return False
\ No newline at end of file
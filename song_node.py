@@ -1,15 +1,30 @@
+import sys
+
+
+def intern_text(value):
+    """Return the canonical copy of a string so repeated titles/artists share memory."""
+    return sys.intern(value) if type(value) is str else value
+
+
 # SongNode class for doubly linked list nodes in PlaylistEngine
 class SongNode:
-    def __init__(self, title, artist, duration):
+    # Fixed attribute layout: no per-node __dict__, which roughly halves node size
+    __slots__ = ("title", "artist", "duration", "song_id", "prev", "next", "index_node")
+
+    def __init__(self, title, artist, duration, song_id=None):
         """
         Initialize a song node for the doubly linked list.
         Args:
             title (str): Song title
             artist (str): Song artist
             duration (int): Song duration in seconds
+            song_id: Optional stable handle used by PlaylistEngine for O(1) access
         """
-        self.title = title
-        self.artist = artist
+        # intern_text inlined: this constructor is on every bulk-load hot path
+        self.title = sys.intern(title) if type(title) is str else title
+        self.artist = sys.intern(artist) if type(artist) is str else artist
         self.duration = duration  # Duration in seconds
+        self.song_id = song_id  # Stable handle, or None for anonymous songs
         self.prev = None  # Pointer to previous node
-        self.next = None  # Pointer to next node
\ No newline at end of file
+        self.next = None  # Pointer to next node
+        self.index_node = None  # Slot in PlaylistEngine's PositionIndex (indexed mode only)
\ No newline at end of file
@@ -1,161 +1,369 @@
-# Node for Binary Search Tree, representing a rating bucket
+import math
+from numbers import Real
+from song_node import intern_text
+from events import EventSource
+
+# Node of the AVL tree, representing one distinct rating value and its bucket
 class RatingNode:
+    __slots__ = ("rating", "songs", "left", "right", "height")
+
     def __init__(self, rating):
         """
-        Initialize a rating node for the BST.
+        Initialize a rating node for the AVL tree.
         Args:
-            rating (int): Rating value (1 to 5)
+            rating (float): Rating value
         """
-        self.rating = rating  # Rating value (1 to 5)
-        self.songs = []      # List to store songs with this rating
-        self.left = None     # Left child node
-        self.right = None    # Right child node
+        self.rating = rating  # Rating value
+        self.songs = {}       # Insertion-ordered dict: song_id -> song data
+        self.left = None      # Left child node (lower ratings)
+        self.right = None     # Right child node (higher ratings)
+        self.height = 1       # Height of this subtree, for AVL balancing
+
+
+def _height(node):
+    return node.height if node else 0
+
+
+def _fix_height(node):
+    left = node.left.height if node.left else 0
+    right = node.right.height if node.right else 0
+    node.height = 1 + (left if left > right else right)
+
+
+def _rotate_right(node):
+    pivot = node.left
+    node.left = pivot.right
+    pivot.right = node
+    _fix_height(node)
+    _fix_height(pivot)
+    return pivot
+
+
+def _rotate_left(node):
+    pivot = node.right
+    node.right = pivot.left
+    pivot.left = node
+    _fix_height(node)
+    _fix_height(pivot)
+    return pivot
+
+
+def _rebalance(node):
+    """Restore the AVL invariant at node after one of its subtrees changed height by one."""
+    _fix_height(node)
+    balance = _height(node.left) - _height(node.right)
+    if balance > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if balance < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+def _avl_insert(root, node):
+    if root is None:
+        return node
+    if node.rating < root.rating:
+        root.left = _avl_insert(root.left, node)
+    else:
+        root.right = _avl_insert(root.right, node)
+    return _rebalance(root)
+
+
+def _avl_delete_min(root):
+    if root.left is None:
+        return root.right
+    root.left = _avl_delete_min(root.left)
+    return _rebalance(root)
+
+
+def _avl_delete(root, rating):
+    if rating < root.rating:
+        root.left = _avl_delete(root.left, rating)
+    elif rating > root.rating:
+        root.right = _avl_delete(root.right, rating)
+    else:
+        if root.left is None:
+            return root.right
+        if root.right is None:
+            return root.left
+        # Replace the node with its in-order successor (nodes are moved, not copied,
+        # because the bucket map points at them)
+        successor = root.right
+        while successor.left:
+            successor = successor.left
+        successor.right = _avl_delete_min(root.right)
+        successor.left = root.left
+        root = successor
+    return _rebalance(root)
 
-# Song Rating Tree using Binary Search Tree
-class SongRatingTree:
+
+def _build_balanced(nodes, lo, hi):
+    """Build a height-balanced tree from nodes[lo:hi], which are sorted by rating."""
+    if lo >= hi:
+        return None
+    middle = (lo + hi) // 2
+    node = nodes[middle]
+    node.left = _build_balanced(nodes, lo, middle)
+    node.right = _build_balanced(nodes, middle + 1, hi)
+    _fix_height(node)
+    return node
+
+
+# Song Rating Tree: AVL tree of rating buckets plus a HashMap for O(1) exact access
+# Published events (see subscribe): ("rate", song_id, rating), ("unrate", song_id, rating)
+# and ("reset", None, None) after a bulk load
+class SongRatingTree(EventSource):
     def __init__(self):
         """
-        Initialize the song rating BST.
+        Initialize the song rating index.
         Time Complexity: O(1)
         Space Complexity: O(1)
         """
-        self.root = None
-        self.song_id_to_node = {}  # HashMap to map song_id to (rating, song_index) for O(1) deletion
+        self.root = None             # AVL tree over the distinct ratings, for ordered queries
+        self.buckets = {}            # HashMap: rating -> RatingNode, for O(1) exact access
+        self.song_id_to_rating = {}  # HashMap: song_id -> rating, for O(1) deletion and updates
+        self.listeners = []  # Mutation event listeners
+
+    @staticmethod
+    def _check_rating(rating):
+        # 3 and 3.0 hash to the same bucket, so whole-number floats are stored as ints:
+        # every song in a bucket then reports the same rating, whichever came first
+        if isinstance(rating, bool) or not isinstance(rating, Real):
+            raise TypeError("Rating must be a number")
+        if math.isnan(rating):
+            raise ValueError("Rating must not be NaN")
+        if isinstance(rating, float) and rating.is_integer():
+            return int(rating)
+        return rating
 
     def insert_song(self, song_id, title, artist, duration, song_rating):
         """
-        Insert a song into the BST under the given rating bucket.
+        Insert a song into the bucket for its rating.
         Args:
             song_id (str): Unique identifier for the song
             title (str): Song title
             artist (str): Song artist
             duration (int): Song duration in seconds
-            song_rating (int): Rating from 1 to 5
-        Time Complexity: O(h) where h is tree height (O(log n) balanced, O(n) skewed)
-        Space Complexity: O(1) for node creation (excluding song data)
-        """
-        if song_rating < 1 or song_rating > 5:
-            raise ValueError("Rating must be between 1 and 5")
-
-        song_data = {"song_id": song_id, "title": title, "artist": artist, "duration": duration}
-        
-        # If tree is empty, create root
-        if not self.root:
-            self.root = RatingNode(song_rating)
-            self.root.songs.append(song_data)
-            self.song_id_to_node[song_id] = (song_rating, 0)
-            return
-
-        # Find or create the rating node
-        current = self.root
-        while current:
-            if song_rating == current.rating:
-                current.songs.append(song_data)
-                self.song_id_to_node[song_id] = (song_rating, len(current.songs) - 1)
-                return
-            elif song_rating < current.rating:
-                if current.left is None:
-                    current.left = RatingNode(song_rating)
-                    current.left.songs.append(song_data)
-                    self.song_id_to_node[song_id] = (song_rating, 0)
-                    return
-                current = current.left
-            else:
-                if current.right is None:
-                    current.right = RatingNode(song_rating)
-                    current.right.songs.append(song_data)
-                    self.song_id_to_node[song_id] = (song_rating, 0)
-                    return
-                current = current.right
+            song_rating (float): Any numeric rating, e.g. an averaged 4.37
+        Raises:
+            TypeError: If the rating is not a number
+            ValueError: If the rating is NaN
+        Time Complexity: O(1) average case for an existing rating value,
+        O(log r) for a new one (r distinct ratings)
+        Space Complexity: O(1) per song
+        Note: Re-inserting an existing song_id replaces its previous entry; whole-number
+        float ratings (3.0) are stored as ints (3), since they share a bucket
+        """
+        song_rating = self._check_rating(song_rating)
+        if song_id in self.song_id_to_rating:
+            self.delete_song(song_id)
+
+        song_data = {"song_id": song_id, "title": intern_text(title), "artist": intern_text(artist), "duration": duration}
+        self._add(song_id, song_data, song_rating)
+
+    def _add(self, song_id, song_data, song_rating):
+        node = self.buckets.get(song_rating)
+        if node is None:
+            node = self.buckets[song_rating] = RatingNode(song_rating)
+            self.root = _avl_insert(self.root, node)
+        node.songs[song_id] = song_data
+        self.song_id_to_rating[song_id] = song_rating
+        if self.listeners:
+            self._notify("rate", song_id, song_rating)
+
+    def _remove(self, song_id):
+        rating = self.song_id_to_rating.pop(song_id)
+        node = self.buckets[rating]
+        song_data = node.songs.pop(song_id)
+        if not node.songs:
+            del self.buckets[rating]
+            self.root = _avl_delete(self.root, rating)
+        if self.listeners:
+            self._notify("unrate", song_id, rating)
+        return song_data
+
+    def load_songs(self, songs, intern_strings=True):
+        """
+        Replace the contents of the tree with many rated songs at once (e.g. from a snapshot).
+        Args:
+            songs (iterable): (song_id, title, artist, duration, rating) tuples
+            intern_strings (bool): Intern titles/artists; callers passing already
+                deduplicated strings (e.g. a snapshot's string table) can skip it
+        Raises:
+            TypeError: If a rating is not a number
+            ValueError: If a rating is NaN
+        Time Complexity: O(k + r log r) for k songs and r distinct ratings; the tree is
+        built balanced in one pass instead of by r AVL insertions
+        Space Complexity: O(k)
+        """
+        buckets = {}
+        song_id_to_rating = {}
+        for song_id, title, artist, duration, rating in songs:
+            node = buckets.get(rating)
+            if node is None:
+                rating = self._check_rating(rating)
+                node = buckets[rating] = RatingNode(rating)
+            if song_id in song_id_to_rating:
+                del buckets[song_id_to_rating[song_id]].songs[song_id]
+            if intern_strings:
+                title = intern_text(title)
+                artist = intern_text(artist)
+            node.songs[song_id] = {"song_id": song_id, "title": title, "artist": artist, "duration": duration}
+            song_id_to_rating[song_id] = node.rating
+        nodes = sorted((node for node in buckets.values() if node.songs), key=lambda node: node.rating)
+        self.buckets = {node.rating: node for node in nodes}
+        self.song_id_to_rating = song_id_to_rating
+        self.root = _build_balanced(nodes, 0, len(nodes))
+        if self.listeners:
+            self._notify("reset", None, None)
 
     def search_by_rating(self, rating):
         """
-        Return all songs with the specified rating.
+        Return all songs with the specified rating, in insertion order.
         Args:
-            rating (int): Rating to search for (1 to 5)
+            rating (float): Rating to search for
         Returns:
             list: List of song dictionaries with the given rating
-        Time Complexity: O(h) where h is tree height (O(log n) balanced, O(n) skewed)
-        Space Complexity: O(1) excluding the output list
-        """
-        if rating < 1 or rating > 5:
-            raise ValueError("Rating must be between 1 and 5")
-
-        current = self.root
-        while current:
-            if rating == current.rating:
-                return current.songs
-            elif rating < current.rating:
-                current = current.left
-            else:
-                current = current.right
-        return []
+        Time Complexity: O(1) to find the bucket, O(k) to list its k songs
+        Space Complexity: O(k) for the output list
+        """
+        self._check_rating(rating)
+        node = self.buckets.get(rating)
+        return list(node.songs.values()) if node else []
 
-    def delete_song(self, song_id):
+    def iter_by_rating(self, lo=None, hi=None, descending=False):
         """
-        Delete a song by its song_id from the BST.
+        Lazily yield (rating, song) pairs in rating order, optionally limited to lo..hi.
+        Songs sharing a rating come in insertion order.
         Args:
-            song_id (str): Unique identifier of the song to delete
+            lo (float): Lowest rating to include, or None for no lower bound
+            hi (float): Highest rating to include, or None for no upper bound
+            descending (bool): If True, yield the highest ratings first
+        Time Complexity: O(log r) to reach the first bucket, then O(1) amortized per song
+        Space Complexity: O(log r) for the traversal stack
+        """
+        stack = []
+        node = self.root
+        while stack or node:
+            # Walk down towards the first rating in range, pruning subtrees outside it
+            while node:
+                if not descending:
+                    if lo is not None and node.rating < lo:
+                        node = node.right
+                        continue
+                    stack.append(node)
+                    node = node.left
+                else:
+                    if hi is not None and node.rating > hi:
+                        node = node.left
+                        continue
+                    stack.append(node)
+                    node = node.right
+            if not stack:
+                return
+            node = stack.pop()
+            if not descending and hi is not None and node.rating > hi:
+                return
+            if descending and lo is not None and node.rating < lo:
+                return
+            for song in node.songs.values():
+                yield node.rating, song
+            node = node.left if descending else node.right
+
+    def search_by_rating_range(self, lo, hi):
+        """
+        Return all songs with lo <= rating <= hi, lowest rating first.
+        Args:
+            lo (float): Lowest rating to include
+            hi (float): Highest rating to include
         Returns:
-            bool: True if deletion was successful, False if song_id not found
-        Time Complexity: O(h) for finding the rating node, O(1) for removing song from list
+            list: List of song dictionaries
+        Time Complexity: O(log r + k) for k matching songs
+        Space Complexity: O(k) for the output list
+        """
+        self._check_rating(lo)
+        self._check_rating(hi)
+        return [song for _, song in self.iter_by_rating(lo, hi)]
+
+    def top_n(self, n):
+        """
+        Return the n highest-rated songs, highest first.
+        Args:
+            n (int): Number of songs to return
+        Returns:
+            list: List of (rating, song dictionary) pairs
+        Time Complexity: O(log r + n)
+        Space Complexity: O(n) for the output list
+        """
+        result = []
+        if n <= 0:
+            return result
+        for pair in self.iter_by_rating(descending=True):
+            result.append(pair)
+            if len(result) == n:
+                break
+        return result
+
+    def get_rating(self, song_id):
+        """
+        Return the rating of a song.
+        Args:
+            song_id (str): Unique identifier of the song
+        Returns:
+            int: The song's rating, or None if it is not rated
+        Time Complexity: O(1) average case
         Space Complexity: O(1)
-        Note: Simplified deletion; removes empty buckets but does not rebalance the BST
         """
-        if song_id not in self.song_id_to_node:
+        return self.song_id_to_rating.get(song_id)
+
+    def update_rating(self, song_id, new_rating):
+        """
+        Move a song to a different rating bucket.
+        Args:
+            song_id (str): Unique identifier of the song
+            new_rating (float): New rating
+        Returns:
+            bool: True if the song was found and updated, False if song_id not found
+        Raises:
+            TypeError: If the rating is not a number
+            ValueError: If the rating is NaN
+        Time Complexity: O(1) average case, O(log r) if a rating value appears or disappears
+        Space Complexity: O(1)
+        """
+        new_rating = self._check_rating(new_rating)
+        if song_id not in self.song_id_to_rating:
             return False
+        if self.song_id_to_rating[song_id] != new_rating:
+            self._add(song_id, self._remove(song_id), new_rating)
+        return True
 
-        rating, song_index = self.song_id_to_node[song_id]
-        current = self.root
-        while current:
-            if rating == current.rating:
-                if song_index >= len(current.songs):
-                    return False
-                # Remove the song from the bucket
-                current.songs.pop(song_index)
-                del self.song_id_to_node[song_id]
-                # If the bucket is empty, remove the node
-                if not current.songs:
-                    self._remove_empty_node(current, rating)
-                return True
-            elif rating < current.rating:
-                current = current.left
-            else:
-                current = current.right
-        return False
-
-    def _remove_empty_node(self, node, rating):
-        """
-        Remove an empty rating node from the BST.
+    def count_by_rating(self):
+        """
+        Return the number of songs in every non-empty rating bucket.
+        Returns:
+            dict: Rating -> song count
+        Time Complexity: O(b) for b rating buckets
+        Space Complexity: O(b) for the output
+        """
+        return {rating: len(node.songs) for rating, node in self.buckets.items()}
+
+    def delete_song(self, song_id):
+        """
+        Delete a song by its song_id.
         Args:
-            node: The RatingNode to remove
-            rating: The rating of the node
-        Time Complexity: O(h) to find parent
+            song_id (str): Unique identifier of the song to delete
+        Returns:
+            bool: True if deletion was successful, False if song_id not found
+        Time Complexity: O(1) average case; dropping an emptied bucket is O(log r)
         Space Complexity: O(1)
-        Note: Simplified removal; does not fully rebalance the BST
-        """
-        if not self.root or node.songs:
-            return
-
-        if node == self.root:
-            self.root = None
-            return
-
-        # Find parent
-        parent = None
-        current = self.root
-        while current and current.rating != rating:
-            parent = current
-            if rating < current.rating:
-                current = current.left
-            else:
-                current = current.right
-
-        if not current:
-            return
-
-        # Remove reference from parent
-        if parent.left == current:
-            parent.left = None
-        else:
-            parent.right = None
\ No newline at end of file
+        Note: Buckets are keyed by song_id, so deleting one song never shifts or
+        invalidates the position of another
+        """
+        if song_id not in self.song_id_to_rating:
+            return False
+        self._remove(song_id)
+        return True
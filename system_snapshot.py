@@ -2,6 +2,45 @@ from playlist_engine import PlaylistEngine
 from song_rating_tree import SongRatingTree
 from playback_history import PlaybackHistory
 from playlist_sorter import PlaylistSorter
+from live_stats import LiveStats
+from song_node import SongNode
+from snapshot_format import StringTable, write_columns, read_columns
+from array import array
+import gc
+import sys
+
+ID_NONE, ID_INT, ID_STR = 0, 1, 2  # Song handle kinds in snapshot id columns
+
+
+def _encode_ids(song_ids, table):
+    """Split handles into a kind column and an int64 value column (strings go to the table)."""
+    try:
+        values = array("q", song_ids)  # Common case: every handle is an allocated int
+        return array("B", bytes([ID_INT]) * len(values)), values
+    except (TypeError, OverflowError):
+        pass
+    kinds = array("B")
+    values = array("q")
+    for song_id in song_ids:
+        if song_id is None:
+            kinds.append(ID_NONE)
+            values.append(0)
+        elif type(song_id) is int:
+            kinds.append(ID_INT)
+            values.append(song_id)
+        elif type(song_id) is str:
+            kinds.append(ID_STR)
+            values.append(table.add(song_id))
+        else:
+            raise TypeError(f"Cannot save song handle {song_id!r}: only int and str handles are supported")
+    return kinds, values
+
+
+def _decode_ids(kinds, values, strings):
+    if kinds.count(ID_INT) == len(kinds):
+        return values  # Common case: every handle is an allocated int
+    return [value if kind == ID_INT else strings[value] if kind == ID_STR else None
+            for kind, value in zip(kinds, values)]
 
 # System Snapshot for generating live playlist statistics
 class SystemSnapshot:
@@ -13,13 +52,14 @@ class SystemSnapshot:
             song_rating_tree: Instance of SongRatingTree
             playback_history: Instance of PlaybackHistory
             playlist_sorter: Instance of PlaylistSorter
-        Time Complexity: O(1)
-        Space Complexity: O(1)
+        Time Complexity: O(n) one-off seeding of the LiveStats aggregator
+        Space Complexity: O(n) for the aggregator's duration index
         """
         self.playlist_engine = playlist_engine
         self.song_rating_tree = song_rating_tree
         self.playback_history = playback_history
         self.playlist_sorter = playlist_sorter
+        self.live_stats = LiveStats(playlist_engine, playback_history, song_rating_tree)
 
     def export_snapshot(self):
         """
@@ -27,46 +67,148 @@ class SystemSnapshot:
         and song count by rating.
         Returns:
             dict: Snapshot containing:
-                - top_5_longest: List of top 5 songs by duration (descending)
+                - top_5_longest: List of top 5 songs by duration (descending), ties in
+                  playlist order; each has its playlist position as added_order
                 - recent_plays: List of recently played songs (up to 5)
-                - rating_counts: Dict of rating (1-5) to song count
-        Time Complexity: O(n log n) for sorting, O(h) for BST traversal, O(n) for history
-        Space Complexity: O(n) for storing sorted songs and output
+                - rating_counts: Dict of rating to song count (1-5 always present)
+        Time Complexity: O(t log n) for the t songs tied with the 5 longest (O(n) to
+        find their positions without an index), independent of history and tree size;
+        the LiveStats aggregator is kept current by mutation events
+        Space Complexity: O(1) for the output
         """
-        snapshot = {
-            "top_5_longest": [],
-            "recent_plays": [],
-            "rating_counts": {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        stats = self.live_stats
+        rating_counts = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        rating_counts.update(stats.rating_counts)
+        return {
+            "top_5_longest": [
+                {"title": node.title, "artist": node.artist, "duration": node.duration,
+                 "added_order": position}
+                for node, position in stats.top_longest(5)
+            ],
+            "recent_plays": stats.latest_plays(),
+            "rating_counts": rating_counts
         }
 
-        # Extract songs from playlist, respecting reversed state
-        songs = []
-        current = self.playlist_engine.head
-        index = 0
-        while current:
-            songs.append({
-                "title": current.title,
-                "artist": current.artist,
-                "duration": current.duration,
-                "added_order": index
-            })
-            current = current.next if not self.playlist_engine.reversed else current.prev
-            index += 1
-
-        # Sort by duration (descending) using Merge Sort
-        sorted_songs = self.playlist_sorter.merge_sort(songs, key="duration", reverse=True)
-        snapshot["top_5_longest"] = sorted_songs[:5]
-
-        # Get up to 5 most recent plays (most recent first)
-        snapshot["recent_plays"] = self.playback_history.get_history()[-5:][::-1]
-
-        # Traverse BST to count songs per rating
-        def traverse_bst(node):
-            if not node:
-                return
-            snapshot["rating_counts"][node.rating] = len(node.songs)
-            traverse_bst(node.left)
-            traverse_bst(node.right)
-
-        traverse_bst(self.song_rating_tree.root)
-        return snapshot
\ No newline at end of file
+    def save(self, path, song_lookup=None, pinned_songs=None, meta=None):
+        """
+        Persist the playlist order, rating buckets and (optionally) the lookup maps and
+        pins to a versioned, checksummed columnar file (see snapshot_format.py).
+        Args:
+            path (str): Destination file
+            song_lookup: Optional SongLookup to include
+            pinned_songs: Optional PinnedSongs to include
+            meta (dict): Optional small integers to store alongside (returned by load)
+        Raises:
+            TypeError: If a song handle is neither int nor str
+            ValueError: If a string contains a NUL character
+        Time Complexity: O(n + m + r) for playlist, lookup and rated songs
+        Space Complexity: O(n + m + r) for the column arrays
+        Note: Playback history is not included; persist it with a PlayLog
+        """
+        write_columns(path, *self.collect_columns(song_lookup, pinned_songs, meta))
+
+    def collect_columns(self, song_lookup=None, pinned_songs=None, meta=None):
+        """
+        Capture the state save() writes, as (string table, columns), without any I/O.
+        The result no longer references the live structures, so it can be written out
+        later or from another thread (see MutationJournal.compact).
+        Time Complexity: O(n + m + r)
+        Space Complexity: O(n + m + r)
+        """
+        table = StringTable()
+        add_all = table.add_all
+        columns = {}
+
+        nodes = list(self.playlist_engine)
+        columns["playlist_title"] = add_all([node.title for node in nodes])
+        columns["playlist_artist"] = add_all([node.artist for node in nodes])
+        columns["playlist_duration"] = array("q", [node.duration for node in nodes])
+        columns["playlist_id_kind"], columns["playlist_id"] = _encode_ids([node.song_id for node in nodes], table)
+        del nodes
+
+        songs = list(song_lookup.song_id_map.values()) if song_lookup is not None else []
+        columns["lookup_title"] = add_all([song["title"] for song in songs])
+        columns["lookup_artist"] = add_all([song["artist"] for song in songs])
+        columns["lookup_duration"] = array("q", [song["duration"] for song in songs])
+        columns["lookup_id_kind"], columns["lookup_id"] = _encode_ids([song["song_id"] for song in songs], table)
+        next_id = getattr(song_lookup.id_allocator, "next_id", 0) if song_lookup is not None else 0
+        columns["lookup_next_id"] = array("q", [next_id])
+
+        # Buckets in rating order (sorting the r distinct ratings beats walking the tree per song)
+        buckets = self.song_rating_tree.buckets
+        rated = []
+        ratings = array("d")
+        rating_is_int = array("B")
+        for rating in sorted(buckets):
+            bucket = buckets[rating].songs
+            rated.extend(bucket.values())
+            ratings.extend([rating] * len(bucket))
+            rating_is_int.extend([type(rating) is int] * len(bucket))
+        columns["rating_title"] = add_all([song["title"] for song in rated])
+        columns["rating_artist"] = add_all([song["artist"] for song in rated])
+        columns["rating_duration"] = array("q", [song["duration"] for song in rated])
+        columns["rating_id_kind"], columns["rating_id"] = _encode_ids([song["song_id"] for song in rated], table)
+        columns["rating_value"] = ratings
+        columns["rating_is_int"] = rating_is_int
+
+        pins = list(pinned_songs.pinned_indices.items()) if pinned_songs is not None else []
+        columns["pin_id_kind"], columns["pin_id"] = _encode_ids([song_id for song_id, _ in pins], table)
+        columns["pin_index"] = array("q", [index for _, index in pins])
+
+        for name, value in (meta or {}).items():
+            columns["meta_" + name] = array("q", [value])
+        return table.strings, columns
+
+    def load(self, path, song_lookup=None, pinned_songs=None, verify=True):
+        """
+        Replace the playlist, rating tree and (optionally) lookup maps and pins with the
+        contents of a file written by save().
+        Args:
+            path (str): Snapshot file
+            song_lookup: Optional SongLookup to restore into
+            pinned_songs: Optional PinnedSongs to restore into
+            verify (bool): Check the file's crc32 before loading
+        Returns:
+            dict: The meta values passed to save()
+        Raises:
+            ValueError: If the file is not a valid snapshot of a supported version
+        Time Complexity: O(n + m + r); columns are cast straight from the memory-mapped
+        file, and each structure is rebuilt in one bulk pass with a single "reset" event
+        Space Complexity: O(n + m + r)
+        """
+        strings, columns = read_columns(path, verify)
+        strings = [sys.intern(text) for text in strings]
+        text = strings.__getitem__
+
+        # Millions of new objects would otherwise trigger repeated full GC passes
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            ids = _decode_ids(columns["playlist_id_kind"], columns["playlist_id"], strings)
+            nodes = list(map(SongNode, map(text, columns["playlist_title"]), map(text, columns["playlist_artist"]),
+                             columns["playlist_duration"], ids))
+            self.playlist_engine.relink(nodes)
+            del nodes
+
+            if song_lookup is not None:
+                ids = _decode_ids(columns["lookup_id_kind"], columns["lookup_id"], strings)
+                song_lookup.load_songs(zip(ids, map(text, columns["lookup_title"]),
+                                           map(text, columns["lookup_artist"]), columns["lookup_duration"]),
+                                       intern_strings=False)
+                song_lookup.id_allocator.observe(columns["lookup_next_id"][0] - 1)
+
+            ids = _decode_ids(columns["rating_id_kind"], columns["rating_id"], strings)
+            ratings = [int(rating) if is_int else rating
+                       for rating, is_int in zip(columns["rating_value"], columns["rating_is_int"])]
+            self.song_rating_tree.load_songs(zip(ids, map(text, columns["rating_title"]),
+                                                 map(text, columns["rating_artist"]),
+                                                 columns["rating_duration"], ratings),
+                                             intern_strings=False)
+
+            if pinned_songs is not None:
+                ids = _decode_ids(columns["pin_id_kind"], columns["pin_id"], strings)
+                pinned_songs.load_pins(zip(ids, columns["pin_index"]))
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return {name[len("meta_"):]: values[0] for name, values in columns.items() if name.startswith("meta_")}
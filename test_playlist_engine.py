@@ -1,3 +1,4 @@
+import random
 from playlist_engine import PlaylistEngine
 
 def test_playlist_engine():
@@ -83,5 +84,91 @@ def test_playlist_engine():
     
     print("\n=== PlaylistEngine Testing Complete ===")
 
+def logical_titles(playlist):
+    """Collect titles in logical order, respecting the reversed flag."""
+    titles = []
+    current = playlist.tail if playlist.reversed else playlist.head
+    while current:
+        titles.append(current.title)
+        current = current.prev if playlist.reversed else current.next
+    return titles
+
+def test_indexed_playlist_engine():
+    """
+    Test the indexed mode of PlaylistEngine against the plain linked list.
+    Runs the same random add/delete/move/reverse sequence on both and
+    checks that they always agree.
+    """
+    print("=== Testing indexed PlaylistEngine ===")
+    rng = random.Random(42)
+    plain = PlaylistEngine()
+    indexed = PlaylistEngine(indexed=True)
+    counter = 0
+    for _ in range(2000):
+        op = rng.random()
+        if op < 0.4 or plain.size < 2:
+            counter += 1
+            for playlist in (plain, indexed):
+                playlist.add_song(f"Song {counter}", "Artist", counter)
+        elif op < 0.6:
+            index = rng.randrange(plain.size)
+            plain.delete_song(index)
+            indexed.delete_song(index)
+        elif op < 0.95:
+            from_index = rng.randrange(plain.size)
+            to_index = rng.randrange(plain.size)
+            plain.move_song(from_index, to_index)
+            indexed.move_song(from_index, to_index)
+        else:
+            plain.reverse_playlist()
+            indexed.reverse_playlist()
+        assert indexed.size == plain.size == len(indexed.index)
+    assert logical_titles(indexed) == logical_titles(plain)
+    print(f"Indexed and plain playlists agree after 2000 operations ({plain.size} songs)")
+
+    # Switching an existing playlist to indexed mode keeps its order
+    plain.enable_index()
+    plain.move_song(0, plain.size - 1)
+    indexed.move_song(0, indexed.size - 1)
+    assert logical_titles(indexed) == logical_titles(plain)
+    print("enable_index() on an existing playlist keeps positions consistent")
+
+    print("\n=== Indexed PlaylistEngine Testing Complete ===")
+
+def test_playlist_iteration():
+    """
+    Test the iteration protocol: __iter__/__reversed__/__len__, lazy slices and
+    windows, in both normal and reversed states, plus in-place relinking.
+    """
+    print("=== Testing PlaylistEngine iteration ===")
+    for indexed in (False, True):
+        playlist = PlaylistEngine(indexed=indexed)
+        for name in "ABCDEF":
+            playlist.add_song(f"Song {name}", "Artist", 100)
+        playlist.reverse_playlist()
+        titles = [node.title[-1] for node in playlist]
+        print(f"indexed={indexed} reversed order: {''.join(titles)}")
+        assert titles == list("FEDCBA")
+        assert [title[-1] for title in logical_titles(playlist)] == titles
+        assert [node.title[-1] for node in reversed(playlist)] == list("ABCDEF")
+        assert len(playlist) == 6
+        assert [node.title[-1] for node in playlist.iter_slice(1, 4)] == list("EDC")
+        assert [node.title[-1] for node in playlist.iter_slice(-2)] == list("BA")
+        windows = ["".join(node.title[-1] for node in window) for window in playlist.iter_windows(3, step=2)]
+        print("Windows of 3, step 2:", windows)
+        assert windows == ["FED", "DCB"]
+
+        # Relinking reorders the same node objects and keeps the reversed flag
+        nodes = list(playlist)
+        playlist.relink(nodes[::-1])
+        assert playlist.reversed and [node.title[-1] for node in playlist] == list("ABCDEF")
+        assert all(a is b for a, b in zip(playlist, nodes[::-1]))
+        playlist.delete_song(0)
+        assert logical_titles(playlist) == ["Song B", "Song C", "Song D", "Song E", "Song F"]
+
+    print("\n=== PlaylistEngine Iteration Testing Complete ===")
+
 if __name__ == "__main__":
-    test_playlist_engine()
\ No newline at end of file
+    test_playlist_engine()
+    test_indexed_playlist_engine()
+    test_playlist_iteration()
\ No newline at end of file
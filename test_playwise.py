@@ -1,11 +1,27 @@
 from playlist_engine import PlaylistEngine
 from playback_history import PlaybackHistory
+from play_log import PlayLog
 from song_rating_tree import SongRatingTree
 from song_lookup import SongLookup
+from id_allocator import SnowflakeIdAllocator
 from playlist_sorter import PlaylistSorter
 from system_snapshot import SystemSnapshot
 from pinned_songs import PinnedSongs
 from playlist_summary import PlaylistSummary
+from playlist_loader import load_csv, load_jsonl
+from journal import MutationJournal
+from versioned_playlist import VersionedPlaylist
+from song_node import SongNode
+from song_catalog import SongCatalog
+from concurrent_playlist import ConcurrentPlaylist
+from playwise_server import PlayWiseServer, PlayWiseClient
+from parallel_analytics import ParallelAnalytics, HyperLogLog
+import asyncio
+import json
+import os
+import random
+import tempfile
+import threading
 
 def test_playwise():
     """
@@ -127,5 +143,1029 @@ def test_playwise():
     print("Total Playtime:", summary["total_playtime"], "seconds")
     print("Artist Count:", summary["artist_count"])
 
+def test_song_handles():
+    """
+    Test stable song handles shared by SongLookup, PlaylistEngine and PinnedSongs.
+    Duplicate titles must resolve to the exact node that was added.
+    """
+    print("Testing song handles:")
+    playlist = PlaylistEngine(indexed=True)
+    lookup = SongLookup(playlist)
+    pinned = PinnedSongs(playlist)
+
+    playlist.add_song("Intro", "Artist I", 60, song_id="intro")
+    playlist.add_song("Echo", "Artist A", 100, song_id="echo_a")
+    playlist.add_song("Echo", "Artist B", 200, song_id="echo_b")
+    playlist.add_song("Outro", "Artist O", 90, song_id="outro")
+    print("Playlist with duplicate titles:")
+    playlist.print_playlist()
+
+    print("locate('echo_b'):", playlist.locate("echo_b"))
+    assert playlist.locate("echo_b") == 2
+    playlist.reverse_playlist()
+    assert playlist.locate("echo_b") == 1
+    playlist.reverse_playlist()
+
+    # Pinning by handle picks the second "Echo", not the first one by title
+    pinned.pin_song("echo_b", "Echo", 0)
+    print("After pinning echo_b to index 0:")
+    playlist.print_playlist()
+    assert playlist.head.artist == "Artist B"
+
+    playlist.move_by_id("intro", 3)
+    assert playlist.locate("intro") == 3
+    assert playlist.delete_by_id("echo_a")
+    assert not playlist.delete_by_id("echo_a")
+    assert playlist.get_by_id("echo_a") is None
+    print("After moving intro to the end and deleting echo_a:")
+    playlist.print_playlist()
+
+    # sync_delete removes exactly the song created by sync_add
+    song_id = lookup.sync_add("Echo", "Artist C", 300)
+    assert lookup.sync_delete(song_id)
+    assert playlist.size == 3 and playlist.tail.title == "Intro"
+    print("Playlist after sync_add/sync_delete of a duplicate title:")
+    playlist.print_playlist()
+
+    # A song whose node is gone never takes down another song with the same title
+    other = PlaylistEngine()
+    other_lookup = SongLookup(other)
+    first = other_lookup.sync_add("Same", "X", 100)
+    second = other_lookup.sync_add("Same", "Y", 200)
+    other.delete_song(0)
+    assert not other_lookup.sync_delete(first)
+    assert other_lookup.lookup_by_id(first) is None and other.locate(second) == 0
+    other.add_song("Same", "Y", 200)  # Added directly, without a handle
+    other_lookup.add_song("direct", "Same", "Y", 200)
+    assert other_lookup.sync_delete("direct") and other.size == 1 and other.head.song_id == second
+
+def test_bulk_loading():
+    """
+    Test PlaylistEngine.extend and the streaming CSV/JSONL loaders, including
+    extending a reversed playlist and filling SongLookup/SongRatingTree in one pass.
+    """
+    print("Testing bulk loading:")
+    playlist = PlaylistEngine(indexed=True)
+    playlist.add_song("Existing", "Artist", 100)
+    playlist.reverse_playlist()
+    added = playlist.extend([("Bulk 1", "Artist", 110), ("Bulk 2", "Artist", 120, "bulk2")])
+    print(f"Extended reversed playlist with {added} songs:")
+    playlist.print_playlist()
+    assert playlist.size == 3 and playlist.tail.title == "Existing" and playlist.head.title == "Bulk 2"
+    assert playlist.locate("bulk2") == 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "songs.csv")
+        with open(csv_path, "w", encoding="utf-8") as handle:
+            handle.write("song_id,title,artist,duration,rating\n")
+            for i in range(25):
+                handle.write(f"csv{i},CSV Song {i},CSV Artist {i % 3},{100 + i},{1 + i % 5}\n")
+        jsonl_path = os.path.join(directory, "songs.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as handle:
+            for i in range(10):
+                handle.write(json.dumps({"song_id": f"json{i}", "title": f"JSON Song {i}",
+                                         "artist": "JSON Artist", "duration": 200 + i}) + "\n")
+
+        loaded = PlaylistEngine()
+        lookup = SongLookup(loaded)
+        rating_tree = SongRatingTree()
+        count = load_csv(csv_path, loaded, lookup, rating_tree, chunk_size=7)
+        count += load_jsonl(jsonl_path, loaded, lookup, chunk_size=4)
+    print(f"Loaded {count} songs from CSV and JSONL")
+    assert count == loaded.size == 35
+    assert lookup.lookup_by_id("csv3")["title"] == "CSV Song 3"
+    assert len(rating_tree.search_by_rating(5)) == 5
+    assert loaded.locate("json9") == 34
+    assert lookup.sync_delete("csv0") and loaded.head.title == "CSV Song 1"
+
+def test_in_place_sort():
+    """
+    Test that PlaylistSorter.sort_playlist relinks the existing nodes, is stable,
+    and agrees with sort_playlist_builtin in both normal and reversed states.
+    """
+    print("Testing in-place merge sort:")
+    import random
+    rng = random.Random(7)
+    rows = [(f"Song {rng.randrange(20)}", f"Artist {i}", rng.randrange(100, 110)) for i in range(300)]
+    for reversed_state in (False, True):
+        for criterion in ("title", "duration", "recently_added"):
+            for reverse in (False, True):
+                merged, builtin = PlaylistEngine(indexed=True), PlaylistEngine()
+                for playlist in (merged, builtin):
+                    playlist.extend(rows)
+                    if reversed_state:
+                        playlist.reverse_playlist()
+                nodes_before = set(map(id, merged))
+                PlaylistSorter(merged).sort_playlist(criterion, reverse)
+                PlaylistSorter(builtin).sort_playlist_builtin(criterion, reverse)
+                assert [n.artist for n in merged] == [n.artist for n in builtin]
+                assert set(map(id, merged)) == nodes_before
+                assert [n.artist for n in merged.iter_slice(10, 20)] == [n.artist for n in builtin][10:20]
+    print("sort_playlist matches sort_playlist_builtin for every criterion and state")
+
+def test_multi_key_sort():
+    """
+    Test composite sort specs with casefold collation and the per-spec permutation cache.
+    """
+    print("Testing multi-key sort:")
+    playlist = PlaylistEngine()
+    sorter = PlaylistSorter(playlist)
+    playlist.extend([
+        ("beta", "queen", 200), ("Alpha", "Queen", 300), ("gamma", "abba", 200),
+        ("alpha", "ABBA", 200), ("Delta", "queen", 300), ("epsilon", "Abba", 100),
+    ])
+    spec = [("artist", "asc"), ("duration", "desc"), "title"]
+    sorter.sort_by(spec)
+    print("Sorted by artist, duration desc, title:")
+    playlist.print_playlist()
+    expected = ["alpha", "gamma", "epsilon", "Alpha", "Delta", "beta"]
+    assert [node.title for node in playlist] == expected
+
+    # Unchanged playlist: the cached result is used without touching the list
+    version = playlist.version
+    sorter.sort_by(spec)
+    assert playlist.version == version
+
+    # Only the order changed: the playlist is sorted again from its current order
+    sorter.sort_by([("title", "desc")], collation=None)
+    assert [node.title for node in playlist][0] == "gamma"
+    sorter.sort_by(spec)
+    assert [node.title for node in playlist] == expected
+
+    # Specs with recently_added depend on the current order, so a reorder is not a cache hit
+    recent = PlaylistEngine()
+    recent.extend([("A", "x", 1), ("B", "y", 1), ("C", "x", 1), ("D", "y", 1)])
+    recent_sorter = PlaylistSorter(recent)
+    recent_sorter.sort_by(["artist", "recently_added"])
+    recent.move_song(0, 1)
+    fresh = PlaylistEngine()
+    fresh.extend((node.title, node.artist, node.duration) for node in recent)
+    PlaylistSorter(fresh).sort_by(["artist", "recently_added"])
+    recent_sorter.sort_by(["artist", "recently_added"])
+    assert [node.title for node in recent] == [node.title for node in fresh]
+
+    # Membership changed: a full sort runs again
+    playlist.add_song("Zeta", "ABBA", 400)
+    sorter.sort_by(spec)
+    assert [node.title for node in playlist][0] == "Zeta"
+
+    try:
+        sorter.sort_by(["genre"])
+    except ValueError as e:
+        print(f"Expected error for invalid field: {e}")
+
+def test_incremental_summary():
+    """
+    Test PlaylistSummary's handle-keyed genre registry and incremental aggregates,
+    checked against a full recomputation with verify=True.
+    """
+    print("Testing incremental PlaylistSummary:")
+    playlist = PlaylistEngine()
+    lookup = SongLookup(playlist)
+    history = PlaybackHistory(playlist)
+    summary_gen = PlaylistSummary(playlist)
+
+    playlist.add_song("Same Title", "Band A", 100, song_id="rock1")
+    playlist.add_song("Same Title", "Band B", 200, song_id="jazz1")
+    summary_gen.register_genres({"rock1": "Rock", "jazz1": "Jazz", "later": "Pop"})
+    playlist.add_song("Later", "Band A", 50, song_id="later")
+    song_id = lookup.sync_add("Untagged", "Band C", 10)
+    summary = summary_gen.generate_summary(verify=True)
+    print("Summary:", summary)
+    assert summary["genre_distribution"] == {"Rock": 1, "Jazz": 1, "Pop": 1, "Unknown": 1}
+    assert summary["total_playtime"] == 360 and summary["artist_count"] == 3
+
+    summary_gen.register_genre(song_id, "Ambient")
+    lookup.sync_delete(song_id)
+    playlist.delete_by_id("rock1")
+    history.add_played_song("Replayed", "Band D", 40)
+    history.undo_last_play()
+    summary = summary_gen.generate_summary(verify=True)
+    print("After retagging, deletes and an undo:", summary)
+    assert summary["genre_distribution"] == {"Jazz": 1, "Pop": 1, "Unknown": 1}
+    assert summary["artist_count"] == 3
+
+    playlist.clear()
+    assert summary_gen.generate_summary(verify=True)["total_playtime"] == 0
+
+def test_rating_index():
+    """
+    Test SongRatingTree deletes and rating updates: deleting songs in any order must
+    remove exactly those songs and leave the remaining ones findable.
+    """
+    print("Testing rating index:")
+    import random
+    rating_tree = SongRatingTree()
+    for i in range(200):
+        rating_tree.insert_song(f"song{i}", f"Song {i}", "Artist", 100 + i, 1 + i % 5)
+    doomed = list(range(0, 200, 2))
+    random.Random(1).shuffle(doomed)
+    for i in doomed:
+        assert rating_tree.delete_song(f"song{i}")
+    assert not rating_tree.delete_song("song0")
+    for rating in range(1, 6):
+        songs = rating_tree.search_by_rating(rating)
+        assert [song["song_id"] for song in songs] == [f"song{i}" for i in range(1, 200, 2) if 1 + i % 5 == rating]
+    print("Counts after deleting every even song:", rating_tree.count_by_rating())
+
+    assert rating_tree.update_rating("song1", 5) and rating_tree.get_rating("song1") == 5
+    assert rating_tree.search_by_rating(5)[-1]["song_id"] == "song1"
+    assert not rating_tree.update_rating("missing", 3)
+    # Whole-number floats share the int's bucket and are stored as the int
+    rating_tree.insert_song("float", "Float", "Artist", 100, 3.0)
+    assert rating_tree.get_rating("float") == 3 and type(rating_tree.get_rating("float")) is int
+    assert rating_tree.update_rating("song1", 5.0) and type(rating_tree.get_rating("song1")) is int
+    assert rating_tree.search_by_rating(3.0)[-1]["song_id"] == "float"
+
+    # Fine-grained ratings inserted in sorted order must keep the tree balanced
+    fine = SongRatingTree()
+    for i in range(4096):
+        fine.insert_song(i, f"Song {i}", "Artist", 200, 1 + i / 1024)
+    assert fine.root.height <= 13  # A plain BST would be 4096 levels deep
+    in_range = fine.search_by_rating_range(2.0, 2.01)
+    assert [song["song_id"] for song in in_range] == list(range(1024, 1035))
+    top = fine.top_n(3)
+    print("Top 3 fine-grained ratings:", [(rating, song["title"]) for rating, song in top])
+    assert [song["song_id"] for _, song in top] == [4095, 4094, 4093]
+    for i in range(0, 4096, 2):
+        fine.delete_song(i)
+    ratings = [rating for rating, _ in fine.iter_by_rating()]
+    assert ratings == sorted(ratings) and len(ratings) == 2048
+    assert [rating for rating, _ in fine.iter_by_rating(lo=4.997, descending=True)] == [1 + 4095 / 1024, 1 + 4093 / 1024]
+    try:
+        fine.insert_song("bad", "Bad", "Artist", 1, "five")
+    except TypeError as e:
+        print(f"Expected error for a non-numeric rating: {e}")
+
+def test_search_index():
+    """
+    Test SongLookup prefix and typo-tolerant search, including index upkeep on
+    add_song/delete_song.
+    """
+    print("Testing search index:")
+    lookup = SongLookup(PlaylistEngine())
+    for song_id, title, artist in [("s1", "Bohemian Rhapsody", "Queen"),
+                                   ("s2", "Bohemian Like You", "The Dandy Warhols"),
+                                   ("s3", "Hotel California", "Eagles"),
+                                   ("s4", "Hey Jude", "The Beatles"),
+                                   ("s5", "Here Comes the Sun", "The Beatles")]:
+        lookup.add_song(song_id, title, artist, 200)
+
+    results = lookup.search_prefix("boh")
+    print("Prefix 'boh':", [song["title"] for song in results])
+    assert [song["song_id"] for song in results] == ["s2", "s1"]
+    assert [song["song_id"] for song in lookup.search_prefix("H", k=2)] == ["s5", "s4"]
+    assert [song["song_id"] for song in lookup.search_prefix("the b", field="artist")] == ["s4", "s5"]
+
+    results = lookup.search_fuzzy("bohemain rapsody")
+    print("Fuzzy 'bohemain rapsody':", [song["title"] for song in results])
+    assert results[0]["song_id"] == "s1"
+    assert lookup.search_fuzzy("hotle califronia")[0]["song_id"] == "s3"
+    assert lookup.search_fuzzy("zzzz") == []
+
+    lookup.delete_song("s1")
+    assert [song["song_id"] for song in lookup.search_prefix("boh")] == ["s2"]
+    assert all(song["song_id"] != "s1" for song in lookup.search_fuzzy("bohemian rhapsody"))
+    # Updating a song re-indexes it under its new title
+    lookup.add_song("s2", "Like a Rolling Stone", "Bob Dylan", 360)
+    assert lookup.search_prefix("boh") == []
+    assert lookup.lookup_by_title("Bohemian Like You") == []
+    assert [song["song_id"] for song in lookup.search_prefix("like")] == ["s2"]
+    try:
+        lookup.search_prefix("x", field="album")
+    except ValueError as e:
+        print(f"Expected error for an unknown field: {e}")
+
+def test_id_allocation():
+    """
+    Test collision-free song_id allocation: duplicate titles added in the same second
+    get distinct IDs, batch adds match single adds, and snowflake IDs stay increasing.
+    """
+    print("Testing ID allocation:")
+    playlist = PlaylistEngine()
+    lookup = SongLookup(playlist)
+    first = lookup.sync_add("Same Title", "Artist", 100)
+    second = lookup.sync_add("Same Title", "Artist", 100)
+    batch = lookup.sync_add_many([("Same Title", "Artist", 100), ("Other", "Artist", 200)])
+    print("Allocated IDs:", first, second, batch)
+    assert [first, second] + batch == [1, 2, 3, 4]
+    assert playlist.size == 4 and playlist.locate(4) == 3
+    assert [song["song_id"] for song in lookup.lookup_by_title("Same Title")] == [1, 2, 3]
+    # Explicit IDs are never handed out again
+    lookup.add_song(10, "Manual", "Artist", 50)
+    assert lookup.generate_song_id() == 11
+    # Re-adding an ID moves it to its new title without leaving a repeat behind
+    lookup.add_song(2, "Renamed", "Artist", 100)
+    assert [song["song_id"] for song in lookup.lookup_by_title("Same Title")] == [1, 3]
+    # A batch that would reuse a handle the allocator never saw adds nothing
+    clashing = PlaylistEngine()
+    clashing_lookup = SongLookup(clashing)
+    clashing.add_song("Direct", "Artist", 100, song_id=2)
+    try:
+        clashing_lookup.sync_add_many([("A", "Artist", 1), ("B", "Artist", 2), ("C", "Artist", 3)])
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        print(f"Expected error for a clashing batch: {e}")
+    assert clashing.size == 1 and not clashing_lookup.song_id_map
+
+    ticks = iter([5, 5, 5, 4, 9])  # Repeated and backwards clock readings
+    snowflake = SnowflakeIdAllocator(worker_id=3, clock=lambda: SnowflakeIdAllocator.EPOCH_MS + next(ticks))
+    ids = snowflake.allocate_many(5)
+    assert ids == sorted(set(ids))
+    assert (ids[0] >> 12) & 1023 == 3 and ids[-1] >> 22 == 9
+    lookup = SongLookup(PlaylistEngine(), id_allocator=SnowflakeIdAllocator(worker_id=1))
+    assert len(set(lookup.sync_add_many([("Song", "Artist", 100)] * 5000))) == 5000
+    try:
+        SnowflakeIdAllocator(worker_id=1024)
+    except ValueError as e:
+        print(f"Expected error for a bad worker id: {e}")
+
+def test_bounded_history():
+    """
+    Test the ring-buffer PlaybackHistory: fixed capacity, newest-first recent views,
+    O(1) undo and spilling of evicted plays to disk.
+    """
+    print("Testing bounded playback history:")
+    playlist = PlaylistEngine()
+    with tempfile.TemporaryDirectory() as directory:
+        spill_path = os.path.join(directory, "history.jsonl")
+        history = PlaybackHistory(playlist, capacity=3, spill_path=spill_path)
+        for i in range(5):
+            history.add_played_song(f"Play {i}", "Artist", 100 + i)
+        recent = history.recent(2)
+        print("Two most recent plays:", [entry["title"] for entry in recent])
+        assert [entry["title"] for entry in recent] == ["Play 4", "Play 3"]
+        assert len(history.recent(10)) == 3 and recent[-1]["title"] == "Play 3"
+        assert [entry["title"] for entry in history.get_history()] == ["Play 2", "Play 3", "Play 4"]
+
+        assert history.undo_last_play()["title"] == "Play 4"
+        assert [entry["title"] for entry in recent] == ["Play 3", "Play 2"]  # Views are live
+        history.add_played_song("Play 5", "Artist", 105)
+        assert history.undo_last_play()["title"] == "Play 5"
+        assert history.undo_last_play()["title"] == "Play 3"
+        assert history.undo_last_play()["title"] == "Play 2"
+        assert history.undo_last_play() is None  # Evicted plays are not undoable
+        assert playlist.size == 4
+
+        history.close()
+        with open(spill_path, encoding="utf-8") as handle:
+            spilled = [json.loads(line)["title"] for line in handle]
+        print("Spilled plays:", spilled)
+        assert spilled == ["Play 0", "Play 1"] and history.spilled == 2
+    try:
+        PlaybackHistory(playlist, capacity=0)
+    except ValueError as e:
+        print(f"Expected error for a zero capacity: {e}")
+
+def test_play_log():
+    """
+    Test the binary play log: plays and undos survive a restart, replay honours undos
+    and capacity, and a torn trailing record is discarded.
+    """
+    print("Testing play log:")
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "plays.log")
+        playlist = PlaylistEngine()
+        lookup = SongLookup(playlist)
+        song_ids = lookup.sync_add_many([(f"Track {i}", "Artist", 100 + i) for i in range(6)])
+        history = PlaybackHistory(playlist, play_log=PlayLog(log_path, group_size=4), song_lookup=lookup)
+        for song_id in song_ids:
+            song = lookup.lookup_by_id(song_id)
+            history.add_played_song(song["title"], song["artist"], song["duration"], song_id=song_id)
+        history.undo_last_play()
+        history.undo_last_play()
+        history.add_played_song("Track 0", "Artist", 100, song_id=song_ids[0])
+        history.close()
+        with open(log_path, "ab") as handle:
+            handle.write(b"torn")  # Simulate a crash in the middle of a write
+
+        restored = PlaybackHistory(playlist, capacity=3, play_log=PlayLog(log_path), song_lookup=lookup)
+        titles = [entry["title"] for entry in restored.get_history()]
+        print("Restored history:", titles)
+        assert titles == ["Track 2", "Track 3", "Track 0"]
+        assert len(restored.play_log) == 9
+        assert restored.undo_last_play()["song_id"] == song_ids[0]
+        try:
+            restored.add_played_song("No handle", "Artist", 1)
+        except ValueError as e:
+            print(f"Expected error for a play without a handle: {e}")
+        restored.close()
+        reopened = PlayLog(log_path)
+        assert [entry[0] for entry in reopened.replay(10)] == song_ids[:4]
+        # Errors name the field that does not fit, not always the handle
+        for args, error, field in ((("x", 1), TypeError, "handle"), ((1, "1"), TypeError, "duration"),
+                                   ((1, 2 ** 40), ValueError, "duration"), ((1, 1, 1, 2.5), TypeError, "timestamp_ns")):
+            try:
+                reopened.append(*args)
+                assert False, f"Expected {error.__name__}"
+            except error as e:
+                assert field in str(e), e
+        reopened.close()
+
+def test_journal_recovery():
+    """
+    Test MutationJournal: mutations made after the last snapshot are recovered by
+    replaying the journal, across a background compaction and a torn tail.
+    """
+    print("Testing journal recovery:")
+
+    def build():
+        playlist = PlaylistEngine(indexed=True)
+        rating_tree = SongRatingTree()
+        system = SystemSnapshot(playlist, rating_tree, PlaybackHistory(playlist), PlaylistSorter(playlist))
+        return system, SongLookup(playlist), PinnedSongs(playlist)
+
+    def state(system, lookup, pinned):
+        return ([(node.title, node.artist, node.duration, node.song_id) for node in system.playlist_engine],
+                list(system.song_rating_tree.iter_by_rating()), lookup.song_id_map, pinned.pinned_indices)
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal_path = os.path.join(directory, "journal")
+        snapshot_path = os.path.join(directory, "state.pws")
+        system, lookup, pinned = build()
+        playlist, rating_tree = system.playlist_engine, system.song_rating_tree
+        assert MutationJournal.recover(journal_path, system, snapshot_path, lookup, pinned) == 0
+        journal = MutationJournal(journal_path, playlist, rating_tree, pinned, group_size=3)
+
+        song_ids = lookup.sync_add_many([(f"Song {i}", f"Artist {i % 3}", 100 + 10 * i) for i in range(6)])
+        playlist.add_song("Anonymous", "Nobody", 95)
+        rating_tree.insert_song(song_ids[0], "Song 0", "Artist 0", 100, 4)
+        rating_tree.insert_song(song_ids[1], "Song 1", "Artist 1", 110, 4.5)
+        journal.compact(system, snapshot_path, song_lookup=lookup)
+
+        rating_tree.update_rating(song_ids[0], 2)
+        playlist.move_song(6, 0)  # Anonymous song to the front
+        playlist.delete_song(0)   # ...and deleted by position
+        lookup.sync_delete(song_ids[2])
+        playlist.reverse_playlist()
+        pinned.pin_song(song_ids[5], "Song 5", 2)
+        PlaylistSorter(playlist).sort_playlist("duration")
+        journal.compact(system, snapshot_path, song_lookup=lookup)
+        playlist.add_song("Late", "Artist", 1, song_id="late")
+        lookup.add_song("late", "Late", "Artist", 1)
+        rating_tree.delete_song(song_ids[1])
+        journal.flush()
+        journal.wait()
+        with open(journal_path, "ab") as handle:
+            handle.write(b"\x07\x00")  # Torn frame header from a crash mid-write
+        expected = state(system, lookup, pinned)
+
+        # Restart: fresh structures, snapshot + journal replay
+        system, lookup, pinned = build()
+        replayed = MutationJournal.recover(journal_path, system, snapshot_path, lookup, pinned)
+        print(f"Replayed {replayed} journal ops on top of the snapshot")
+        assert replayed == 2
+        assert state(system, lookup, pinned) == expected
+        print("Recovered playlist:", [node.title for node in system.playlist_engine])
+
+        # Reopening truncates the torn tail and appends after it
+        journal = MutationJournal(journal_path, system.playlist_engine, system.song_rating_tree, pinned)
+        system.playlist_engine.reverse_playlist()
+        journal.close()
+        system, lookup, pinned = build()
+        assert MutationJournal.recover(journal_path, system, snapshot_path, lookup, pinned) == 3
+
+        # A failed background compaction leaves its segment at .prev; compacting again
+        # must fold that segment into the new snapshot before replacing it
+        journal = MutationJournal(journal_path, system.playlist_engine, system.song_rating_tree, pinned)
+        system.playlist_engine.add_song("Kept", "Artist", 2)
+        journal.compact(system, os.path.join(directory, "missing", "state.pws"), song_lookup=lookup)
+        system.playlist_engine.add_song("Also kept", "Artist", 3)
+        try:
+            journal.wait()
+        except OSError as e:
+            print(f"Expected error from a failed compaction: {e}")
+        else:
+            raise AssertionError("The compaction into a missing directory succeeded")
+        assert os.path.exists(journal_path + ".prev")
+        journal.compact(system, snapshot_path, song_lookup=lookup)
+        assert not os.path.exists(journal_path + ".prev")
+        system.playlist_engine.add_song("After", "Artist", 4)
+        journal.close()
+        expected = state(system, lookup, pinned)
+        system, lookup, pinned = build()
+        assert MutationJournal.recover(journal_path, system, snapshot_path, lookup, pinned) == 1
+        assert state(system, lookup, pinned) == expected
+
+def test_reversed_extend_events():
+    """
+    Test PlaylistEngine.extend on a reversed playlist: the add events it emits must
+    leave the journal, versions, snapshots and NumPy arrays in the playlist's order.
+    """
+    print("Testing reversed batch adds:")
+    with tempfile.TemporaryDirectory() as directory:
+        journal_path = os.path.join(directory, "journal")
+        playlist = PlaylistEngine()
+        journal = MutationJournal(journal_path, playlist)
+        playlist.add_song("X", "Artist", 100, song_id="x")
+        playlist.reverse_playlist()
+        versions = VersionedPlaylist(playlist)
+        concurrent = ConcurrentPlaylist(playlist)
+        try:
+            from numpy_analytics import PlaylistArrays
+            arrays = PlaylistArrays(playlist)
+        except ImportError:
+            arrays = None
+        with concurrent.write():
+            playlist.extend((title, "Artist", 100, title) for title in "ABC")
+        expected = ["X", "A", "B", "C"]
+        print("After extending the reversed playlist:", [node.title for node in playlist])
+        assert [node.title for node in playlist] == expected
+        assert [node.title for node in versions.songs()] == expected
+        assert [node.title for node in concurrent.snapshot()] == expected
+        if arrays is not None:
+            assert arrays.top_longest(4) == list(playlist)  # Equal durations: playlist order
+            arrays.close()
+        concurrent.close()
+        journal.close()
+
+        recovered = PlaylistEngine()
+        system = SystemSnapshot(recovered, SongRatingTree(), PlaybackHistory(recovered), PlaylistSorter(recovered))
+        MutationJournal.recover(journal_path, system)
+        assert [node.title for node in recovered] == expected
+
+        assert versions.undo() and [node.title for node in playlist] == ["X", "A", "B"]
+        versions.close()
+
+def test_journal_replay():
+    """
+    Test recovering from the journal alone (no snapshot): a journaled move between a
+    song with a handle and one without, and pins across a journaled shuffle.
+    """
+    print("Testing journal replay:")
+
+    def replay(journal_path):
+        playlist = PlaylistEngine()
+        system = SystemSnapshot(playlist, SongRatingTree(), PlaybackHistory(playlist), PlaylistSorter(playlist))
+        pinned = PinnedSongs(playlist)
+        MutationJournal.recover(journal_path, system, pinned_songs=pinned)
+        return playlist, pinned
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Swap of a song with a handle and one without
+        journal_path = os.path.join(directory, "moves")
+        playlist = PlaylistEngine()
+        journal = MutationJournal(journal_path, playlist)
+        playlist.add_song("A", "Artist", 100, song_id=1)
+        playlist.add_song("B", "Artist", 100)
+        playlist.add_song("C", "Artist", 100)
+        playlist.move_song(0, 2)
+        journal.close()
+        recovered, _ = replay(journal_path)
+        print("Replayed after a move:", [node.title for node in recovered])
+        assert [node.title for node in recovered] == [node.title for node in playlist] == ["C", "B", "A"]
+
+        # Pins survive a journaled shuffle, whose replay reuses the existing nodes
+        journal_path = os.path.join(directory, "pins")
+        playlist = PlaylistEngine()
+        pinned = PinnedSongs(playlist, seed=3)
+        journal = MutationJournal(journal_path, playlist, pinned_songs=pinned)
+        playlist.extend((f"Song {i}", "Artist", 100 + i, i) for i in range(8))
+        playlist.add_song("Anonymous", "Nobody", 90)
+        pinned.pin_songs([(3, 0)])
+        pinned.shuffle_playlist()
+        journal.close()
+        recovered, recovered_pins = replay(journal_path)
+        assert [node.title for node in recovered] == [node.title for node in playlist]
+        assert recovered_pins.pinned_indices == pinned.pinned_indices == {3: 0}
+
+def test_versioned_playlist():
+    """
+    Test VersionedPlaylist undo/redo across sorts, adds, deletes, moves and reversals,
+    branching after an undo, and checkout of an older version by number.
+    """
+    print("Testing versioned playlist:")
+    playlist = PlaylistEngine()
+    for i, (title, duration) in enumerate([("Charlie", 200), ("Alpha", 300), ("Bravo", 100)], start=1):
+        playlist.add_song(title, "Artist", duration, song_id=i)
+    versions = VersionedPlaylist(playlist)
+    titles = lambda: [node.title for node in playlist]
+
+    PlaylistSorter(playlist).sort_playlist('title')
+    playlist.add_song("Delta", "Artist", 150, song_id=4)
+    playlist.delete_by_id(1)
+    playlist.move_song(0, 2)
+    playlist.reverse_playlist()
+    print("After five edits:", titles())
+    assert titles() == ["Alpha", "Bravo", "Delta"]
+    assert len(versions.versions) == 6
+
+    assert versions.undo() and titles() == ["Delta", "Bravo", "Alpha"]
+    assert versions.undo() and titles() == ["Alpha", "Bravo", "Delta"]
+    assert versions.undo() and titles() == ["Alpha", "Bravo", "Charlie", "Delta"]
+    assert playlist.locate(1) == 2  # Restored songs keep their handles
+    assert versions.undo() and versions.undo() and titles() == ["Charlie", "Alpha", "Bravo"]
+    assert not versions.undo()
+    assert versions.redo() and titles() == ["Alpha", "Bravo", "Charlie"]
+
+    # A change after undo starts a new branch; the old one stays reachable by number
+    playlist.delete_song(0)
+    assert titles() == ["Bravo", "Charlie"] and not versions.redo()
+    versions.checkout(5)
+    assert titles() == ["Alpha", "Bravo", "Delta"]
+    assert [node.title for node in versions.songs(0)] == ["Charlie", "Alpha", "Bravo"]
+    playlist.insert_node(1, SongNode("Echo", "Artist", 120, song_id=5))
+    assert titles() == ["Alpha", "Echo", "Bravo", "Delta"] and playlist.locate(5) == 1
+    assert versions.undo() and titles() == ["Alpha", "Bravo", "Delta"] and playlist.locate(5) is None
+    versions.close()
+
+def test_seeded_shuffle():
+    """
+    Test PinnedSongs.shuffle_playlist and shuffle_play: pins stay put, the same seed
+    gives the same order, and a shuffle play fails once the playlist changes under it.
+    """
+    print("Testing seeded shuffle:")
+
+    def build(seed):
+        playlist = PlaylistEngine()
+        playlist.extend((f"Song {i}", "Artist", 100 + i, i) for i in range(40))
+        pinned = PinnedSongs(playlist, seed=seed)
+        pinned.pin_song(7, "Song 7", 0)
+        pinned.pin_song(30, "Song 30", 25)
+        return playlist, pinned
+
+    playlist, pinned = build(42)
+    nodes = set(playlist)
+    pinned.shuffle_playlist()
+    order = [node.song_id for node in playlist]
+    print("Shuffled with seed 42:", order[:10], "...")
+    assert set(playlist) == nodes  # Same nodes, relinked
+    assert order[0] == 7 and order[25] == 30 and sorted(order) == list(range(40))
+    other_playlist, other_pinned = build(42)
+    other_pinned.shuffle_playlist()
+    assert [node.song_id for node in other_playlist] == order  # Same seed, same shuffle
+
+    play = [node.song_id for node in pinned.shuffle_play()]
+    assert play[0] == 7 and play[25] == 30 and sorted(play) == list(range(40))
+    assert play == [node.song_id for node in other_pinned.shuffle_play()]
+    assert play != [node.song_id for node in pinned.shuffle_play()]
+    assert [node.song_id for node in playlist] == order  # Shuffle play leaves the order alone
+
+    songs = pinned.shuffle_play()
+    next(songs)
+    playlist.add_song("Late", "Artist", 100)
+    try:
+        next(songs)
+        assert False, "Expected RuntimeError"
+    except RuntimeError as e:
+        print(f"Expected error for a playlist changed during shuffle play: {e}")
+
+def test_pin_tracking():
+    """
+    Test that pins follow their songs: deletes shift them, reversals mirror them,
+    shuffles keep them fixed, and removing a pinned song (or relinking without it)
+    unpins it.
+    """
+    print("Testing pin tracking:")
+    playlist = PlaylistEngine()
+    playlist.extend((f"Song {i}", "Artist", 100 + i, i) for i in range(10))
+    pinned = PinnedSongs(playlist, seed=1)
+    assert playlist.index is not None  # Pins need O(log n) positions
+
+    pinned.pin_songs([(3, 0), (8, 5)])
+    pinned.pin_song("by_title", "Song 6", 9)
+    assert pinned.pinned_indices == {3: 0, 8: 5, "by_title": 9}
+    assert pinned.pinned_at(5) == 8 and pinned.pinned_at(1) is None
+
+    playlist.delete_song(1)  # Pins after the deleted song shift down with it
+    print("Pins after deleting index 1:", pinned.pinned_indices)
+    assert pinned.pinned_index(8) == 4 and pinned.pinned_index("by_title") == 8
+    playlist.reverse_playlist()
+    assert pinned.index_to_song_id == {8: 3, 4: 8, 0: "by_title"}
+    playlist.reverse_playlist()
+
+    pinned.shuffle_playlist()
+    assert pinned.pinned_indices == {3: 0, 8: 4, "by_title": 8}
+    try:
+        pinned.pin_at("again", 4)
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        print(f"Expected error for an occupied pin slot: {e}")
+
+    assert playlist.delete_by_id(8)  # Removing a pinned song unpins it
+    assert 8 not in pinned.pinned_indices and pinned.pinned_at(3) is None
+    playlist.relink([node for node in playlist if node.song_id != 3])
+    assert pinned.pinned_indices == {"by_title": 6}
+    assert pinned.unpin_song("by_title") and not pinned.pinned_indices
+
+def test_song_catalog():
+    """
+    Test SongCatalog: tracks are stored once, ids are allocated or validated, and
+    playlists sharing a track link their own nodes over the same metadata.
+    """
+    print("Testing song catalog:")
+    catalog = SongCatalog()
+    intro = catalog.add_track("Intro", "Band", 301)
+    outro = catalog.add_track("Outro", "Band", 245, track_id=100)
+    assert (intro.track_id, outro.track_id) == (1, 100)
+    assert catalog.add_track("Intro", "Band", 301) is intro  # Stored once
+    assert catalog.add_track("Next", "Band", 180).track_id == 101
+    assert len(catalog) == 3 and catalog.get(100) is outro and 2 not in catalog
+    for bad_id, error in ((100, ValueError), (7, ValueError), ("x", TypeError)):
+        try:
+            catalog.add_track("Intro" if bad_id == 7 else "Other", "Band", 301, track_id=bad_id)
+            assert False, f"Expected {error.__name__}"
+        except error as e:
+            print(f"Expected error for track_id {bad_id!r}: {e}")
+
+    first, second = PlaylistEngine(), PlaylistEngine()
+    for playlist in (first, second):
+        playlist.add_track(outro)
+        playlist.add_track(intro, song_id="intro")
+    a, b = first.get_by_id("intro"), second.get_by_id("intro")
+    assert a is not b  # Each playlist links its own node...
+    assert a.title is b.title is intro.title and a.duration is intro.duration  # ...sharing the metadata
+    assert catalog.track_for(b) is intro and catalog.track_for(first.head) is outro
+
+def test_concurrent_playlist():
+    """
+    Test ConcurrentPlaylist under reader and writer threads: every snapshot a reader
+    takes has all the songs and a version no older than the last one it saw.
+    """
+    print("Testing concurrent playlist:")
+    size = 200
+    playlist = PlaylistEngine()
+    playlist.extend((f"Song {i}", "Artist", 100 + i, i) for i in range(size))
+    concurrent = ConcurrentPlaylist(playlist)
+    pinned = PinnedSongs(playlist, seed=5)
+    sorter = PlaylistSorter(playlist)
+    expected_ids = set(range(size))
+    errors = []
+    stop = threading.Event()
+
+    def writer(seed):
+        rng = random.Random(seed)
+        for step in range(300):
+            with concurrent.write() as engine:
+                action = step % 10
+                if action == 0:
+                    pinned.shuffle_playlist()
+                elif action == 1:
+                    sorter.sort_playlist('duration', reverse=rng.random() < 0.5)
+                elif action == 2:
+                    engine.reverse_playlist()
+                else:
+                    engine.move_song(rng.randrange(size), rng.randrange(size))
+                    # Remove and re-add a song inside one block: readers never see size - 1
+                    song_id = rng.randrange(size)
+                    node = engine.get_by_id(song_id)
+                    engine.delete_by_id(song_id)
+                    engine.add_song(node.title, node.artist, node.duration, song_id=song_id)
+
+    def reader():
+        last_version = -1
+        while not stop.is_set():
+            snapshot = concurrent.snapshot()
+            ids = [node.song_id for node in snapshot]
+            if len(snapshot) != size or set(ids) != expected_ids or snapshot.version < last_version:
+                errors.append((snapshot.version, len(ids)))
+                return
+            last_version = snapshot.version
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    writers = [threading.Thread(target=writer, args=(seed,)) for seed in range(2)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    print(f"Final snapshot version after {len(writers)} writers: {concurrent.snapshot().version}")
+    assert not errors, errors
+    assert [node.song_id for node in concurrent.snapshot()] == [node.song_id for node in playlist]
+    assert concurrent.snapshot().version == playlist.version
+    concurrent.close()
+
+def test_playwise_server():
+    """
+    Test PlayWiseServer and PlayWiseClient over TCP: pipelined writes are batched in
+    request order, reads see each applied batch, and errors fail only their own request.
+    """
+    print("Testing PlayWise server:")
+    playlist = PlaylistEngine()
+    lookup = SongLookup(playlist)
+    server = PlayWiseServer(playlist, lookup, SongRatingTree(), PlaybackHistory(playlist))
+
+    async def scenario():
+        host, port = await server.start()
+        client = PlayWiseClient()
+        await client.connect(host, port)
+        # A burst of pipelined adds is applied in a few batches, in request order
+        song_ids = await asyncio.gather(*(client.call("add", title=f"Song {i}", artist="Artist", duration=100 + i)
+                                          for i in range(50)))
+        assert song_ids == sorted(song_ids) and len(set(song_ids)) == 50
+        print(f"50 pipelined adds applied in {server.batches} batches")
+        assert server.batches < 50 and server.batched_ops == 50
+        assert await client.call("size") == 50
+        assert (await client.call("get", index=3))["title"] == "Song 3"
+
+        await asyncio.gather(client.call("move", song_id=song_ids[0], to_index=49),
+                             client.call("rate", song_id=song_ids[1], rating=5),
+                             client.call("play", song_id=song_ids[2]),
+                             client.call("delete", song_id=song_ids[3]))
+        assert [song["title"] for song in await client.call("slice", start=0, stop=3)] == ["Song 49", "Song 1", "Song 2"]
+        assert await client.call("rating", song_id=song_ids[1]) == 5
+        assert (await client.call("top_rated", n=1))[0]["title"] == "Song 1"
+        assert (await client.call("recent", k=1))[0]["title"] == "Song 2"
+        assert (await client.call("lookup", song_id=song_ids[3])) is None
+
+        for op, args in (("explode", {}), ("get", {"index": 999}), ("play", {"song_id": -1})):
+            try:
+                await client.call(op, **args)
+                assert False, "Expected an error response"
+            except RuntimeError as e:
+                print(f"Expected error for {op!r}: {e}")
+
+        # A malformed add in a coalesced run fails alone; the valid adds are still applied
+        loop = asyncio.get_running_loop()
+        batch = [("add", {"title": "Good 1", "artist": "Artist", "duration": 1}, loop.create_future()),
+                 ("add", {"title": "Bad", "duration": 1}, loop.create_future()),
+                 ("add", {"title": "Good 2", "artist": "Artist", "duration": 2}, loop.create_future())]
+        with server.concurrent.write():
+            server._apply(batch)
+        assert isinstance(batch[1][2].exception(), KeyError)
+        assert lookup.lookup_by_id(batch[2][2].result())["title"] == "Good 2"
+        assert await client.call("size") == 51
+
+        # Cancelled futures are skipped when answering; their ops are still applied
+        batch = [("add", {"title": "Gone", "artist": "Artist", "duration": 3}, loop.create_future()),
+                 ("add", {"artist": "Artist", "duration": 4}, loop.create_future()),
+                 ("reverse", {}, loop.create_future()),
+                 ("play", {"song_id": -1}, loop.create_future())]
+        for _, _, future in batch:
+            future.cancel()
+        with server.concurrent.write():
+            server._apply(batch)
+        assert await client.call("size") == 52
+        assert (await client.call("get", index=0))["title"] == "Gone"
+
+        # A batch that fails outright answers its requests with the error, and the
+        # writer task keeps serving later batches
+        apply = server._apply
+
+        def failing_apply(batch):
+            server._apply = apply
+            raise RuntimeError("Injected batch failure")
+
+        server._apply = failing_apply
+        try:
+            await client.call("reverse")
+            assert False, "Expected an error response"
+        except RuntimeError as e:
+            print(f"Expected error from a failed batch: {e}")
+        assert not server.writer_task.done()
+        assert isinstance(await client.call("add", title="After", artist="Artist", duration=5), int)
+        assert await client.call("size") == 53
+        await client.close()
+        await server.close()
+
+    asyncio.run(scenario())
+
+def test_parallel_analytics():
+    """
+    Test ParallelAnalytics: a two-worker summary over playlists or snapshot files
+    matches the serial one, and HyperLogLog sketches merge to the union.
+    """
+    print("Testing parallel analytics:")
+    playlists = []
+    summaries = []
+    for p in range(6):
+        playlist = PlaylistEngine()
+        playlist.extend((f"Song {p}-{i}", f"Artist {i % 7 + p}", 100 + (i * 37 + p) % 200, f"{p}-{i}")
+                        for i in range(40))
+        summary = PlaylistSummary(playlist)
+        summary.register_genres({f"{p}-{i}": ("Rock", "Jazz")[i % 2] for i in range(0, 40, 3)})
+        playlists.append(playlist)
+        summaries.append(summary)
+    genres = {}
+    for summary in summaries:
+        genres.update(summary.genres)
+
+    def genre_of(node):
+        return genres.get(node.song_id, "Unknown")
+
+    serial = ParallelAnalytics(workers=1, batch_songs=50).summarize(playlists, genre_of)
+    parallel = ParallelAnalytics(workers=2, batch_songs=50).summarize(playlists, genre_of)
+    assert serial == parallel
+    expected_genres = {}
+    for summary in summaries:
+        for genre, count in summary.generate_summary()["genre_distribution"].items():
+            expected_genres[genre] = expected_genres.get(genre, 0) + count
+    nodes = [node for playlist in playlists for node in playlist]
+    assert parallel["genre_distribution"] == expected_genres
+    assert parallel["total_playtime"] == sum(node.duration for node in nodes)
+    assert (parallel["playlist_count"], parallel["song_count"]) == (6, 240)
+    assert parallel["artist_count"] == len({node.artist for node in nodes})  # Small sets count exactly
+    longest = sorted(nodes, key=lambda node: -node.duration)[:5]  # Stable: ties keep playlist order
+    assert parallel["top_longest"] == [{"title": node.title, "artist": node.artist, "duration": node.duration}
+                                       for node in longest]
+
+    # Snapshot files: workers read the columns themselves
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for p, playlist in enumerate(playlists):
+            path = os.path.join(directory, f"playlist-{p}.pws")
+            SystemSnapshot(playlist, SongRatingTree(), PlaybackHistory(playlist), PlaylistSorter(playlist)).save(path)
+            paths.append(path)
+        from_files = ParallelAnalytics(workers=2).summarize_files(paths)
+    assert from_files["genre_distribution"] == {"Unknown": 240}
+    for key in ("total_playtime", "artist_count", "top_longest", "song_count", "playlist_count"):
+        assert from_files[key] == parallel[key]
+
+    # The sketch merges to the union, within its error bound at larger counts
+    left, right = HyperLogLog(), HyperLogLog()
+    for i in range(30_000):
+        (left if i % 2 else right).add(f"Artist {i % 20_000}")
+    estimate = left.merge(right).count()
+    print("Distinct artist estimate (exact 20000):", estimate)
+    assert abs(estimate - 20_000) < 20_000 * 0.05, estimate
+    try:
+        left.merge(HyperLogLog(10))
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        print(f"Expected error for mismatched sketches: {e}")
+
+def test_numpy_analytics():
+    """
+    Test PlaylistArrays against plain Python over the same playlist, after buffered
+    appends, arbitrary edits and rating changes (skipped without NumPy).
+    """
+    print("Testing NumPy analytics:")
+    try:
+        from numpy_analytics import PlaylistArrays
+        import numpy  # noqa: F401
+    except ImportError:
+        print("NumPy is not installed; skipping")
+        return
+    playlist = PlaylistEngine()
+    tree = SongRatingTree()
+    playlist.extend((f"Song {i}", f"Artist {i % 3}", 100 + (i * 7) % 50, i) for i in range(30))
+    for i in range(0, 30, 2):
+        tree.insert_song(i, f"Song {i}", f"Artist {i % 3}", 100 + (i * 7) % 50, 1 + i % 5)
+    arrays = PlaylistArrays(playlist, tree)
+
+    def check():
+        nodes = list(playlist)
+        durations = sorted(node.duration for node in nodes)
+        assert arrays.total_playtime() == sum(durations)
+        assert arrays.percentiles(0) == durations[0] and arrays.percentiles([50, 100])[1] == durations[-1]
+        longest = sorted(nodes, key=lambda node: -node.duration)[:5]  # Ties keep playlist order
+        assert arrays.top_longest(5) == longest
+        assert arrays.top_longest(len(nodes) + 3) == sorted(nodes, key=lambda node: -node.duration)
+        counts, edges = arrays.histogram(bins=5)
+        assert sum(counts) == len(nodes) and len(edges) == 6
+        ratings = tree.song_id_to_rating
+        expected = {}
+        for node in nodes:
+            if node.song_id in ratings:
+                expected[ratings[node.song_id]] = expected.get(ratings[node.song_id], 0) + 1
+        assert arrays.rating_distribution() == dict(sorted(expected.items()))
+        stats = arrays.artist_stats()
+        for artist in {node.artist for node in nodes}:
+            songs = [node for node in nodes if node.artist == artist]
+            rated = [ratings[node.song_id] for node in songs if node.song_id in ratings]
+            assert stats[artist]["songs"] == len(songs)
+            assert stats[artist]["playtime"] == sum(node.duration for node in songs)
+            assert stats[artist]["mean_rating"] == (sum(rated) / len(rated) if rated else None)
+        assert set(stats) == {node.artist for node in nodes}
+
+    check()
+    print("Duration quartiles:", arrays.percentiles([25, 50, 75]))
+    playlist.add_song("Late", "New Artist", 500, "late")  # Buffered append
+    tree.insert_song("late", "Late", "New Artist", 500, 4)
+    check()
+    assert arrays.top_longest(1)[0].title == "Late"
+    playlist.reverse_playlist()
+    playlist.delete_by_id(0)
+    playlist.move_song(0, 5)
+    tree.update_rating(2, 5)
+    check()
+    arrays.close()
+    playlist.add_song("Unseen", "Artist 0", 999)
+    assert arrays.top_longest(1)[0].title == "Late"  # No longer tracking
+
 if __name__ == "__main__":
-    test_playwise()
\ No newline at end of file
+    test_playwise()
+    test_song_handles()
+    test_bulk_loading()
+    test_in_place_sort()
+    test_multi_key_sort()
+    test_incremental_summary()
+    test_rating_index()
+    test_search_index()
+    test_id_allocation()
+    test_bounded_history()
+    test_play_log()
+    test_journal_recovery()
+    test_reversed_extend_events()
+    test_journal_replay()
+    test_versioned_playlist()
+    test_seeded_shuffle()
+    test_pin_tracking()
+    test_song_catalog()
+    test_concurrent_playlist()
+    test_playwise_server()
+    test_parallel_analytics()
+    test_numpy_analytics()
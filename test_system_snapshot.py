@@ -114,5 +114,136 @@ def test_system_snapshot():
     
     print("\n=== SystemSnapshot Testing Complete ===")
 
+def test_live_snapshot_consistency():
+    """
+    Test that the event-driven snapshot matches a full recomputation after a
+    random mix of playlist, history and rating mutations.
+    """
+    import random
+    from pinned_songs import PinnedSongs
+    print("=== Testing live snapshot consistency ===")
+    rng = random.Random(3)
+    playlist = PlaylistEngine()
+    rating_tree = SongRatingTree()
+    history = PlaybackHistory(playlist)
+    sorter = PlaylistSorter(playlist)
+    snapshot = SystemSnapshot(playlist, rating_tree, history, sorter)
+    pinned = PinnedSongs(playlist)
+    rated = []
+    for step in range(1500):
+        op = rng.random()
+        if op < 0.35:
+            playlist.add_song(f"Song {step}", "Artist", rng.randrange(100, 140))
+        elif op < 0.5 and playlist.size:
+            playlist.delete_song(rng.randrange(playlist.size))
+        elif op < 0.6:
+            history.add_played_song(f"Played {step}", "Artist", step)
+        elif op < 0.65:
+            history.undo_last_play()
+        elif op < 0.75:
+            song_id = f"rated{step}"
+            rating_tree.insert_song(song_id, "Title", "Artist", 100, rng.randint(1, 5))
+            rated.append(song_id)
+        elif op < 0.8 and rated:
+            rating_tree.delete_song(rated.pop(rng.randrange(len(rated))))
+        elif op < 0.85:
+            sorter.sort_playlist(rng.choice(["title", "duration", "recently_added"]))
+        elif op < 0.9:
+            pinned.shuffle_playlist()
+        elif op < 0.92:
+            playlist.clear()
+        else:
+            playlist.reverse_playlist()
+
+    def expected_longest(playlist):
+        # Stable sort: ties keep playlist order, like the original merge-sort export
+        songs = [{"title": node.title, "artist": node.artist, "duration": node.duration, "added_order": index}
+                 for index, node in enumerate(playlist)]
+        return sorted(songs, key=lambda song: -song["duration"])[:5]
+
+    result = snapshot.export_snapshot()
+    assert result["top_5_longest"] == expected_longest(playlist)
+    assert result["recent_plays"] == history.get_history()[-5:][::-1]
+    expected_counts = {rating: 0 for rating in range(1, 6)}
+    for song_id in rated:
+        expected_counts[rating_tree.get_rating(song_id)] += 1
+    assert result["rating_counts"] == expected_counts
+    print("Live snapshot matches a full recomputation:", result["rating_counts"])
+
+    # Ties follow playlist position after moves and reversals, with or without an index
+    for indexed in (False, True):
+        tied = PlaylistEngine(indexed=indexed)
+        tied_snapshot = SystemSnapshot(tied, SongRatingTree(), PlaybackHistory(tied), PlaylistSorter(tied))
+        for i in range(8):
+            tied.add_song(f"Tie {i}", "Artist", 300 if i % 3 else 100)
+        tied.move_song(1, 6)
+        tied.reverse_playlist()
+        assert tied_snapshot.export_snapshot()["top_5_longest"] == expected_longest(tied)
+
+def test_snapshot_persistence():
+    """
+    Test SystemSnapshot.save/load: a full round trip of playlist order, handles,
+    lookup maps, rating buckets and pins, plus rejection of corrupted files.
+    """
+    import os
+    import tempfile
+    from song_lookup import SongLookup
+    from pinned_songs import PinnedSongs
+    print("=== Testing snapshot persistence ===")
+    playlist = PlaylistEngine()
+    lookup = SongLookup(playlist)
+    rating_tree = SongRatingTree()
+    pinned = PinnedSongs(playlist)
+    snapshot = SystemSnapshot(playlist, rating_tree, PlaybackHistory(playlist), PlaylistSorter(playlist))
+    song_ids = lookup.sync_add_many([(f"Track {i}", f"Artist {i % 2}", 100 + i) for i in range(5)])
+    playlist.add_song("Anonymous", "Nobody", 42)
+    playlist.add_song("Named", "Somebody", 43, song_id="named")
+    for song_id, rating in zip(song_ids, [5, 3.5, 4.0, 3.5, 4]):
+        song = lookup.lookup_by_id(song_id)
+        rating_tree.insert_song(song_id, song["title"], song["artist"], song["duration"], rating)
+    pinned.pin_song(song_ids[4], "Track 4", 0)
+    playlist.reverse_playlist()
+    lookup.delete_song(song_ids[3])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "state.pws")
+        snapshot.save(path, song_lookup=lookup, pinned_songs=pinned)
+
+        restored_playlist = PlaylistEngine(indexed=True)
+        restored_lookup = SongLookup(restored_playlist)
+        restored_tree = SongRatingTree()
+        restored_pins = PinnedSongs(restored_playlist)
+        restored = SystemSnapshot(restored_playlist, restored_tree, PlaybackHistory(restored_playlist),
+                                  PlaylistSorter(restored_playlist))
+        restored.load(path, song_lookup=restored_lookup, pinned_songs=restored_pins)
+
+        def songs(engine):
+            return [(node.title, node.artist, node.duration, node.song_id) for node in engine]
+
+        print("Restored playlist:", [node.title for node in restored_playlist])
+        assert songs(restored_playlist) == songs(playlist)
+        assert restored_playlist.locate("named") == playlist.locate("named")
+        assert restored_lookup.song_id_map == lookup.song_id_map
+        assert restored_lookup.search_prefix("track 1")[0]["song_id"] == song_ids[1]
+        assert restored_lookup.sync_add("New", "Artist", 1) == lookup.sync_add("New", "Artist", 1)
+        assert list(restored_tree.iter_by_rating()) == list(rating_tree.iter_by_rating())
+        assert type(restored_tree.get_rating(song_ids[0])) is int
+        # 4.0 and 4 share one bucket, so both songs report (and restore) the int rating
+        assert [type(tree.get_rating(song_ids[2])) for tree in (rating_tree, restored_tree)] == [int, int]
+        assert restored_pins.pinned_indices == pinned.pinned_indices
+        assert restored.export_snapshot() == snapshot.export_snapshot()
+
+        with open(path, "r+b") as handle:
+            handle.seek(-3, os.SEEK_END)
+            handle.write(b"\xff")
+        try:
+            restored.load(path)
+        except ValueError as e:
+            print(f"Expected error for a corrupted snapshot: {e}")
+        else:
+            raise AssertionError("A corrupted snapshot was loaded")
+
 if __name__ == "__main__":
-    test_system_snapshot()
\ No newline at end of file
+    test_system_snapshot()
+    test_live_snapshot_consistency()
+    test_snapshot_persistence()
@@ -0,0 +1,190 @@
+from persistent_sequence import PersistentSequence
+
+def next_sequence(sequence, playlist_engine, event, args):
+    """
+    Derive the song order after a PlaylistEngine event from the order before it.
+    Args:
+        sequence: PersistentSequence of SongNodes matching the playlist before the event
+        playlist_engine: The (indexed) PlaylistEngine that published the event
+        event (str), args (tuple): The event as passed to listeners
+    Returns:
+        tuple: (new PersistentSequence, step) where step is ("insert", node, index),
+            ("remove", node, index), ("move", node1, node2), ("reverse",), or None when
+            the whole order changed and was captured in full
+    Time Complexity: O(log n) per event, O(n) for "reorder"/"reset"
+    Space Complexity: O(log n) new nodes, O(n) for "reorder"/"reset"
+    """
+    if event == "add":
+        return sequence.append(args[0]), ("insert", args[0], len(sequence))
+    if event == "insert":
+        return sequence.insert(args[1], args[0]), ("insert",) + args
+    if event == "remove":
+        return sequence.delete(args[1]), ("remove",) + args
+    if event == "move":
+        node1, node2 = args
+        index_of = playlist_engine.index_of
+        return sequence.set(index_of(node1), node1).set(index_of(node2), node2), ("move",) + args
+    if event == "reverse":
+        return sequence.reverse(), ("reverse",)
+    return PersistentSequence(playlist_engine), None  # "reorder" / "reset"
+
+
+# Versioned Playlist: records every playlist mutation as a new PersistentSequence version,
+# so any earlier order (including before a sort or shuffle) can be restored.
+# Versions form a tree: mutating after an undo starts a new branch, and the old branch
+# stays reachable through checkout().
+class VersionedPlaylist:
+    def __init__(self, playlist_engine):
+        """
+        Start versioning a playlist; its current order becomes version 0.
+        Args:
+            playlist_engine: PlaylistEngine to track (switched to indexed mode, so the
+                position of every removed or moved song is known in O(log n))
+        Time Complexity: O(n) to build the first version (and the index, if missing)
+        Space Complexity: O(n)
+        """
+        self.playlist_engine = playlist_engine
+        playlist_engine.enable_index()
+        self.versions = [PersistentSequence(playlist_engine)]  # Version number -> song order
+        self.parents = [None]  # Version number -> version it was derived from
+        self.depths = [0]      # Version number -> distance from version 0
+        self.changes = [None]  # Version number -> step from its parent, None if the whole order changed
+        self.redo_targets = {}  # Version -> child that redo() returns to
+        self.current = 0
+        self.restoring = False  # Set while checkout() replays steps on the engine
+        playlist_engine.subscribe(self._on_playlist_event)
+
+    def _on_playlist_event(self, event, *args):
+        if self.restoring:
+            return
+        sequence, change = next_sequence(self.versions[self.current], self.playlist_engine, event, args)
+        self.versions.append(sequence)
+        self.parents.append(self.current)
+        self.depths.append(self.depths[self.current] + 1)
+        self.changes.append(change)
+        self.redo_targets[self.current] = len(self.versions) - 1
+        self.current = len(self.versions) - 1
+
+    def undo(self):
+        """
+        Restore the playlist to the version before the current one.
+        Returns:
+            bool: True if a step was undone, False at the first version
+        Time Complexity: O(log n) for an add/insert/remove/move/reverse step, O(n) for a
+        sort, shuffle or other whole-order change
+        Space Complexity: O(1)
+        """
+        parent = self.parents[self.current]
+        if parent is None:
+            return False
+        self.redo_targets[parent] = self.current
+        self.checkout(parent)
+        return True
+
+    def redo(self):
+        """
+        Re-apply the most recently undone (or latest) change from the current version.
+        Returns:
+            bool: True if a step was redone, False if there is nothing to redo
+        Time Complexity: O(log n) for an add/insert/remove/move/reverse step, O(n) for a
+        sort, shuffle or other whole-order change
+        Space Complexity: O(1)
+        """
+        child = self.redo_targets.get(self.current)
+        if child is None:
+            return False
+        self.checkout(child)
+        return True
+
+    def checkout(self, version):
+        """
+        Make the playlist match any recorded version. The steps between the two versions
+        are replayed (undone up to their common ancestor, then redone) on the same
+        SongNodes, so song handles keep working and subscribers see ordinary mutation
+        events. If that path is long or crosses a whole-order change, the playlist is
+        relinked from the stored version instead, with a single "reset" event.
+        Args:
+            version (int): Version number, 0 <= version < len(self.versions)
+        Raises:
+            IndexError: If the version does not exist
+        Time Complexity: O(min(d log n, n)) for d steps between the versions
+        Space Complexity: O(min(d, n / log n)) for the path
+        """
+        if version < 0 or version >= len(self.versions):
+            raise IndexError("Invalid version")
+        target = self.versions[version]
+        path = self._path(self.current, version, max(1, len(target) // 16))
+        self.restoring = True
+        try:
+            if path is None:
+                self.playlist_engine.relink(target)
+            else:
+                undo_steps, redo_steps = path
+                for step in undo_steps:
+                    self._replay(self.changes[step], forward=False)
+                for step in reversed(redo_steps):
+                    self._replay(self.changes[step], forward=True)
+        finally:
+            self.restoring = False
+        self.current = version
+
+    def _path(self, source, target, limit):
+        """
+        Return (versions to undo, versions to redo) between source and target, or None
+        if there are more than limit steps or a whole-order change is on the way.
+        """
+        parents, depths, changes = self.parents, self.depths, self.changes
+        undo_steps, redo_steps = [], []
+        while source != target:
+            if len(undo_steps) + len(redo_steps) >= limit:
+                return None
+            if depths[source] >= depths[target]:
+                if changes[source] is None:
+                    return None
+                undo_steps.append(source)
+                source = parents[source]
+            else:
+                if changes[target] is None:
+                    return None
+                redo_steps.append(target)
+                target = parents[target]
+        return undo_steps, redo_steps
+
+    def _replay(self, change, forward):
+        """Apply one recorded step to the engine, or its inverse."""
+        engine = self.playlist_engine
+        kind = change[0]
+        if kind == "move":
+            engine.move_song(engine.index_of(change[1]), engine.index_of(change[2]))
+        elif kind == "reverse":
+            engine.reverse_playlist()
+        elif (kind == "insert") == forward:
+            engine.insert_node(change[2], change[1])
+        else:
+            engine.delete_song(change[2])
+
+    def songs(self, version=None):
+        """
+        Return a version's song order without touching the playlist.
+        Args:
+            version (int): Version number, or None for the current one
+        Returns:
+            PersistentSequence: Indexable (O(log n)) and iterable sequence of SongNodes
+        Raises:
+            IndexError: If the version does not exist
+        Time Complexity: O(1)
+        Space Complexity: O(1)
+        """
+        if version is None:
+            version = self.current
+        if version < 0 or version >= len(self.versions):
+            raise IndexError("Invalid version")
+        return self.versions[version]
+
+    def close(self):
+        """
+        Stop recording versions.
+        Time Complexity: O(l) for l listeners
+        Space Complexity: O(1)
+        """
+        self.playlist_engine.unsubscribe(self._on_playlist_event)